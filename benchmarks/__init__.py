@@ -0,0 +1,9 @@
+"""
+Benchmarks for torrench.
+
+Run from the top-level directory of the repository, eg:
+
+    python -m benchmarks.bench_parsers
+
+See benchmarks/README.md
+"""
@@ -0,0 +1,196 @@
+"""
+End-to-end benchmarks.
+
+Runs complete torrench searches (python -m torrench ...) against the
+mock server (see mock_server.py), and measures wall-clock time of each.
+Covers proxy-list fetching, proxy tests (including dead proxies),
+pagination, parsing, magnet lookups (1337x, LimeTorrents), the API sites
+cross-site search (stage_one(), serial and --parallel) and batch search.
+
+Usage (from top-level directory of repository):
+
+    python -m benchmarks.bench_e2e [-s SCENARIO ...] [-r REPEAT] [--latency SEC]
+                                   [--error-rate R] [--dead N] [--warm]
+                                   [-o OPTION=VALUE ...] [--save FILE]
+
+Every run uses a temporary config.ini (XDG_CONFIG_HOME) pointing all *_URL
+entries to the mock server; -o adds options to it (eg. -o PARSER=lxml).
+Result cache is disabled (RESULT_CACHE_TTL = 0), unless set with -o.
+The cache directory (XDG_CACHE_HOME) is new for every run, unless --warm
+is used (then a warm-up run fills it first).
+
+Reported for each scenario:
+    best/median s - wall-clock time of runs (includes interpreter startup;
+                    see 'startup' row)
+    requests      - requests served by mock server in a run (dead: to dead proxies)
+    results       - torrents found
+    status        - 'ok', or what went wrong
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from tabulate import tabulate
+
+from benchmarks import corpus
+from benchmarks.mock_server import MockServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUERY = "ubuntu"
+ALL_SITES = ['-t', '-x', '-n', '-l', '-k', '-s', '-i', '-r', '-b']
+
+# Scenario: (torrench arguments, input)
+SCENARIOS = {
+    'thepiratebay': (['-t', QUERY, '-p', '5'], 'q\n'),
+    'x1337': (['-x', QUERY, '-p', '5'], 'q\n'),
+    'nyaa': (['-n', QUERY, '-p', '5'], 'q\n'),
+    'limetorrents': (['-l', QUERY, '-p', '5'], 'q\n'),
+    'kickasstorrent': (['-k', QUERY, '-p', '5'], 'q\n'),
+    'skytorrents': (['-s', QUERY, '-p', '5'], 'q\n'),
+    'idope': (['-i', QUERY, '-p', '5'], 'q\n'),
+    'rarbg': (['-r', QUERY], 'q\n'),
+    'xbit': (['-b', QUERY], 'q\n'),
+    'libgen': (['-g', '0123456789'], '0\n'),
+    # Select first torrent, print links (magnet is fetched from torrent page)
+    'x1337-magnet': (['-x', QUERY], '1\n1\nr\nq\n'),
+    'limetorrents-magnet': (['-l', QUERY], '1\n1\nr\nq\n'),
+    'cross-site': (['-C'] + ALL_SITES + [QUERY, '-p', '2'], 'q\n'),
+    'cross-site-parallel': (['-C', '--parallel'] + ALL_SITES + [QUERY, '-p', '2'], 'q\n'),
+    # 20 queries in one process (results are printed as JSON lines)
+    'batch': (['-t', '-x', '-n', '--batch', '-', '-p', '2'], ''.join("%s %d\n" % (QUERY, i) for i in range(20))),
+}
+STARTUP = 'startup'
+
+ERRORS = [
+    ("No more proxies found", 'no proxy'),
+    ("Something went wrong", 'error'),
+    ("No results found", 'no results'),
+    ("Config file not configured", 'no config'),
+]
+
+
+def write_config(path, server, options):
+    """Write config.ini (in `path`/torrench) using `server`."""
+    os.makedirs(os.path.join(path, 'torrench'), exist_ok=True)
+    lines = ["[Torrench-Config]", "enable = 1"]
+    lines += ["{} = {}".format(key, value) for key, value in server.config().items()]
+    lines += options
+    with open(os.path.join(path, 'torrench', 'config.ini'), 'w', encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def run(cmd, stdin, env, timeout):
+    """Run `cmd`. Returns (time taken, output, status)."""
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run(cmd, input=stdin, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              env=env, cwd=ROOT, timeout=timeout, universal_newlines=True)
+    except subprocess.TimeoutExpired as e:
+        return time.perf_counter() - start, e.output or '', 'timeout'
+    taken = time.perf_counter() - start
+    status = 'ok'
+    for text, error in ERRORS:
+        if text in proc.stdout:
+            status = error
+            break
+    if 'Traceback' in proc.stdout:
+        status = 'crash'
+    return taken, proc.stdout, status
+
+
+def bench(name, server, base, args):
+    """Run scenario `name` REPEAT times."""
+    if name == STARTUP:
+        cmd, stdin = [sys.executable, '-c', 'import torrench.Torrench'], ''
+    else:
+        argv, stdin = SCENARIOS[name]
+        cmd = [sys.executable, '-m', 'torrench'] + argv
+    env = dict(os.environ)
+    env['XDG_CONFIG_HOME'] = os.path.join(base, 'config')
+    env['XDG_DATA_HOME'] = os.path.join(base, 'data')
+    env['PYTHONWARNINGS'] = 'ignore'
+    cache = os.path.join(base, 'cache')
+    if args.warm:
+        env['XDG_CACHE_HOME'] = cache
+        run(cmd, stdin, env, args.timeout)
+    times = []
+    requests = dead = results = 0
+    status = 'ok'
+    for _ in range(args.repeat):
+        if not args.warm:
+            shutil.rmtree(cache, ignore_errors=True)
+            env['XDG_CACHE_HOME'] = cache
+        server.reset_stats()
+        taken, output, status = run(cmd, stdin, env, args.timeout)
+        times.append(taken)
+        stats = server.reset_stats()
+        dead = sum(v for k, v in stats.items() if k.endswith('(dead)'))
+        requests = sum(v for k, v in stats.items() if k != 'errors') - dead
+        found = re.findall(r"Total (\d+) torrents", output)
+        results = int(found[-1]) if found else 0
+        if status != 'ok' and args.verbose:
+            print(output, file=sys.stderr)
+    return {
+        'scenario': name, 'best': min(times), 'median': statistics.median(times),
+        'requests': requests, 'dead': dead, 'results': results, 'status': status,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark complete searches against the mock server")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS) + [STARTUP],
+                        help="Scenario to run. Can be given more than once (default: all)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Runs per scenario (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Delay of responses, seconds (default: %(default)s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra delay, up to JITTER seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--dead", type=int, default=2, help="Dead proxies per site (default: %(default)s)")
+    parser.add_argument("--dead-delay", type=float, default=1.0,
+                        help="Seconds before dead proxies drop connection (default: %(default)s)")
+    parser.add_argument("-q", "--query", help="Query of saved pages to serve (default: first recorded, else synthetic)")
+    parser.add_argument("-o", "--option", action="append", default=[], metavar="OPTION=VALUE",
+                        help="Add option to config.ini (eg. PROXY_MODE=serial)")
+    parser.add_argument("--warm", action="store_true", help="Keep cache (proxy health, proxy lists) between runs")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds after which a run is aborted")
+    parser.add_argument("--save", metavar="FILE", help="Also save results to FILE (JSON)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show output of failed runs")
+    args = parser.parse_args()
+
+    for site in corpus.SITES:
+        corpus.default_query(site)
+    server = MockServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        dead=args.dead, dead_delay=args.dead_delay, query=args.query).start()
+    base = tempfile.mkdtemp(prefix='torrench-bench-')
+    results = []
+    try:
+        options = [o.replace('=', ' = ', 1) for o in args.option]
+        # Searches are timed, not result cache (unless asked for with -o)
+        if not any(o.split('=')[0].strip() == 'RESULT_CACHE_TTL' for o in args.option):
+            options.append('RESULT_CACHE_TTL = 0')
+        write_config(os.path.join(base, 'config'), server, options)
+        for name in args.scenario or [STARTUP] + list(SCENARIOS):
+            print("Running {}...".format(name), file=sys.stderr)
+            results.append(bench(name, server, base, args))
+    finally:
+        server.stop()
+        shutil.rmtree(base, ignore_errors=True)
+
+    table = [[r['scenario'], "{:.2f}".format(r['best']), "{:.2f}".format(r['median']),
+              r['requests'], r['dead'], r['results'], r['status']] for r in results]
+    print(tabulate(table, headers=['scenario', 'best s', 'median s', 'requests', 'dead', 'results', 'status'],
+                   tablefmt="grid"))
+    if args.save:
+        with open(args.save, 'w', encoding="utf-8") as f:
+            json.dump({'options': vars(args), 'results': results}, f, indent=1)
+        print("\nSaved results to {}".format(args.save))
+
+
+if __name__ == "__main__":
+    main()
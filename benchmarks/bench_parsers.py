@@ -0,0 +1,259 @@
+"""
+Parser benchmarks.
+
+Measures parsing of saved result pages (see corpus.py) by each site
+module's parse_html(), with each parser (PARSER = bs4/lxml, PARTIAL_PARSE),
+and merging of results of all sites by CrossSite.merge_results()
+(stage_two() of cross-site search).
+
+Usage (from top-level directory of repository):
+
+    python -m benchmarks.bench_parsers [-s SITE ...] [--parser PARSER ...]
+                                       [-p PAGES] [-r REPEAT] [--save FILE]
+
+Reported for each case:
+    rows        - results parsed
+    parse ms    - time taken to parse pages into trees (make_doc())
+    extract ms  - time taken by parse_html()
+    rows/s      - rows / (parse + extract) time
+    peak B/row  - peak traced (tracemalloc) allocation, per row
+    kept B/row  - memory still allocated once parse trees are dropped, per row
+    RSS MiB     - peak RSS of the process running the case
+    +RSS MiB    - growth of peak RSS while running the case
+
+Times are the best of REPEAT runs. Every case runs in a separate
+process, so RSS figures of one case do not affect another.
+"""
+import argparse
+import copy
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from tabulate import tabulate
+
+from benchmarks import corpus
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MERGE = 'merge'
+
+# Parser name: (PARSER, PARTIAL_PARSE)
+PARSERS = {
+    'bs4': ('bs4', True),
+    'bs4-full': ('bs4', False),
+    'lxml': ('lxml', False),
+}
+
+
+def max_rss():
+    """Peak RSS of this process (MiB). None if unknown."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on linux, bytes on macOS
+    if sys.platform == 'darwin':
+        return rss / (1024 * 1024)
+    return rss / 1024
+
+
+def load_pages(site, query, pages):
+    """Return (pages, proxy, query) of `site` from corpus."""
+    if query is None:
+        query = corpus.default_query(site)
+    content, meta = corpus.load(site, query)
+    if pages:
+        content = content[:pages]
+    return content, meta['proxy'], query
+
+
+def parse_site(site, parser, content, proxy, index=0):
+    """
+    Parse `content` (pages) with module of `site`.
+
+    Returns (module object, parse time, extract time).
+    """
+    obj = corpus.make_module(site, 'bench', len(content), proxy)
+    obj.parser, obj.partial_parse = PARSERS[parser]
+    obj.index = index
+    start = time.perf_counter()
+    for page, raw in enumerate(content):
+        obj.soup_dict[page] = obj.make_doc(raw)
+    parsed = time.perf_counter()
+    obj.parse_html()
+    return obj, parsed - start, time.perf_counter() - parsed
+
+
+def traced(func):
+    """Run `func`. Returns (result, peak bytes, bytes still allocated after `func` returned)."""
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    gc.collect()
+    kept = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, peak, kept
+
+
+def bench_site(site, parser, query, pages, repeat):
+    """Benchmark parsing pages of `site` with `parser`."""
+    content, proxy, query = load_pages(site, query, pages)
+    # Import module before measuring RSS
+    corpus.make_module(site, 'bench', 1, proxy)
+    rss_before = max_rss()
+    best_parse = best_extract = None
+    for _ in range(repeat):
+        gc.collect()
+        obj, parse_time, extract_time = parse_site(site, parser, content, proxy)
+        if best_parse is None or parse_time + extract_time < best_parse + best_extract:
+            best_parse, best_extract = parse_time, extract_time
+        rows = len(obj.results)
+        del obj
+    # (tracemalloc adds to RSS; measured before it's started)
+    rss_after = max_rss()
+
+    def run():
+        obj = parse_site(site, parser, content, proxy)[0]
+        # Only results are kept (parse trees are dropped).
+        obj.soup_dict = {}
+        obj.soup = None
+        return obj
+    obj, peak, kept = traced(run)
+    return {
+        'case': site, 'parser': parser, 'query': query, 'pages': len(content), 'rows': rows,
+        'parse_ms': best_parse * 1000, 'extract_ms': best_extract * 1000,
+        'rows_per_s': rows / (best_parse + best_extract) if rows else 0,
+        'peak_per_row': peak / rows if rows else 0, 'kept_per_row': kept / rows if rows else 0,
+        'rss': rss_after, 'rss_growth': None if rss_before is None else rss_after - rss_before,
+    }
+
+
+def bench_merge(parser, query, pages, repeat):
+    """
+    Benchmark merging results of all sites (CrossSite.merge_results()),
+    unsorted and sorted (--sorted), followed by making table rows (display_rows()).
+    """
+    from torrench.utilities.cross_site import CrossSite
+
+    site_results = []
+    index = 0
+    page_count = 0
+    for site in sorted(corpus.SITES):
+        content, proxy, _ = load_pages(site, query if query in corpus.queries(site) else None, pages)
+        obj = parse_site(site, parser, content, proxy, index)[0]
+        index = obj.index
+        page_count = max(page_count, len(content))
+        site_results.append(obj.results)
+        del obj
+    rows = sum(len(i) for i in site_results)
+    results = []
+    for sort in (False, True):
+        rss_before = max_rss()
+        best = None
+        for _ in range(repeat):
+            cs = CrossSite('bench', pages)
+            args = copy.deepcopy(site_results)
+            gc.collect()
+            start = time.perf_counter()
+            cs.merge_results(args, sort=sort)
+            cs.display_rows()
+            taken = time.perf_counter() - start
+            if best is None or taken < best:
+                best = taken
+        rss_after = max_rss()
+
+        def run():
+            cs = CrossSite('bench', pages)
+            cs.merge_results(copy.deepcopy(site_results), sort=sort)
+            cs.display_rows()
+            return cs
+        cs, peak, kept = traced(run)
+        results.append({
+            'case': 'merge (sorted)' if sort else 'merge', 'parser': parser, 'query': query or '-',
+            'pages': page_count, 'rows': rows, 'parse_ms': 0, 'extract_ms': best * 1000,
+            'rows_per_s': rows / best if rows else 0,
+            'peak_per_row': peak / rows if rows else 0, 'kept_per_row': kept / rows if rows else 0,
+            'rss': rss_after, 'rss_growth': None if rss_before is None else rss_after - rss_before,
+        })
+    return results
+
+
+def run_child(case, parser, args):
+    """Run one case in a new process. Returns list of results."""
+    cmd = [sys.executable, '-m', 'benchmarks.bench_parsers', '--child', case,
+           '--parser', parser, '-r', str(args.repeat)]
+    if args.pages:
+        cmd += ['-p', str(args.pages)]
+    if args.query:
+        cmd += ['-q', args.query]
+    proc = subprocess.run(cmd, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if proc.returncode != 0:
+        print("[{} / {}] failed:\n{}".format(case, parser, proc.stderr), file=sys.stderr)
+        return []
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def show(results):
+    """Print results as table."""
+    def fmt(value, spec):
+        return '-' if value is None else format(value, spec)
+    table = [[r['case'], r['parser'], r['pages'], r['rows'], fmt(r['parse_ms'], '.1f'), fmt(r['extract_ms'], '.1f'),
+              fmt(r['rows_per_s'], ',.0f'), fmt(r['peak_per_row'], ',.0f'), fmt(r['kept_per_row'], ',.0f'),
+              fmt(r['rss'], '.1f'), fmt(r['rss_growth'], '.1f')] for r in results]
+    headers = ['case', 'parser', 'pages', 'rows', 'parse ms', 'extract ms', 'rows/s',
+               'peak B/row', 'kept B/row', 'RSS MiB', '+RSS MiB']
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parsing of saved result pages")
+    parser.add_argument("-s", "--site", action="append", choices=sorted(corpus.SITES) + [MERGE],
+                        help="Site (module) to benchmark, or 'merge'. Can be given more than once (default: all)")
+    parser.add_argument("--parser", action="append", choices=sorted(PARSERS),
+                        help="Parser to benchmark. Can be given more than once (default: all)")
+    parser.add_argument("-q", "--query", help="Query of saved pages (default: first recorded, else synthetic)")
+    parser.add_argument("-p", "--pages", type=int, default=0, help="Use first PAGES pages only (default: all)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Runs per case (default: %(default)s)")
+    parser.add_argument("--save", metavar="FILE", help="Also save results to FILE (JSON)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    parsers = args.parser or sorted(PARSERS)
+    if args.child:
+        # Runs a single case; results are printed as JSON for the parent process.
+        if args.child == MERGE:
+            results = bench_merge(parsers[0], args.query, args.pages, args.repeat)
+        else:
+            results = [bench_site(args.child, parsers[0], args.query, args.pages, args.repeat)]
+        print(json.dumps(results))
+        return
+
+    cases = args.site or sorted(corpus.SITES) + [MERGE]
+    for site in corpus.SITES:
+        if site in cases or MERGE in cases:
+            if args.query is None or args.query == corpus.SYNTHETIC:
+                corpus.default_query(site)
+    results = []
+    for case in cases:
+        for name in parsers if case != MERGE else parsers[:1]:
+            print("Running {} / {}...".format(case, name), file=sys.stderr)
+            results += run_child(case, name, args)
+    show(results)
+    if args.save:
+        with open(args.save, 'w', encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+        print("\nSaved results to {}".format(args.save))
+
+
+if __name__ == "__main__":
+    main()
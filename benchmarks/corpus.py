@@ -0,0 +1,131 @@
+"""
+Fixture Corpus Module.
+
+Search result pages saved to disk, so site modules can be
+benchmarked without network access. Layout:
+
+    benchmarks/fixtures/<site>/<query>/page-00.html, page-01.html, ...
+    benchmarks/fixtures/<site>/<query>/meta.json
+
+meta.json stores the proxy the pages were fetched from (site modules
+build links from it), the source of pages ('recorded' or 'synthetic')
+and the time of recording.
+
+Pages are recorded from live sites with record.py. When a site has no
+recorded pages, synthetic pages (see synthetic.py) are generated under
+the query 'synthetic'.
+"""
+import importlib
+import json
+import os
+import time
+from collections import namedtuple
+
+from benchmarks import synthetic
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+SYNTHETIC = 'synthetic'
+# Default number of pages (most a search can fetch; see -p option)
+MAX_PAGES = 50
+
+Site = namedtuple('Site', ['cls', 'prefix', 'generate'])
+
+# Sites (module names in torrench/modules/) with HTML result pages.
+# `prefix` is used in proxy URL of synthetic pages (and by the mock server).
+SITES = {
+    'thepiratebay': Site('ThePirateBay', 'tpb', synthetic.tpb),
+    'x1337': Site('x1337', '1337x', synthetic.x1337),
+    'nyaa': Site('Nyaa', 'nyaa', synthetic.nyaa),
+    'limetorrents': Site('LimeTorrents', 'lime', synthetic.limetorrents),
+    'kickasstorrent': Site('KickassTorrents', 'kat', synthetic.kickasstorrent),
+    'idope': Site('Idope', 'idope', synthetic.idope),
+    'skytorrents': Site('SkyTorrents', 'sky', synthetic.skytorrents),
+}
+
+
+def synthetic_proxy(site, host='127.0.0.1:8000'):
+    """Proxy URL synthetic pages of `site` are generated for."""
+    return "http://%s/%s" % (host, SITES[site].prefix)
+
+
+def query_dir(site, query):
+    """Directory of pages of `site` for `query`."""
+    return os.path.join(FIXTURES, site, query.replace(os.sep, '_'))
+
+
+def page_path(site, query, page):
+    """Path of page `page` (0-based)."""
+    return os.path.join(query_dir(site, query), 'page-%02d.html' % (page))
+
+
+def queries(site):
+    """Queries saved for `site`."""
+    path = os.path.join(FIXTURES, site)
+    if not os.path.isdir(path):
+        return []
+    return sorted(q for q in os.listdir(path) if os.path.isfile(os.path.join(path, q, 'meta.json')))
+
+
+def save(site, query, pages, proxy, source='recorded'):
+    """Save `pages` (list of bytes) of `site` for `query`."""
+    path = query_dir(site, query)
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.startswith('page-'):
+            os.remove(os.path.join(path, name))
+    for page, content in enumerate(pages):
+        with open(page_path(site, query, page), 'wb') as f:
+            f.write(content)
+    meta = {'proxy': proxy, 'source': source, 'pages': len(pages), 'recorded': time.time()}
+    with open(os.path.join(path, 'meta.json'), 'w', encoding="utf-8") as f:
+        json.dump(meta, f, indent=1)
+
+
+def load(site, query):
+    """Return (pages, meta) of `site` for `query`. Pages are bytes."""
+    path = query_dir(site, query)
+    with open(os.path.join(path, 'meta.json'), 'r', encoding="utf-8") as f:
+        meta = json.load(f)
+    pages = []
+    for page in range(meta['pages']):
+        with open(page_path(site, query, page), 'rb') as f:
+            pages.append(f.read())
+    return pages, meta
+
+
+def ensure_synthetic(site, pages=MAX_PAGES):
+    """Generate synthetic pages of `site` (unless already present)."""
+    try:
+        if load(site, SYNTHETIC)[1]['pages'] >= pages:
+            return
+    except (OSError, ValueError, KeyError):
+        pass
+    proxy = synthetic_proxy(site)
+    generate = SITES[site].generate
+    save(site, SYNTHETIC, [generate(page, proxy).encode() for page in range(pages)], proxy, SYNTHETIC)
+
+
+def default_query(site):
+    """First recorded query of `site`; Synthetic pages if there's none."""
+    for query in queries(site):
+        if query != SYNTHETIC:
+            return query
+    ensure_synthetic(site)
+    return SYNTHETIC
+
+
+def make_module(site, query, pages, proxy):
+    """
+    Create object of site module, without network access.
+
+    Proxies are not read from config.ini (or fetched from proxy-list pages);
+    `proxy` is used instead. Result cache is not used.
+    """
+    module = importlib.import_module("torrench.modules.{}".format(site))
+    cls = getattr(module, SITES[site].cls)
+    obj = cls.__new__(cls)
+    obj.get_proxies = lambda name: [proxy]
+    cls.__init__(obj, query, pages)
+    obj.proxy = proxy
+    obj.use_result_cache = False
+    return obj
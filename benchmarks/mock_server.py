@@ -0,0 +1,312 @@
+"""
+Mock Site Server.
+
+A local HTTP server standing in for the sites torrench searches, so
+complete searches (proxy tests, pagination, magnet lookups) can be run
+without network access.
+
+Served (on one host:port; each site under its own path prefix):
+    TPB, 1337x, Nyaa, LimeTorrents, KAT, SkyTorrents, Idope
+        - Result pages from the fixture corpus (see corpus.py).
+          Pages past the saved ones have no results.
+        - Torrent pages with magnet links (1337x, LimeTorrents).
+    /proxy-list/tpb, /proxy-list/1337x
+        - Proxy-list pages (read by Config.get_proxies()).
+    RarBg, XBit, LibGen
+        - JSON API responses (RarBg tokens are checked and expire).
+
+Injected faults:
+    latency/jitter - Delay (seconds) added to every response
+    error_rate     - Fraction of requests answered with HTTP 503
+    dead           - Number of dead proxies per site. Requests to dead proxies
+                     are dropped (after dead_delay seconds) without a response.
+
+Point torrench to the server with the *_URL entries of config(),
+eg. in $XDG_CONFIG_HOME/torrench/config.ini. Standalone usage:
+
+    python -m benchmarks.mock_server [--port 8000] [--latency 0.05] [--dead 2] ...
+
+The config.ini entries are printed on start.
+"""
+import argparse
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks import corpus, synthetic
+
+# config.ini entry of each HTML site
+CONFIG_KEYS = {
+    'thepiratebay': 'TPB_URL',
+    'x1337': '1337X_URL',
+    'nyaa': 'NYAA_URL',
+    'limetorrents': 'LIMETORRENTS_URL',
+    'kickasstorrent': 'KAT_URL',
+    'skytorrents': 'SKY_URL',
+    'idope': 'IDOPE_URL',
+}
+# Sites with proxy-list pages: (site, td class of proxies)
+PROXY_LISTS = {
+    'tpb': ('thepiratebay', 'site'),
+    '1337x': ('x1337', 'text-left'),
+}
+# Sites using first proxy as is (no proxy test)
+UNCHECKED = ['nyaa', 'idope']
+
+# Path (after site prefix) of result page: regex, number of first page
+PAGE_PATTERNS = {
+    'thepiratebay': (re.compile(r'^/search/[^/]*/(\d+)/'), 0),
+    'x1337': (re.compile(r'^/search/[^/]*/(\d+)/'), 1),
+    'limetorrents': (re.compile(r'^/search/all/[^/]*/seeds/(\d+)/'), 1),
+    'kickasstorrent': (re.compile(r'^/usearch/[^/]*/(\d+)/'), 1),
+    'skytorrents': (re.compile(r'^/(?:search/all|top1000/all)/ed/(\d+)/'), 1),
+}
+# Page number in query string (?p=N)
+PAGE_PARAMS = {'nyaa': '/', 'idope': '/torrent-list/'}
+# Torrent (info) pages having magnet links
+TORRENT_PAGES = {
+    'x1337': (re.compile(r'^/torrent/(\d+)/'), synthetic.x1337_torrent),
+    'limetorrents': (re.compile(r'-torrent-(\d+)\.html$'), synthetic.limetorrents_torrent),
+}
+
+RARBG_TOKEN_ERROR = {'error': "Invalid token. Use get_token for a new one!", 'error_code': 4}
+RARBG_RATE_ERROR = {'error': "Too many requests per second. Maximum requests allowed are 1req/2sec Please try again later!", 'error_code': 5}
+
+
+class _Server(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class MockServer:
+    """
+    MockServer class.
+
+    Runs the server in a background thread (start()/stop()).
+    Requests served are counted per site in 'stats'.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 dead=0, dead_delay=0.0, query=None, token_ttl=900, rarbg_interval=0.0, seed=0):
+        """Initialisations. (port=0 picks a free port)"""
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.dead = dead
+        self.dead_delay = dead_delay
+        self.query = query
+        self.token_ttl = token_ttl
+        self.rarbg_interval = rarbg_interval
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = Counter()
+        self.pages = {}
+        self.tokens = {}
+        self.last_api_request = 0
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def url(self):
+        """Base URL of server."""
+        return "http://%s:%d" % (self.host, self.port)
+
+    def proxy(self, site):
+        """URL of working proxy of `site`."""
+        return "%s/%s" % (self.url, corpus.SITES[site].prefix)
+
+    def dead_proxies(self, site):
+        """URLs of dead proxies of `site`."""
+        return ["%s/%s-dead%d" % (self.url, corpus.SITES[site].prefix, i) for i in range(self.dead)]
+
+    def config(self):
+        """*_URL entries (dict) of config.ini to use this server."""
+        entries = {}
+        for site, key in CONFIG_KEYS.items():
+            if site in UNCHECKED:
+                entries[key] = self.proxy(site)
+            else:
+                entries[key] = " ".join(self.dead_proxies(site) + [self.proxy(site)])
+        for prefix, (site, _) in PROXY_LISTS.items():
+            entries[CONFIG_KEYS[site]] = "%s/proxy-list/%s" % (self.url, prefix)
+        entries['RARBG_URL'] = "%s/rarbg/pubapi_v2.php?" % (self.url)
+        entries['XBIT_URL'] = "%s/xbit/" % (self.url)
+        entries['LIBGEN_URL'] = "%s/libgen/" % (self.url)
+        return entries
+
+    def start(self):
+        """Start serving (in background thread)."""
+        self.httpd = _Server((self.host, self.port), self.handler())
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def reset_stats(self):
+        """Reset request counters (returns old ones)."""
+        with self.lock:
+            stats = self.stats
+            self.stats = Counter()
+            return stats
+
+    def count(self, key):
+        """Count a request."""
+        with self.lock:
+            self.stats[key] += 1
+
+    def site_pages(self, site):
+        """Result pages of `site` (links rewritten to point to this server)."""
+        with self.lock:
+            if site not in self.pages:
+                query = self.query if self.query in corpus.queries(site) else corpus.default_query(site)
+                pages, meta = corpus.load(site, query)
+                old, new = meta['proxy'], self.proxy(site)
+                old_host, new_host = old.split('/')[2], new.split('/')[2]
+                self.pages[site] = [p.replace(old.encode(), new.encode()).replace(
+                    ('//' + old_host).encode(), ('//' + new_host).encode()) for p in pages]
+            return self.pages[site]
+
+    def html(self, site, path, query):
+        """Response body of `path` of `site` (None if not found)."""
+        page = None
+        if path in ('', '/'):
+            page = 0
+        if site in PAGE_PATTERNS:
+            pattern, first = PAGE_PATTERNS[site]
+            match = pattern.search(path)
+            if match:
+                page = int(match.group(1)) - first
+        elif site in PAGE_PARAMS and path.startswith(PAGE_PARAMS[site]) and 'p' in query:
+            page = int(query['p'][0]) - 1
+        if site in TORRENT_PAGES:
+            pattern, make_page = TORRENT_PAGES[site]
+            match = pattern.search(path)
+            if match:
+                return make_page(int(match.group(1))).encode()
+        if page is None and site == 'thepiratebay' and path.startswith('/top/'):
+            page = 0
+        if page is None:
+            return None
+        pages = self.site_pages(site)
+        if 0 <= page < len(pages):
+            return pages[page]
+        return synthetic.no_results().encode()
+
+    def rarbg(self, query):
+        """RarBg API response."""
+        now = time.time()
+        with self.lock:
+            limited = self.rarbg_interval and now - self.last_api_request < self.rarbg_interval
+            self.last_api_request = now
+            if limited:
+                return RARBG_RATE_ERROR
+            if 'get_token' in query:
+                token = uuid.uuid4().hex[:10]
+                self.tokens[token] = now
+                return {'token': token}
+            issued = self.tokens.get(query.get('token', [''])[0])
+        if issued is None or now - issued > self.token_ttl:
+            return RARBG_TOKEN_ERROR
+        return synthetic.rarbg()
+
+    def handler(self):
+        """Request handler class bound to this server."""
+        mock = self
+        prefixes = {site.prefix: name for name, site in corpus.SITES.items()}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def reply(self, status, body, content_type="text/html; charset=utf-8"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                query = parse_qs(url.query)
+                parts = url.path.split('/', 2)
+                prefix = parts[1] if len(parts) > 1 else ''
+                rest = '/' + parts[2] if len(parts) > 2 else ''
+                delay = mock.latency + (mock.random.uniform(0, mock.jitter) if mock.jitter else 0)
+                if delay:
+                    time.sleep(delay)
+                dead = re.match(r'^(.+)-dead\d+$', prefix)
+                if dead:
+                    mock.count(dead.group(1) + ' (dead)')
+                    if mock.dead_delay:
+                        time.sleep(mock.dead_delay)
+                    self.close_connection = True
+                    return
+                mock.count(prefix)
+                if mock.error_rate and mock.random.random() < mock.error_rate:
+                    mock.count('errors')
+                    self.reply(503, b"Service Unavailable")
+                    return
+                if prefix == 'proxy-list' and rest.strip('/') in PROXY_LISTS:
+                    site, td_class = PROXY_LISTS[rest.strip('/')]
+                    proxies = mock.dead_proxies(site) + [mock.proxy(site)]
+                    self.reply(200, synthetic.proxy_list(proxies, td_class).encode())
+                elif prefix == 'rarbg':
+                    self.reply(200, json.dumps(mock.rarbg(query)).encode(), "application/json")
+                elif prefix == 'xbit' and rest.startswith('/api'):
+                    self.reply(200, json.dumps(synthetic.xbit()).encode(), "application/json")
+                elif prefix == 'libgen' and rest.startswith('/json.php'):
+                    self.reply(200, json.dumps(synthetic.libgen()).encode(), "application/json")
+                elif prefix in prefixes:
+                    body = mock.html(prefixes[prefix], rest, query)
+                    if body is None:
+                        self.reply(404, b"Not Found")
+                    else:
+                        self.reply(200, body)
+                else:
+                    self.reply(404, b"Not Found")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve mock torrent sites")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay added to responses (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra delay, up to JITTER seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--dead", type=int, default=0, help="Dead proxies per site")
+    parser.add_argument("--dead-delay", type=float, default=0.0, help="Seconds before a dead proxy drops connection")
+    parser.add_argument("-q", "--query", help="Query of saved pages to serve (default: first recorded, else synthetic)")
+    args = parser.parse_args()
+    server = MockServer(args.host, args.port, args.latency, args.jitter, args.error_rate,
+                        args.dead, args.dead_delay, args.query).start()
+    print("Serving on {}. Add to [Torrench-Config] of config.ini:\n".format(server.url))
+    for key, value in server.config().items():
+        print("{} = {}".format(key, value))
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
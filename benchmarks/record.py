@@ -0,0 +1,58 @@
+"""
+Record search result pages from live sites into the fixture corpus.
+
+Usage (from top-level directory of repository):
+
+    python -m benchmarks.record -s SITE [-s SITE ...] -q QUERY [-p PAGES]
+
+Proxies are obtained/tested as usual (config.ini is required).
+Pages are fetched until PAGES pages are saved or a page has no results.
+"""
+import argparse
+import importlib
+import sys
+
+import torrench.utilities.session as session
+from benchmarks import corpus
+
+HEADERS = {"user-agent": "Mozilla/5.0 (X11; Linux x86_64; rv:57.0) Gecko/20100101 Firefox/57.0"}
+
+
+def record(site, query, pages):
+    """Record up to `pages` result pages of `site` for `query`."""
+    module = importlib.import_module("torrench.modules.{}".format(site))
+    obj = module.cross_site(query, pages)
+    if hasattr(obj, 'check_proxy'):
+        obj.check_proxy()
+    saved = []
+    for page in range(pages):
+        url = obj.search_url(page)
+        raw = session.get(url, timeout=15, headers=HEADERS)
+        print("[{}] page {} ({}, {} bytes)".format(site, page + 1, raw.status_code, len(raw.content)))
+        if raw.status_code != 200 or not obj.has_results(obj.make_doc(raw.content)):
+            break
+        saved.append(raw.content)
+    if not saved:
+        print("[{}] No results. Nothing saved.".format(site))
+        return
+    corpus.save(site, query, saved, obj.proxy)
+    print("[{}] Saved {} pages to {}".format(site, len(saved), corpus.query_dir(site, query)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record search result pages into benchmarks/fixtures/")
+    parser.add_argument("-s", "--site", action="append", choices=sorted(corpus.SITES),
+                        help="Site (module) to record. Can be given more than once (default: all)")
+    parser.add_argument("-q", "--query", required=True, help="Search query")
+    parser.add_argument("-p", "--pages", type=int, default=corpus.MAX_PAGES,
+                        help="Pages to record (default: %(default)s)")
+    args = parser.parse_args()
+    for site in args.site or sorted(corpus.SITES):
+        try:
+            record(site, args.query, args.pages)
+        except (SystemExit, Exception) as e:
+            print("[{}] Failed: {}".format(site, e), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Synthetic result pages.
+
+Pages mimic the markup of each site's search results, closely enough
+for the site modules (and extractors.py) to parse them. Besides the
+results, every page has some site "chrome" (navigation, footer), as the
+real pages do.
+
+Used when no recorded pages are present (see corpus.py).
+"""
+import hashlib
+
+
+def _hash(site, page, i):
+    """
+    Info-hash of result `i` of page `page`.
+    Every third result is on all sites (same info-hash), as popular torrents are.
+    """
+    if i % 3 == 0:
+        site = 'shared'
+    return hashlib.sha1(("%s-%d-%d" % (site, page, i)).encode()).hexdigest().upper()
+
+
+def _name(page, i):
+    """Name of result `i` of page `page`."""
+    return "Ubuntu %d.%02d Desktop amd64 &amp; Extras [Page %d]" % (16 + i % 3, i, page + 1)
+
+
+def _chrome(links=200):
+    """Header/navigation found above results on real pages."""
+    nav = "".join('<li><a href="/browse/%d" title="Browse %d">Category %d</a></li>' % (i, i, i) for i in range(links))
+    return ('<div id="header"><form action="/search" method="get"><input type="text" name="q"></form>'
+            '<ul class="nav">%s</ul></div>' % (nav))
+
+
+def _footer():
+    """Footer of page."""
+    return ('<div id="footer"><p>%s</p><script type="text/javascript">var x = 1;</script></div>' % (
+        " ".join(["Lorem ipsum dolor sit amet."] * 40)))
+
+
+def tpb(page=0, proxy="http://127.0.0.1:8000/tpb", rows=30):
+    """TPB search results page `page` (`rows` results)."""
+    host = proxy.split('/')[2]
+    out = ['<html><head><title>The Pirate Bay</title></head><body><h1><a href="/" title="Pirate Bay">The Pirate Bay</a></h1>' + _chrome(),
+           '<table id="searchResult"><thead id="tableHead"><tr class="header"><th>Type</th><th>Name</th><th>SE</th><th>LE</th></tr></thead>']
+    for i in range(rows):
+        h = _hash('tpb', page, i)
+        status = ''
+        if i % 5 == 0:
+            status = '<a href="/user/u"><img src="//%s/static/img/vip.gif" alt="VIP" title="VIP" border="0"></a>' % host
+        elif i % 5 == 1:
+            status = '<a href="/user/u"><img src="//%s/static/img/trusted.png" alt="Trusted" title="Trusted" border="0"></a>' % host
+        comment = ''
+        if i % 3 == 0:
+            comment = '<img src="//%s/static/img/icon_comment.gif" alt="This torrent has %d comments." title="comments">' % (host, i)
+        uploader = '<a class="detDesc" href="/user/up%d/" title="Browse up%d">up%d</a>' % (i, i, i)
+        if i % 7 == 6:
+            uploader = '<i>Anonymous</i>'
+        out.append(
+            '<tr>\n<td class="vertTh"><center><a href="/browse/300" title="More from this category">Applications</a><br>'
+            '<a href="/browse/303" title="More from this category">UNIX</a></center></td>\n'
+            '<td><div class="detName"><a href="/torrent/%d/x" class="detLink" title="Details for %s">%s</a></div>\n'
+            '<a href="magnet:?xt=urn:btih:%s&amp;dn=x" title="Download this torrent using magnet"><img src="//%s/static/img/icon-magnet.gif" alt="Magnet link"></a>'
+            '%s%s\n<font class="detDesc">Uploaded 03-%02d&nbsp;2017, Size %d.%d&nbsp;GiB, ULed by %s</font>\n</td>\n'
+            '<td align="right">%d</td>\n<td align="right">%d</td>\n</tr>\n' % (
+                1000000 + page * 100 + i, _name(page, i), _name(page, i), h, host, comment, status,
+                1 + i % 28, 1 + i % 4, i % 10, uploader, 1000 - i * 3 - page, 10 + i))
+    out.append('</table>' + _footer() + '</body></html>')
+    return "".join(out)
+
+
+def x1337(page=0, proxy=None, rows=20):
+    """1337x search results page `page` (`rows` results)."""
+    out = ['<html><head><title>1337x | Search</title></head><body>' + _chrome(),
+           '<table class="table-list table table-responsive table-striped"><thead><tr><th class="coll-1 name">name</th><th>se</th><th>le</th><th>time</th><th>size</th><th>uploader</th></tr></thead><tbody>']
+    for i in range(rows):
+        comments = '<span class="comments"><i class="flaticon-message"></i>%d</span>' % i if i % 2 else ''
+        out.append(
+            '<tr><td class="coll-1 name"><a href="/sub/42/0/" class="icon"><i class="flaticon-%s"></i></a>'
+            '<a href="/torrent/%d/x/">%s</a>%s</td>'
+            '<td class="coll-2 seeds">%d</td><td class="coll-3 leeches">%d</td><td class="coll-date">Mar. %dth \'17</td>'
+            '<td class="coll-4 size mob-uploader">%d.%d GB<span class="seeds">%d</span></td>'
+            '<td class="coll-5 %s"><a href="/user/up%d/">up%d</a></td></tr>' % (
+                ('hd', 'linux', 'music')[i % 3], 2000000 + page * 100 + i, _name(page, i), comments,
+                900 - i, i + 1, 1 + i % 27, 1 + i % 4, i % 10, 900 - i,
+                'vip' if i % 4 == 0 else 'user', i, i))
+    out.append('</tbody></table>' + _footer() + '</body></html>')
+    return "".join(out)
+
+
+def nyaa(page=0, proxy=None, rows=75):
+    """Nyaa search results page `page` (`rows` results)."""
+    out = ['<html><head><title>Nyaa</title></head><body>' + _chrome(),
+           '<table class="table table-bordered table-hover table-striped torrent-list"><thead><tr><th>Category</th><th>Name</th><th>Link</th><th>Size</th><th>Date</th><th>S</th><th>L</th><th>C</th></tr></thead><tbody>']
+    for i in range(rows):
+        comments = '<a href="/view/%d#comments" class="comments" title="%d comments"><i class="fa fa-comments-o"></i>%d</a>' % (i, i, i) if i % 2 else ''
+        out.append(
+            '<tr class="%s"><td><a href="/?c=1_2" title="Anime"><img src="/static/img/icons/nyaa/1_2.png" alt="Anime"></a></td>'
+            '<td colspan="2">%s<a href="/view/%d" title="x">%s</a></td>'
+            '<td class="text-center"><a href="/download/%d.torrent"><i class="fa fa-fw fa-download"></i></a>'
+            '<a href="magnet:?xt=urn:btih:%s&amp;dn=x"><i class="fa fa-fw fa-magnet"></i></a></td>'
+            '<td class="text-center">%d.%d GiB</td><td class="text-center" data-timestamp="1512000000">2017-12-%02d 10:%02d</td>'
+            '<td class="text-center" style="color: green;">%d</td><td class="text-center" style="color: red;">%d</td><td class="text-center">%d</td></tr>' % (
+                ('default', 'success', 'danger')[i % 3], comments, 300000 + page * 100 + i, _name(page, i),
+                300000 + page * 100 + i, _hash('nyaa', page, i), 1 + i % 4, i % 10, 1 + i % 28, i % 60,
+                700 - i, i, 5000 + i))
+    out.append('</tbody></table>' + _footer() + '</body></html>')
+    return "".join(out)
+
+
+def limetorrents(page=0, proxy=None, rows=50):
+    """LimeTorrents search results page `page` (`rows` results)."""
+    out = ['<html><head><title>LimeTorrents</title></head><body>' + _chrome() + '<div id="logo"><a href="/" title="LimeTorrents.cc">logo</a></div>',
+           '<table class="table2" width="100%"><tr><th class="thleft">Torrent Name</th><th>Added</th><th>Size</th><th>Seed</th><th>Leech</th><th>Health</th></tr>']
+    for i in range(rows):
+        out.append(
+            '<tr bgcolor="#F4F4F4"><td class="tdleft"><div class="tt-name"><a href="http://itorrents.org/torrent/%s.torrent" rel="nofollow" class="csprite_dl14"></a>'
+            '<a href="/x-torrent-%d.html">%s</a></div></td><td class="tdnormal">%d days ago - in Applications</td>'
+            '<td class="tdnormal">%d.%d GB</td><td class="tdseed">%s</td><td class="tdleech">%d</td><td class="tdright"><div class="hb5"></div></td></tr>' % (
+                _hash('lime', page, i), 4000000 + page * 100 + i, _name(page, i), 1 + i, 1 + i % 4, i % 10,
+                "{:,}".format(5000 - i * 7), i))
+    out.append('</table>' + _footer() + '</body></html>')
+    return "".join(out)
+
+
+def kickasstorrent(page=0, proxy="http://127.0.0.1:8000/kat", rows=30):
+    """KAT search results page `page` (`rows` results)."""
+    out = ['<html><head><title>KAT</title></head><body><a href="%s/full/">KAT</a>' % proxy + _chrome(),
+           '<table class="data" width="100%"><tr class="firstr"><th>torrent name</th><th>size</th><th>age</th><th>seed</th><th>leech</th></tr>']
+    for i in range(rows):
+        verified = '<a title="Verified Torrent" href="#"><i class="ka ka-verify"></i></a><a class="icommentjs" href="/x.html#comment">%s</a>' % (i if i % 2 else '') if i % 3 == 0 else ''
+        out.append(
+            '<tr class="%s" id="torrent_%d"><td><div class="torrentname"><a href="/x-t%d.html" class="cellMainLink">%s</a>'
+            '<span class="font11px lightgrey block">Posted by <a class="plain" href="/user/up%d/">up%d</a> in <span><strong><a href="/apps/">Applications</a></strong></span> </span></div>'
+            '<a title="Torrent magnet link" href="magnet:?xt=urn:btih:%s&amp;dn=x"></a>%s</td>'
+            '<td class="nobr center">%d.%d GB</td><td class="center">%d&nbsp;months</td><td class="green center">%d</td><td class="red lasttd center">%d</td></tr>' % (
+                'odd' if i % 2 == 0 else 'even', i, 5000000 + page * 100 + i, _name(page, i), i, i,
+                _hash('kat', page, i), verified, 1 + i % 4, i % 10, 1 + i % 11, 800 - i, i))
+    out.append('</table>' + _footer() + '</body></html>')
+    return "".join(out)
+
+
+def idope(page=0, proxy=None, rows=10):
+    """Idope search results page `page` (`rows` results)."""
+    out = ['<html><head><title>Idope</title></head><body>' + _chrome(),
+           '<input type="hidden" id="hidetrack" value="&amp;tr=udp://tracker.opentrackr.org:1337/announce&amp;tr=udp://open.demonii.com:1337">']
+    for i in range(rows):
+        out.append(
+            '<div class="resultdiv"><a href="/torrent/x/%s/"><div class="resultdivtopname">\n   %s   \n</div></a>'
+            '<div class="resultdivbotton"><div class="resultdivbottontime">Age: about %d days</div> '
+            '<div class="resultdivbottonlength">Size: %d.%d GB</div> <div class="resultdivbottonseed">Seed: %d</div> '
+            '<div class="resultdivbottonfiles">Files: %d</div> <div class="hideinfohash">%s</div></div></div>' % (
+                _hash('idope', page, i).lower(), _name(page, i), 1 + i, 1 + i % 4, i % 10, 400 - i, 1 + i,
+                _hash('idope', page, i).lower()))
+    out.append(_footer() + '</body></html>')
+    return "".join(out)
+
+
+def skytorrents(page=0, proxy=None, rows=40):
+    """SkyTorrents search results page `page` (`rows` results)."""
+    out = ['<html><head><title>SkyTorrents</title></head><body>' + _chrome(),
+           '<table class="table"><thead><tr><th>Name</th><th>Size</th><th>Files</th><th>Added</th><th>Seeders</th><th>Leechers</th></tr></thead><tbody>']
+    for i in range(rows):
+        out.append(
+            '<tr><td style="word-wrap: break-word;"><a href="/info/%s/x/?l=en-us" title="x">%s</a> '
+            '<a href="magnet:?xt=urn:btih:%s&amp;dn=x" rel="nofollow"><img src="/files/magnet.svg" alt="Magnet link"></a> '
+            '<span class="label label-success">&nbsp;%d <img src="/files/up.svg"></span>&nbsp;%d <img src="/files/down.svg"></td>'
+            '<td>%d.%d GB</td><td>%d</td><td>%d days ago</td><td>%d</td><td>%d</td></tr>' % (
+                _hash('sky', page, i).lower(), _name(page, i), _hash('sky', page, i).lower(), i * 2, i,
+                1 + i % 4, i % 10, i + 1, i + 2, 600 - i, i))
+    out.append('</tbody></table>' + _footer() + '</body></html>')
+    return "".join(out)
+
+
+def no_results():
+    """Page of a search without results."""
+    return ('<html><head><title>No results</title></head><body>' + _chrome() +
+            '<h2>No results were returned.</h2>' + _footer() + '</body></html>')
+
+
+def proxy_list(proxies, td_class):
+    """Proxy-list page (TPB: td_class='site', 1337x: td_class='text-left')."""
+    rows = "".join('<tr><td class="%s"><a href="%s">%s</a></td><td class="status">up</td></tr>' % (
+        td_class, proxy, proxy) for proxy in proxies)
+    return ('<html><head><title>Proxy list</title></head><body>' + _chrome(20) +
+            '<table class="proxies">%s</table>' % (rows) + _footer() + '</body></html>')
+
+
+def x1337_torrent(key):
+    """1337x torrent page (has magnet link)."""
+    return ('<html><head><title>1337x | Torrent</title></head><body>' + _chrome() +
+            '<ul class="download-links-dontblock btn-wrap-list"><li><a href="magnet:?xt=urn:btih:%s&amp;dn=x">Magnet Download</a></li>'
+            '<li><a href="http://itorrents.org/torrent/%s.torrent">Torrent Download</a></li></ul>' % (
+                _hash('1337x', 0, key), _hash('1337x', 0, key)) + _footer() + '</body></html>')
+
+
+def limetorrents_torrent(key):
+    """LimeTorrents torrent page (magnet link is in 3rd div.dltorrent)."""
+    h = _hash('lime', 0, key)
+    return ('<html><head><title>LimeTorrents</title></head><body>' + _chrome() +
+            '<div class="dltorrent"><a href="http://itorrents.org/torrent/%s.torrent">Download torrent</a></div>'
+            '<div class="dltorrent"><a href="http://torrage.info/torrent/%s.torrent">Download torrent</a></div>'
+            '<div class="dltorrent"><a href="magnet:?xt=urn:btih:%s&amp;dn=x">Magnet Download</a></div>' % (h, h, h) +
+            _footer() + '</body></html>')
+
+
+def rarbg(count=100):
+    """RarBg API results (json_extended)."""
+    results = []
+    for i in range(count):
+        results.append({
+            'title': "Ubuntu.%d.%02d.Desktop.amd64-RBG" % (16 + i % 3, i),
+            'category': "Software/PC ISO",
+            'download': "magnet:?xt=urn:btih:%s&dn=x" % (_hash('rarbg', 0, i).lower()),
+            'seeders': 900 - i,
+            'leechers': i,
+            'size': (1 + i % 4) * 1024 ** 3 + i * 1024 ** 2,
+            'pubdate': "2017-12-%02d 10:%02d:00 +0000" % (1 + i % 28, i % 60),
+            'info_page': "https://torrentapi.org/redirect_to_info.php?token=x&p=%d" % (i),
+        })
+    return {'torrent_results': results}
+
+
+def xbit(count=100):
+    """XBit API results. (Last result is always empty)"""
+    results = [{
+        'ID': str(700000 + i),
+        'NAME': "Ubuntu %d.%02d Desktop amd64" % (16 + i % 3, i),
+        'MAGNET': "magnet:?xt=urn:btih:%s&dn=x" % (_hash('xbit', 0, i).lower()),
+        'SIZE': "%d.%d GB" % (1 + i % 4, i % 10),
+        'DISCOVERED': "2017-12-%02d" % (1 + i % 28),
+    } for i in range(count)]
+    return {'dht_results': results + [{}]}
+
+
+def libgen(count=3):
+    """LibGen API results."""
+    return [{
+        'title': "Linux Basics %d" % (i),
+        'author': "Author %d" % (i),
+        'year': str(2010 + i),
+        'edition': str(1 + i),
+        'pages': str(300 + i),
+        'publisher': "Publisher",
+        'extension': "pdf",
+        'language': "English",
+        'md5': hashlib.md5(str(i).encode()).hexdigest().upper(),
+        'filesize': str(1000000 * (1 + i)),
+        'descr': "Description %d" % (i),
+    } for i in range(count)]
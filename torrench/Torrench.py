@@ -5,6 +5,9 @@ import logging
 import os
 import sys
 
+import torrench.utilities.json_output as json_output
+import torrench.utilities.pager as pager
+import torrench.utilities.sort_filter as sort_filter
 from torrench.utilities.Config import Config
 
 
@@ -23,6 +26,15 @@ class Torrench(Config):
         --interactive         Enable interactive mode for searches
         --no-merge            (Cross-site) Do not merge results in one table
         --sorted              (Cross-site) sort results on basis of Seeds.
+        --parallel            (Cross-site) Fetch from all sites concurrently.
+        --json                Print results as JSON lines (NDJSON), without prompts.
+        --sort KEYS           Sort results on KEY[:asc][,KEY...] (seeds, leeches, size, date, ratio).
+        --min KEY=VALUE       Only show results with KEY at least VALUE (eg. seeds=10, size=700MB, date=7d).
+        --max KEY=VALUE       Only show results with KEY at most VALUE.
+        --pager               Show results screen by screen.
+        --batch FILE          Search every query (line) of FILE (- = stdin) on selected sites.
+                              Results are printed as JSON lines.
+        --serve [HOST:PORT]   Run as local HTTP/JSON search service [default: 127.0.0.1:8097]
 
     Main Sites:
         search                Search LinuxTracker (default)
@@ -59,6 +71,18 @@ class Torrench(Config):
         self.input_title = None
         self.page_limit = 0
         self.module_args = []
+        # Sites supporting --json/--batch
+        self.torrent_sites = [
+            'thepiratebay',
+            'kickasstorrent',
+            'skytorrents',
+            'rarbg',
+            'x1337',
+            'nyaa',
+            'idope',
+            'xbit',
+            'limetorrents'
+        ]
 
     def define_args(self):
         """All input arguments are defined here."""
@@ -161,6 +185,46 @@ class Torrench(Config):
                             default=False,
                             action="store_true",
                             help="(Cross-site) sort results on basis of Seeds.")
+        parser.add_argument("--parallel",
+                            default=False,
+                            action="store_true",
+                            help="(Cross-site) Fetch from all sites concurrently.")
+        parser.add_argument("--json",
+                            default=False,
+                            action="store_true",
+                            help="Print results as JSON lines (NDJSON) to stdout, without prompts. [Torrent sites/Cross-site]")
+        parser.add_argument("--sort",
+                            metavar="KEYS",
+                            default=None,
+                            help="Sort results on KEY[:asc][,KEY...] (seeds, leeches, size, date, ratio). Largest first, unless ':asc'.")
+        parser.add_argument("--min",
+                            metavar="KEY=VALUE",
+                            action="append",
+                            default=[],
+                            help="Only show results with KEY (seeds, leeches, size, date, ratio) at least VALUE (eg. seeds=10, size=700MB, date=7d). Repeatable.")
+        parser.add_argument("--max",
+                            metavar="KEY=VALUE",
+                            action="append",
+                            default=[],
+                            help="Only show results with KEY at most VALUE (eg. size=4GB). Repeatable.")
+        parser.add_argument("--pager",
+                            default=False,
+                            action="store_true",
+                            help="Show results screen by screen (for many results, eg. -p 50).")
+        parser.add_argument("--batch",
+                            metavar="FILE",
+                            default=None,
+                            help="Search every query (one per line) of FILE (- = stdin) on selected sites. Results are printed as JSON lines.")
+        parser.add_argument("--resolve",
+                            metavar="FILE",
+                            default=None,
+                            help="Print records (JSON lines, eg. of --json/--batch) of FILE (- = stdin) with their magnets, fetched from torrent pages (1337x/LimeTorrents) if missing.")
+        parser.add_argument("--serve",
+                            metavar="HOST:PORT",
+                            nargs="?",
+                            const="127.0.0.1:8097",
+                            default=None,
+                            help="Run as local HTTP/JSON search service on HOST:PORT [default: 127.0.0.1:8097]. Serves selected sites (default: all)")
 
         self.args = parser.parse_args()
 
@@ -199,6 +263,87 @@ class Torrench(Config):
             self.logger.debug("Removed {} file(s).".format(count))
             sys.exit(2)
 
+    def check_json(self):
+        """
+        Check if --json argument is present.
+
+        JSON output is only supported for torrent sites (and cross-site).
+        """
+        if not self.args.json:
+            return
+        torrent_sites = [getattr(self.args, site) for site in self.torrent_sites]
+        if self.args.interactive or self.args.libgen or self.args.distrowatch or \
+                not (self.args.cross_site or any(torrent_sites)):
+            print("error: --json is only supported with -t/-k/-s/-x/-r/-n/-l/-i/-b or -C")
+            sys.exit(2)
+        if self.args.top:
+            # Top torrents are chosen from interactive prompts
+            print("error: --top not allowed with --json")
+            sys.exit(2)
+        self.logger.debug("JSON output enabled")
+        json_output.enable()
+
+    def check_sort(self):
+        """Check --sort, --min and --max arguments."""
+        try:
+            sort_filter.configure(self.args.sort, self.args.min, self.args.max)
+        except ValueError as e:
+            print("error: {}".format(e))
+            sys.exit(2)
+        if sort_filter.active():
+            self.logger.debug("Sort keys: {} ; filters: {}".format(sort_filter.sort_keys, sort_filter.filters))
+
+    def check_pager(self):
+        """Check if --pager argument is present."""
+        if not self.args.pager:
+            return
+        if self.args.json:
+            print("error: --pager not allowed with --json")
+            sys.exit(2)
+        self.logger.debug("Pager enabled")
+        pager.enable()
+
+    def run_batch(self):
+        """
+        Run batch search (--batch).
+
+        Queries are searched on all selected torrent sites (-C is implied).
+        """
+        sites = [site for site in self.torrent_sites if getattr(self.args, site)]
+        if self.args.interactive or self.args.libgen or self.args.distrowatch or not sites:
+            print("error: --batch is only supported with -t/-k/-s/-x/-r/-n/-l/-i/-b")
+            sys.exit(2)
+        if self.args.search is not None or self.args.top:
+            print("error: search string/--top not allowed with --batch (queries are read from FILE)")
+            sys.exit(2)
+        self.logger.debug("Using batch mode. Sites: {}".format(sites))
+        import torrench.utilities.batch as batch
+        batch.main(self.args, sites)
+
+    def run_resolve(self):
+        """Resolve magnets of records (--resolve)."""
+        if self.args.search is not None or self.args.batch is not None or self.args.json:
+            print("error: --resolve only takes FILE (records are read from it)")
+            sys.exit(2)
+        self.logger.debug("Resolving magnets of records in {}".format(self.args.resolve))
+        import torrench.utilities.magnets as magnets
+        magnets.main(self.args.resolve)
+
+    def run_server(self):
+        """
+        Run local search service (--serve).
+
+        Serves selected torrent sites, or all of them if none is selected.
+        """
+        sites = [site for site in self.torrent_sites if getattr(self.args, site)] or self.torrent_sites
+        if self.args.interactive or self.args.libgen or self.args.distrowatch or \
+                self.args.search is not None or self.args.batch is not None or self.args.json:
+            print("error: --serve only takes torrent sites (-t/-k/-s/-x/-r/-n/-l/-i/-b)")
+            sys.exit(2)
+        self.logger.debug("Using server mode. Sites: {}".format(sites))
+        import torrench.utilities.server as server
+        server.main(self.args.serve, sites, self.__version__)
+
     def verify_input(self):
         """To verify if input given is valid or not."""
         if self.input_title is None and not self.args.interactive:
@@ -272,9 +417,9 @@ class Torrench(Config):
                     xbit.main(self.input_title)
                 elif self.args.rarbg:
                     self.logger.debug("Using RarBg")
-                    self.logger.debug("Input title: [%s]" % (self.input_title))
+                    self.logger.debug("Input title: [%s] ; page_limit: [%s]" % (self.input_title, self.page_limit))
                     import torrench.modules.rarbg as rbg
-                    rbg.main(self.input_title)
+                    rbg.main(self.input_title, self.page_limit)
                 elif self.args.x1337:
                     self.logger.debug("Using 1337x")
                     self.logger.debug("Input title: [%s] ; page_limit: [%s]" % (self.input_title, self.page_limit))
@@ -320,6 +465,16 @@ def main():
             import torrench.utilities.update_config as update
             update.main()
             sys.exit(2)
+        if tr.args.serve is not None:
+            tr.run_server()
+            sys.exit(0)
+        if tr.args.resolve is not None:
+            tr.run_resolve()
+        tr.check_sort()
+        if tr.args.batch is not None:
+            tr.run_batch()
+        tr.check_json()
+        tr.check_pager()
         if tr.args.cross_site:
             tr.logger.debug("Using cross-site")
             import torrench.utilities.cross_site as cs
@@ -4,6 +4,7 @@ import logging
 import sys
 
 from torrench.utilities.Config import Config
+from torrench.utilities.result import TorrentResult, format_count, format_size
 
 
 class Idope(Config):
@@ -40,11 +41,6 @@ class Idope(Config):
         self.page = 0
         self.total_fetch_time = 0
         self.index = 0
-        self.mapper = []
-        self.mylist = []
-        self.masterlist = []
-        self.mylist_crossite = []
-        self.masterlist_crossite = []
         self.headers = [
                 'NAME', 'INDEX', 'SIZE', 'SEEDS', 'AGE']
 
@@ -52,68 +48,75 @@ class Idope(Config):
         """
         To get HTML page.
 
-        Once proxy is found, the HTML page for
-        corresponding search string is fetched.
-        Also, the time taken to fetch that page is returned.
-        Uses http_request_time() from Common.py module.
+        Once proxy is found, the HTML pages for
+        corresponding search string are fetched (concurrently).
+        Also, the time taken to fetch pages is returned.
+        Uses fetch_pages() from Common.py module.
         """
         try:
-            for self.page in range(self.pages):
-                print("\nFetching from page: %d" % (self.page+1))
-                search = "/torrent-list/{}/?p={}".format(self.title, self.page+1)
-                self.soup, time = self.http_request_time(self.proxy + search)
-                self.logger.debug("fetching page %d/%d" % (self.page+1, self.pages))
-                print("[in %.2f sec]" % (time))
-                self.logger.debug("page fetched in %.2f sec!" % (time))
-                self.total_fetch_time += time
-                self.soup_dict[self.page] = self.soup
+            self.fetch_pages()
         except Exception as e:
             self.logger.exception(e)
             print("Error message: %s" %(e))
             print("Something went wrong! See logs for details. Exiting!")
             sys.exit(2)
 
+    def search_url(self, page):
+        """URL of result page `page`."""
+        return self.proxy + "/torrent-list/{}/?p={}".format(self.title, page+1)
+
     def parse_html(self):
         """
         Parse HTML to get required results.
 
-        Results are fetched in masterlist list.
-        Also, a mapper[] is used to map 'index'
-        with torrent name, link and magnetic link
+        Results are added to self.results (see add_result()).
+
+        Pages are parsed with parse_page() (see Common.py): rows are
+        extracted with extract() and added to results with add_row().
         """
         try:
             for page in self.soup_dict:
-                self.soup = self.soup_dict[page]
-                results = self.soup.findAll('div', class_='resultdiv')
-                trackers = self.soup.find('input', id='hidetrack')['value']
-                if results == []:
-                    return
-                for result in results:
-                    name = " ".join(result.a.div.string.split())
-                    link = result.a['href']
-                    link = self.proxy + link
-                    r = result.find('div', class_='resultdivbotton').text.split()
-                    age = "{} {}".format(r[2], r[3])
-                    size = "{} {}".format(r[5], r[6])
-                    seeds = r[8]
-                    seeds_color = self.colorify("green", seeds)
-                    # Since it does not have leeches, set leeches = -1; Used only in cross-site.
-                    leeches = '-1'
-                    info_hash = r[11]
-                    magnet = "magnet:?xt=urn:btih:{}&dn={}{}".format(info_hash, name, trackers)
-                    self.index += 1
-                    self.mapper.insert(self.index, (name, magnet, link, self.class_name))
-                    self.mylist = [name, "--" +
-                        str(self.index) + "--", size, seeds_color, age]
-                    self.masterlist.append(self.mylist)
-                    self.mylist_crossite = [name, self.index, size, seeds+'/'+leeches, age]
-                    self.masterlist_crossite.append(self.mylist_crossite)
+                self.parse_page(page)
         except Exception as e:
             self.logger.exception(e)
             print("Error message: %s" % (e))
             print("Something went wrong! See logs for details. Exiting!")
             sys.exit(2)
 
+    def extract_bs4(self, soup):
+        """
+        Extract result rows from page (BeautifulSoup).
+
+        Yields (name, link, age, size, seeds, info_hash, trackers)
+        for every torrent.
+        lxml counterpart is idope() in extractors.py
+        """
+        results = soup.findAll('div', class_='resultdiv')
+        if results == []:
+            return
+        trackers = soup.find('input', id='hidetrack')['value']
+        for result in results:
+            name = " ".join(result.a.div.string.split())
+            link = result.a['href']
+            link = self.proxy + link
+            r = result.find('div', class_='resultdivbotton').text.split()
+            age = "{} {}".format(r[2], r[3])
+            size = "{} {}".format(r[5], r[6])
+            seeds = r[8]
+            info_hash = r[11]
+            yield (name, link, age, size, seeds, info_hash, trackers)
+
+    def add_row(self, name, link, age, size, seeds, info_hash, trackers):
+        """Add an extracted row to results (see add_result()). Idope has no leeches."""
+        magnet = "magnet:?xt=urn:btih:{}&dn={}{}".format(info_hash, name, trackers)
+        self.add_result(TorrentResult(name, size, seeds, None, age, magnet, link))
+
+    def display_row(self, result):
+        """Row of output table for `result`."""
+        return [result.name, "--" + str(result.index) + "--", format_size(result.size),
+                self.colorify("green", format_count(result.seeds)), result.date]
+
+
 def main(title, page_limit):
     """Execution begins here."""
     print("\n[Idope]")
@@ -3,7 +3,10 @@
 import logging
 import sys
 
+from bs4 import SoupStrainer
+
 from torrench.utilities.Config import Config
+from torrench.utilities.result import TorrentResult, format_size
 
 
 class KickassTorrents(Config):
@@ -38,13 +41,10 @@ class KickassTorrents(Config):
         self.proxy = None
         self.soup = None
         self.soup_dict = {}
+        # Only this part of result pages is parsed (see make_doc())
+        self.result_region = SoupStrainer('table', class_=self.class_matcher('data'))
         self.index = 0
         self.total_fetch_time = 0
-        self.mapper = []
-        self.mylist = []
-        self.masterlist = []
-        self.mylist_crossite = []
-        self.masterlist_crossite = []
         self.headers = [
                 'CATEG', 'NAME', 'INDEX', 'UPLOADER', 'SIZE', 'DATE', 'SE/LE', 'C']
 
@@ -52,100 +52,108 @@ class KickassTorrents(Config):
         """
         To check proxy availability.
 
-        Proxy is checked in two steps:
-        1. To see if proxy 'website' is available.
-
-        In case of failiur, next proxy is tested with same procedure.
-        This continues until working proxy is found.
+        Proxies are tested with test_proxy().
+        How proxies are tested (all at once, or one by one) is decided
+        by select_proxy().
         If no proxy is found, program exits.
         """
-        count = 0
-        for proxy in self.proxies:
-            print("Trying %s" % (self.colorify("yellow", proxy)))
-            self.logger.debug("Trying proxy: %s" % (proxy))
-            self.soup = self.http_request(proxy)
-            if self.soup.find('a')['href'] != proxy + "/full/" or self.soup == -1:
-                print("Bad proxy!")
-                count += 1
-                if count == len(self.proxies):
-                    self.logger.debug("Proxy list finished! Exiting!")
-                    print("No more proxies found! Exiting...")
-                    sys.exit(2)
-            else:
-                self.logger.debug("Connected to proxy...")
-                print("Available!")
-                self.proxy = proxy
-                break
+        self.select_proxy()
+
+    def test_proxy(self, proxy):
+        """
+        To test a proxy.
+
+        Proxy is checked in one step:
+        1. To see if proxy 'website' is available.
+        """
+        soup = self.probe_page(proxy)
+        if soup == -1:
+            return False
+        link = soup.find('a')
+        return link is not None and link.get('href') == proxy + "/full/"
 
     def get_html(self):
         """
         To get HTML page.
 
-        Once proxy is found, the HTML page for
-        corresponding search string is fetched.
-        Also, the time taken to fetch that page is returned.
-        Uses http_request_time() from Common.py module.
+        Once proxy is found, the HTML pages for
+        corresponding search string are fetched (concurrently).
+        Also, the time taken to fetch pages is returned.
+        Uses fetch_pages() from Common.py module.
         """
-        for self.page in range(self.pages):
-            print("\nFetching from page: %d" % (self.page+1))
-            self.logger.debug("fetching page %d/%d" % (self.page, self.pages))
-            search = "/usearch/%s/%d/" % (self.title, self.page + 1)
-            self.soup, time = self.http_request_time(self.proxy + search)
-            print("[in %.2f sec]" % (time))
-            self.logger.debug("Page fetched in %.2f sec!" % (time))
-            self.total_fetch_time += time
-            self.soup_dict[self.page] = self.soup
+        self.fetch_pages()
+
+    def search_url(self, page):
+        """URL of result page `page`."""
+        return self.proxy + "/usearch/%s/%d/" % (self.title, page + 1)
 
     def parse_html(self):
         """
         Parse HTML to get required results.
 
-        Results are fetched in masterlist list.
-        Also, a mapper[] is used to map 'index'
-        with torrent name, link and magnetic link
+        Results are added to self.results (see add_result()).
+
+        Pages are parsed with parse_page() (see Common.py): rows are
+        extracted with extract() and added to results with add_row().
         """
         try:
             for page in self.soup_dict:
-                self.soup = self.soup_dict[page]
-                content = self.soup.find('table', class_='data')
-                data = content.find_all('tr', class_='odd')
-                for i in data:
-                    name = i.find('a', class_='cellMainLink').string
-                    if name is None:
-                        name = i.find('a', class_='cellMainLink').get_text().split("[[")[0]
-                    # Handling Unicode characters in windows.
-                    torrent_link = i.find('a', class_='cellMainLink')['href']
-                    uploader = i.find('span', class_='lightgrey').get_text().split(" ")[-4]
-                    category = i.find('span', class_='lightgrey').get_text().split(" ")[-2]
-                    verified_uploader = i.find('a', {'title': 'Verified Torrent'})
-                    comment_count = 0
-                    if verified_uploader is not None:
-                        uploader = self.colorify("yellow", uploader)
-                        comment_count = i.find('a', class_='icommentjs').get_text()
-                    if comment_count == '':
-                        comment_count = 0
-                    misc_details = i.find_all('td', class_='center')
-                    size = misc_details[0].string
-                    date = misc_details[1].string
-                    seeds = misc_details[2].string
-                    leeches = misc_details[3].string
-                    seeds_color = self.colorify("green", seeds)
-                    leeches_color = self.colorify("red", leeches)
-                    magnet = i.find('a', {'title': 'Torrent magnet link'})['href']
-                    torrent_link = self.proxy+torrent_link
-                    self.index += 1
-                    self.mapper.insert(self.index, (name, magnet, torrent_link, self.class_name))
-                    self.mylist = [category, name, '--' + str(self.index) +
-                            '--', uploader, size, date, seeds_color+'/'+leeches_color, comment_count]
-                    self.masterlist.append(self.mylist)
-                    self.mylist_crossite = [name+" ({})".format(uploader), self.index, size, seeds+'/'+leeches, date]
-                    self.masterlist_crossite.append(self.mylist_crossite)
+                self.parse_page(page)
         except Exception as e:
             self.logger.exception(e)
             print("Error message: %s" %(e))
             print("Something went wrong! See logs for details. Exiting!")
             sys.exit(2)
 
+    def extract_bs4(self, soup):
+        """
+        Extract result rows from page (BeautifulSoup).
+
+        Yields (name, torrent_link, uploader, category, verified, comment_count,
+        size, date, seeds, leeches, magnet) for every torrent.
+        lxml counterpart is kickasstorrent() in extractors.py
+        """
+        content = soup.find('table', class_='data')
+        data = content.find_all('tr', class_='odd')
+        for i in data:
+            name = i.find('a', class_='cellMainLink').string
+            if name is None:
+                name = i.find('a', class_='cellMainLink').get_text().split("[[")[0]
+            # Handling Unicode characters in windows.
+            torrent_link = i.find('a', class_='cellMainLink')['href']
+            uploader = i.find('span', class_='lightgrey').get_text().split(" ")[-4]
+            category = i.find('span', class_='lightgrey').get_text().split(" ")[-2]
+            verified = i.find('a', {'title': 'Verified Torrent'}) is not None
+            comment_count = 0
+            if verified:
+                comment_count = i.find('a', class_='icommentjs').get_text()
+            misc_details = i.find_all('td', class_='center')
+            size = misc_details[0].string
+            date = misc_details[1].string
+            seeds = misc_details[2].string
+            leeches = misc_details[3].string
+            magnet = i.find('a', {'title': 'Torrent magnet link'})['href']
+            torrent_link = self.proxy+torrent_link
+            yield (name, torrent_link, uploader, category, verified, comment_count,
+                   size, date, seeds, leeches, magnet)
+
+    def add_row(self, name, torrent_link, uploader, category, verified, comment_count,
+                size, date, seeds, leeches, magnet):
+        """Add an extracted row to results (see add_result())."""
+        if comment_count == '':
+            comment_count = 0
+        self.add_result(TorrentResult(name, size, seeds, leeches, date, magnet, torrent_link,
+                                      uploader=uploader, status='verified' if verified else None,
+                                      category=category, comments=comment_count))
+
+    def display_row(self, result):
+        """Row of output table for `result`."""
+        uploader = result.uploader
+        if result.status == 'verified':
+            uploader = self.colorify("yellow", uploader)
+        return [result.category, result.name, '--' + str(result.index) + '--', uploader,
+                format_size(result.size), result.date, self.seeds_leeches(result), result.comments]
+
 
 def main(title, page_limit):
     """Execution begins here."""
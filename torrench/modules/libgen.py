@@ -4,7 +4,7 @@ import logging
 import sys
 import time
 
-import requests
+import torrench.utilities.session as session
 from torrench.utilities.Config import Config
 
 
@@ -45,7 +45,7 @@ class LibGen(Config):
             params = "json.php?isbn={}&fields={}".format(self.isbn, fields)
             self.logger.debug("Fetching results")
             start_time = time.time()
-            results = requests.get(self.proxy+params).json()
+            results = session.get(self.proxy+params).json()
             self.total_fetch_time = time.time() - start_time
             if results == []:
                 print("No results found for given input!")
@@ -3,7 +3,10 @@
 import logging
 import sys
 
+from bs4 import SoupStrainer
+
 from torrench.utilities.Config import Config
+from torrench.utilities.result import TorrentResult, format_size
 
 
 class LimeTorrents(Config):
@@ -29,12 +32,9 @@ class LimeTorrents(Config):
         self.index = 0
         self.page = 0
         self.total_fetch_time = 0
-        self.mylist = []
-        self.masterlist = []
-        self.mylist_crossite = []
-        self.masterlist_crossite = []
-        self.mapper = []
         self.soup_dict = {}
+        # Only this part of result pages is parsed (see make_doc())
+        self.result_region = SoupStrainer('table', class_=self.class_matcher('table2'))
         self.soup = None
         self.headers = ['NAME', 'INDEX', 'SIZE', 'SE/LE', 'UPLOADED']
 
@@ -42,123 +42,118 @@ class LimeTorrents(Config):
         """
         To check proxy availability.
 
-        Proxy is checked in two steps:
-        1. To see if proxy 'website' is available.
-        2. A test is carried out with a sample string 'hello'.
-        If results are found, test is passed, else test failed!
+        Proxies are tested with test_proxy().
+        How proxies are tested (all at once, or one by one) is decided
+        by select_proxy().
 
         This class inherits Config class. Config class inherits
         Common class. The Config class provides proxies list fetched
         from config file. The Common class consists of commonly used
         methods.
 
-        In case of failiur, next proxy is tested with same procedure.
-        This continues until working proxy is found.
         If no proxy is found, program exits.
         """
-        count = 0
-        for proxy in self.proxies:
-            print("Trying %s" % (self.colorify("yellow", proxy)))
-            self.logger.debug("Trying proxy: %s" % (proxy))
-            self.soup = self.http_request(proxy)
-            try:
-                if self.soup == -1 or 'limetorrents' not in self.soup.find('div', id='logo').a['title'].lower():
-                    print("Bad proxy!\n")
-                    count += 1
-                    if count == len(self.proxies):
-                        print("No more proxies found! Terminating")
-                        sys.exit(2)
-                    else:
-                        continue
-                else:
-                    print("Proxy available. Performing test...")
-                    url = proxy+"/search/all/hello/seeds/1/"
-                    self.logger.debug("Carrying out test for string 'hello'")
-                    self.soup = self.http_request(url)
-                    test = self.soup.find('table', class_='table2')
-                    if test is not None:
-                        self.proxy = proxy
-                        print("Pass!")
-                        self.logger.debug("Test passed!")
-                        break
-                    else:
-                        print("Test failed!\nPossibly site not reachable. See logs.")
-                        self.logger.debug("Test failed!")
-            except (AttributeError, Exception) as e:
-                self.logger.exception(e)
-                pass
+        self.select_proxy()
+
+    def test_proxy(self, proxy):
+        """
+        To test a proxy.
+
+        Proxy is checked in two steps:
+        1. To see if proxy 'website' is available.
+        2. A test is carried out with a sample string 'hello'.
+        If results are found, test is passed, else test failed!
+        """
+        soup = self.probe_page(proxy)
+        if soup == -1:
+            return False
+        logo = soup.find('div', id='logo')
+        if logo is None or logo.a is None or 'limetorrents' not in logo.a.get('title', '').lower():
+            self.logger.debug("Bad proxy: %s" % (proxy))
+            return False
+        self.logger.debug("Carrying out test for string 'hello' (%s)" % (proxy))
+        soup = self.probe_page(proxy+"/search/all/hello/seeds/1/")
+        return soup != -1 and soup.find('table', class_='table2') is not None
 
     def get_html(self):
         """
         To get HTML page.
 
-        Once proxy is found, the HTML page for
-        corresponding search string is fetched.
-        Also, the time taken to fetch that page is returned.
-        Uses http_request_time() from Common.py module.
+        Once proxy is found, the HTML pages for
+        corresponding search string are fetched (concurrently).
+        Also, the time taken to fetch pages is returned.
+        Uses fetch_pages() from Common.py module.
         """
         try:
-            for self.page in range(self.pages):
-                print("\nFetching from page: %d" % (self.page+1))
-                search = "/search/all/{}/seeds/{}/".format(self.title, self.page+1)
-                self.soup, time = self.http_request_time(self.proxy + search)
-                self.logger.debug("fetching page %d/%d" % (self.page+1, self.pages))
-                print("[in %.2f sec]" % (time))
-                self.logger.debug("page fetched in %.2f sec!" % (time))
-                self.total_fetch_time += time
-                self.soup_dict[self.page] = self.soup
+            self.fetch_pages()
         except Exception as e:
             self.logger.exception(e)
             print("Error message: %s" %(e))
             print("Something went wrong! See logs for details. Exiting!")
             sys.exit(2)
 
+    def search_url(self, page):
+        """URL of result page `page`."""
+        return self.proxy + "/search/all/{}/seeds/{}/".format(self.title, page+1)
+
     def parse_html(self):
         """
         Parse HTML to get required results.
 
-        Results are fetched in masterlist list.
-        Also, a mapper[] is used to map 'index'
-        with torrent name, link and magnetic link
+        Results are added to self.results (see add_result()).
+
+        Pages are parsed with parse_page() (see Common.py): rows are
+        extracted with extract() and added to results with add_row().
         """
         try:
             for page in self.soup_dict:
-                self.soup = self.soup_dict[page]
-                content = self.soup.find('table', class_='table2')
-                if content is None:
-                    return
-                results = content.findAll('tr')
-                for result in results[1:]:
-                    data = result.findAll('td')
-                    # try block is limetorrents-specific. Means only limetorrents requires this.
-                    try:
-                        name = data[0].findAll('a')[1].string
-                        link = data[0].findAll('a')[1]['href']
-                        link = self.proxy+link
-                        date = data[1].string
-                        date = date.split('-')[0]
-                        size = data[2].string
-                        seeds = data[3].string.replace(',', '')
-                        leeches = data[4].string.replace(',', '')
-                        seeds_color = self.colorify("green", seeds)
-                        leeches_color = self.colorify("red", leeches)
-                        self.index += 1
-                        self.mapper.insert(self.index, (name, link, self.class_name))
-                        self.mylist = [name, "--" +
-                                    str(self.index) + "--", size, seeds_color+'/'+
-                                    leeches_color, date]
-                        self.masterlist.append(self.mylist)
-                        self.mylist_crossite = [name, self.index, size, seeds+'/'+leeches, date]
-                        self.masterlist_crossite.append(self.mylist_crossite)
-                    except Exception as e:
-                        self.logger.exception(e)
-                        pass
+                self.parse_page(page)
         except Exception as e:
             self.logger.exception(e)
             print("Error message: %s" % (e))
             print("Something went wrong! See logs for details. Exiting!")
             sys.exit(2)
 
+    def extract_bs4(self, soup):
+        """
+        Extract result rows from page (BeautifulSoup).
+
+        Yields (name, link, date, size, seeds, leeches) for every torrent.
+        lxml counterpart is limetorrents() in extractors.py
+        """
+        content = soup.find('table', class_='table2')
+        if content is None:
+            return
+        results = content.findAll('tr')
+        for result in results[1:]:
+            data = result.findAll('td')
+            # try block is limetorrents-specific. Means only limetorrents requires this.
+            try:
+                name = data[0].findAll('a')[1].string
+                link = data[0].findAll('a')[1]['href']
+                link = self.proxy+link
+                date = data[1].string
+                date = date.split('-')[0]
+                size = data[2].string
+                seeds = data[3].string.replace(',', '')
+                leeches = data[4].string.replace(',', '')
+            except Exception as e:
+                self.logger.exception(e)
+                continue
+            yield (name, link, date, size, seeds, leeches)
+
+    def add_row(self, name, link, date, size, seeds, leeches):
+        """
+        Add an extracted row to results (see add_result()).
+        Magnetic link is on torrent page (see get_links()).
+        """
+        self.add_result(TorrentResult(name, size, seeds, leeches, date, link=link))
+
+    def display_row(self, result):
+        """Row of output table for `result`."""
+        return [result.name, "--" + str(result.index) + "--", format_size(result.size),
+                self.seeds_leeches(result), result.date]
+
 
 def main(title, page_limit):
     """Execution begins here."""
@@ -3,7 +3,11 @@
 import logging
 import sys
 
+from bs4 import SoupStrainer
+
+import torrench.utilities.extractors as extractors
 from torrench.utilities.Config import Config
+from torrench.utilities.result import TorrentResult, format_size
 
 
 class Nyaa(Config):
@@ -29,87 +33,93 @@ class Nyaa(Config):
         self.logger = logging.getLogger('log1')
         self.class_name = self.__class__.__name__.lower()
         self.index = 0
-        self.mapper = []
-        self.mylist = []
-        self.masterlist = []
-        self.mylist_crossite = []
-        self.masterlist_crossite = []
         self.page = 0
         self.soup = None
         self.total_fetch_time = 0
         self.soup_dict = {}
+        # Only this part of result pages is parsed (see make_doc())
+        self.result_region = SoupStrainer('table', class_=self.class_matcher('torrent-list'))
         self.headers = ['NAME', 'INDEX', 'SIZE', 'SE/LE', 'COMPLETED']
 
     def get_html(self):
         """
         To get HTML page.
 
-        Once proxy is found, the HTML page for
-        corresponding search string is fetched.
-        Also, the time taken to fetch that page is returned.
-        Uses http_request_time() from Common.py module.
+        Once proxy is found, the HTML pages for
+        corresponding search string are fetched (concurrently).
+        Also, the time taken to fetch pages is returned.
+        Uses fetch_pages() from Common.py module.
         """
         try:
-            for self.page in range(self.pages):
-                print("\nFetching from page: %d" % (self.page+1))
-                search = "/?f=0&c=0_0&q={}&s=seeders&o=desc&p={}".format(self.title, self.page+1)
-                self.soup, time = self.http_request_time(self.proxy + search)
-                self.logger.debug("fetching page %d/%d" % (self.page+1, self.pages))
-                results_a = self.soup.findAll('tr', class_='success')
-                results_b = self.soup.findAll('tr', class_='default')
-                if results_a == [] and results_b == []:
-                    print("[No results]")
-                    break
-                print("[in %.2f sec]" % (time))
-                self.logger.debug("page fetched in %.2f sec!" % (time))
-                self.total_fetch_time += time
-                self.soup_dict[self.page] = self.soup
+            self.fetch_pages()
         except Exception as e:
             self.logger.exception(e)
             print("Error message: %s" %(e))
             print("Something went wrong! See logs for details. Exiting!")
             sys.exit(2)
 
+    def search_url(self, page):
+        """URL of result page `page`."""
+        return self.proxy + "/?f=0&c=0_0&q={}&s=seeders&o=desc&p={}".format(self.title, page+1)
+
+    def has_results(self, soup):
+        """Page has results if any result row is present."""
+        if self.parser == 'lxml':
+            return extractors.has_results(self.class_name, soup)
+        results_a = soup.findAll('tr', class_='success')
+        results_b = soup.findAll('tr', class_='default')
+        return results_a != [] or results_b != []
+
     def parse_html(self):
         """
         Parse HTML to get required results.
 
-        Results are fetched in masterlist list.
-        Also, a mapper[] is used to map 'index'
-        with torrent name and link
+        Results are added to self.results (see add_result()).
+
+        Pages are parsed with parse_page() (see Common.py): rows are
+        extracted with extract() and added to results with add_row().
         """
         try:
             for page in self.soup_dict:
-                self.soup = self.soup_dict[page]
-                results = self.soup.find('table', class_='torrent-list').findAll('tr')
-                if results == []:
-                    return
-                for result in results[1:]:
-                    pre_data = result.findAll('a')
-                    name = pre_data[-3].string
-                    link = pre_data[-3]['href']
-                    magnet = pre_data[-1]['href']
-                    data = result.findAll('td')
-                    size = data[3].string
-                    date = data[4].string
-                    seeds = data[5].string
-                    leeches = data[6].string
-                    completed = data[7].string
-                    seeds_color = self.colorify("green", seeds)
-                    leeches_color = self.colorify("red", leeches)
-                    self.index += 1
-                    self.mapper.insert(self.index, (name, magnet, self.proxy+link, self.class_name))
-                    self.mylist = [name, "--" +
-                        str(self.index) + "--", seeds_color + '/' + leeches_color, date, size, completed]
-                    self.masterlist.append(self.mylist)
-                    self.mylist_crossite = [name, self.index, size, seeds+'/'+leeches, date]
-                    self.masterlist_crossite.append(self.mylist_crossite)
+                self.parse_page(page)
         except Exception as e:
             self.logger.exception(e)
             print("Error message: %s" % (e))
             print("Something went wrong! See logs for details. Exiting!")
             sys.exit(2)
 
+    def extract_bs4(self, soup):
+        """
+        Extract result rows from page (BeautifulSoup).
+
+        Yields (name, link, magnet, size, date, seeds, leeches, completed)
+        for every torrent.
+        lxml counterpart is nyaa() in extractors.py
+        """
+        results = soup.find('table', class_='torrent-list').findAll('tr')
+        for result in results[1:]:
+            pre_data = result.findAll('a')
+            name = pre_data[-3].string
+            link = pre_data[-3]['href']
+            magnet = pre_data[-1]['href']
+            data = result.findAll('td')
+            size = data[3].string
+            date = data[4].string
+            seeds = data[5].string
+            leeches = data[6].string
+            completed = data[7].string
+            yield (name, link, magnet, size, date, seeds, leeches, completed)
+
+    def add_row(self, name, link, magnet, size, date, seeds, leeches, completed):
+        """Add an extracted row to results (see add_result())."""
+        self.add_result(TorrentResult(name, size, seeds, leeches, date, magnet, self.proxy+link,
+                                      extra=(completed,)))
+
+    def display_row(self, result):
+        """Row of output table for `result`."""
+        return [result.name, "--" + str(result.index) + "--", self.seeds_leeches(result),
+                result.date, format_size(result.size), result.extra[0]]
+
 
 def main(title, page_limit):
     """
@@ -2,10 +2,66 @@
 
 import logging
 import sys
+import threading
 import time
+from concurrent.futures import as_completed
 
-import requests
+import torrench.utilities.session as session
+import torrench.utilities.settings as settings
+from torrench.utilities.cache import JsonStore
 from torrench.utilities.Config import Config
+from torrench.utilities.daemon_pool import DaemonPool
+from torrench.utilities.result import TorrentResult, format_size, info_hash
+
+# API errors: token is invalid (2) or expired (4)
+TOKEN_ERRORS = (2, 4)
+# Sort modes of result batches (see RarBg.batches())
+BATCH_SORTS = ('seeders', 'last', 'leechers')
+
+
+class TokenCache:
+    """
+    TokenCache class.
+
+    API tokens (per API URL) are kept, with the time they were issued,
+    in memory and between runs (rarbg_token.json in the cache directory).
+    A token is re-used until RARBG_TOKEN_TTL seconds (config.ini, default 840;
+    tokens expire after 15 minutes) after it was issued.
+    Concurrent searches share one token (only one of them requests it).
+    """
+
+    def __init__(self):
+        """Initialisations."""
+        self.store = JsonStore('rarbg_token.json')
+        self.tokens = {}
+        self.lock = threading.Lock()
+
+    def get(self, api, request_token):
+        """Token for `api` (requested with request_token(), if none is valid)."""
+        ttl = settings.get_int('RARBG_TOKEN_TTL', 840)
+        with self.lock:
+            entry = self.tokens.get(api) or self.store.load().get(api)
+            if entry is not None and 0 <= time.time() - entry.get('issued', 0) < ttl:
+                self.tokens[api] = entry
+                return entry['token']
+            entry = {'token': request_token(), 'issued': time.time()}
+            self.tokens[api] = entry
+            self.store.update(lambda data: data.__setitem__(api, entry))
+            return entry['token']
+
+    def expire(self, api, token):
+        """Forget `token` of `api` (refused by API). A newer token is kept."""
+        def _expire(data):
+            if data.get(api, {}).get('token') == token:
+                del data[api]
+
+        with self.lock:
+            if self.tokens.get(api, {}).get('token') == token:
+                del self.tokens[api]
+            self.store.update(_expire)
+
+
+tokens = TokenCache()
 
 
 class RarBg(Config):
@@ -14,98 +70,146 @@ class RarBg(Config):
 
     Torrench uses RarBG API instead of scrapping the web.
     For this to work, a token is generated.
-    Tokens automaticly expire in 15 minutes.
-    The api has a 1req/2s limit.
+    Tokens automaticly expire in 15 minutes; they are re-used until then (see TokenCache).
+    The api has a 1req/2s limit (RARBG_RATE, see rate_limit.py).
+
+    The API has no result pages; a search gives at most 100 results.
+    Instead, `page_limit` (-p) batches of results are fetched
+    (see batches()), and merged (see search_torrent()).
     """
-    def __init__(self, title):
+    def __init__(self, title, page_limit=1):
         """Initialisations."""
         Config.__init__(self)
         self.proxies = self.get_proxies('rarbg')
         self.proxy = self.proxies[0]
         self.title = title
+        self.page_limit = page_limit or 1
         self.logger = logging.getLogger('log1')
         self.class_name = self.__class__.__name__.lower()
         self.index = 0
         self.raw = None
         self.token = None
-        self.mapper = []
-        self.mylist = []
-        self.masterlist = []
-        self.mylist_crossite = []
-        self.masterlist_crossite = []
         self.total_fetch_time = 0
         self.headers = [
                 'CATEG', 'NAME', 'INDEX', 'SIZE', 'S/L', 'DATE'
                 ]
 
-    def get_token(self):
+    def request_token(self):
         """To generate token."""
         self.logger.debug("Getting token")
         get_token = "app_id=torrench&get_token=get_token"
-        raw = requests.get(self.proxy+get_token).json()
-        self.token = raw['token']
-        self.logger.debug("Token generated - {}".format(self.token))
+        raw = session.get(self.proxy+get_token).json()
+        self.logger.debug("Token generated - {}".format(raw['token']))
+        return raw['token']
+
+    def get_token(self):
+        """To get token (cached one, if still valid)."""
+        self.token = tokens.get(self.proxy, self.request_token)
+
+    def api_search(self, params):
+        """
+        Search API with `params`. Returns response (dict).
+        If token is refused (invalid or expired), it is dropped from TokenCache;
+        a new one is got and search is retried once.
+        """
+        if self.token is None:
+            self.get_token()
+        raw = session.get(self.proxy + params + "&token={}".format(self.token)).json()
+        if raw.get('error_code') in TOKEN_ERRORS:
+            self.logger.debug("Token {} refused. Getting new token".format(self.token))
+            tokens.expire(self.proxy, self.token)
+            self.get_token()
+            raw = session.get(self.proxy + params + "&token={}".format(self.token)).json()
+        return raw
+
+    def batches(self):
+        """
+        (sort, category) of result batches to fetch (first `page_limit` of them).
+
+        Every sort mode (BATCH_SORTS) is used with every category of
+        RARBG_CATEGORIES (config.ini; categories as taken by the API, eg.
+        'movies tv 14;48'; default: all categories in one batch).
+        Batches sorted on seeders come first.
+        """
+        categories = settings.get('RARBG_CATEGORIES', '').split() or [None]
+        batches = [(sort, category) for sort in BATCH_SORTS for category in categories]
+        return batches[:max(1, self.page_limit)]
+
+    def fetch_batch(self, sort, category):
+        """
+        Results (API rows) of batch `sort`, `category`.
+        Batches are kept in result cache (see result_cache.py).
+        """
+        key = "{}:{}".format(sort, category or '')
+        results = self.cached_rows(key)
+        if results is not None:
+            self.logger.debug("Batch {} found in result cache".format(key))
+            return results
+        params = "mode=search&app_id=torrench&sort={}&limit=100&format=json_extended&search_string={}".format(sort, self.title)
+        if category is not None:
+            params += "&category={}".format(category)
+        self.logger.debug("Fetching batch {}".format(key))
+        raw = self.api_search(params)
+        if 'error' in raw:
+            # Also returned if there are no results
+            self.logger.debug("Batch {}: {}".format(key, raw['error']))
+            return []
+        results = raw['torrent_results']
+        self.cache_rows(key, results)
+        return results
 
     def search_torrent(self):
         """To search torrent for given input.
 
         The API gives out results in JSON format.
+        Batches (see batches()) are fetched concurrently; requests are
+        spaced out by the rate limiter (RARBG_RATE), not by waiting here.
+        Results found in more than one batch are added once (by info-hash),
+        ranked on seeds.
+        A token is only got if some batch is not in result cache.
         """
         try:
-            params = "mode=search&app_id=torrench&sort=seeders&limit=100&format=json_extended&search_string={}&token={}".format(self.title, self.token)
             start_time = time.time()
-            self.logger.debug("Fetching results")
-            self.raw = requests.get(self.proxy+params).json()
-            if 'error' in self.raw:
-                return
+            batches = self.batches()
+            rows = {}
+            # Batches left (eg. once a batch fails, or in cross-site search past its deadline) do not delay exit
+            executor = DaemonPool(max_workers=len(batches))
+            futures = [executor.submit(self.fetch_batch, sort, category) for sort, category in batches]
+            try:
+                for future in as_completed(futures):
+                    for result in future.result():
+                        key = info_hash(result['download']) or result['download']
+                        rows.setdefault(key, result)
+            finally:
+                executor.shutdown()
             self.total_fetch_time = time.time() - start_time
-            results = self.raw['torrent_results']
-            for result in results:
-                name = result['title']
-                category = result['category']
-                magnet = result['download']
-                seeds = str(result['seeders'])
-                leeches = str(result['leechers'])
-                seeds_color = self.colorify("green", seeds)
-                leeches_color = self.colorify("red", leeches)
-                size = result['size']
-                date = result['pubdate']
-                date = " ".join(date.split(" ")[0:2])
-                link = result['info_page']
-                size = size/1024/1024/1024
-                size_end = "GB"
-                if size < 1:
-                    size *= 1024
-                    size_end = "MB"
-                size = "{0:.2f} {1}".format(size, size_end)
-                self.mapper.insert(self.index, (name, magnet, link, self.class_name))
-                self.index += 1
-                self.mylist = [category, name, "--" +
-                    str(self.index) + "--", size, seeds_color + '/' + leeches_color, date]
-                self.masterlist.append(self.mylist)
-                self.mylist_crossite = [name, self.index, size, seeds+'/'+leeches, date]
-                self.masterlist_crossite.append(self.mylist_crossite)
+            for result in sorted(rows.values(), key=lambda result: -int(result['seeders'] or 0)):
+                date = " ".join(result['pubdate'].split(" ")[0:2])
+                self.add_result(TorrentResult(result['title'], result['size'], result['seeders'],
+                                              result['leechers'], date, result['download'],
+                                              result['info_page'], category=result['category']))
         except Exception as e:
             self.logger.exception(e)
             print("Error message: %s" % (e))
             print("Something went wrong! See logs for details. Exiting!")
             sys.exit(2)
 
+    def display_row(self, result):
+        """Row of output table for `result`."""
+        return [result.category, result.name, "--" + str(result.index) + "--",
+                format_size(result.size), self.seeds_leeches(result), result.date]
+
 
-def main(title):
+def main(title, page_limit=1):
     """Execution begins here."""
     print("\n[RarBg]\n")
-    rbg = RarBg(title)
-    rbg.get_token()
-    time.sleep(0.75)
+    rbg = RarBg(title, page_limit)
     rbg.search_torrent()
     rbg.post_fetch()
 
 
 def cross_site(title, page_limit):
-    rbg = RarBg(title)
-    rbg.get_token()
-    time.sleep(0.75)
+    rbg = RarBg(title, page_limit)
     return rbg
 
 
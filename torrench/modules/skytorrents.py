@@ -3,7 +3,10 @@
 import logging
 import sys
 
+from bs4 import SoupStrainer
+
 from torrench.utilities.Config import Config
+from torrench.utilities.result import TorrentResult, format_size
 
 
 class SkyTorrents(Config):
@@ -37,12 +40,9 @@ class SkyTorrents(Config):
         self.index = 0
         self.page = 0
         self.total_fetch_time = 0
-        self.mapper = []
-        self.mylist = []
-        self.masterlist = []
-        self.mylist_crossite = []
-        self.masterlist_crossite = []
         self.soup_dict = {}
+        # Only this part of result pages is parsed (see make_doc())
+        self.result_region = SoupStrainer('tr')
         self.soup = None
         self.headers = ["NAME  ["+self.colorify("green", "+UPVOTES")+"/"+self.colorify("red", "-DOWNVOTES")+"]",
                                "INDEX", "SIZE", "date", "SE/LE"]
@@ -56,35 +56,21 @@ class SkyTorrents(Config):
         Though skytorrents (as of now) is only using the
         main site, the function is named as check_proxy to
         confirm uniformity across modules.
+        Proxies are tested with test_proxy() (see select_proxy()).
         In case of failiur, program exits.
         """
-        try:
-            count = 0
-            for proxy in self.proxies:
-                print("Trying %s" % (self.colorify("yellow", proxy)))
-                self.logger.debug("Trying proxy: %s" % (proxy))
-                """
-                Performing test for string hello.
-                """
-                self.logger.debug("Carrying out test for string 'hello'")
-                self.soup = self.http_request(proxy + "/search/all/ed/1/?l=en-us&q=hello")
-                if self.soup.find_all('tr')[1] is None or self.soup is None or self.soup == -1:
-                    print("Bad proxy!")
-                    count += 1
-                    if count == len(self.proxies):
-                        self.logger.debug("Proxy list finished! Exiting!")
-                        print("No more proxies found! Exiting...")
-                        sys.exit(2)
-                else:
-                    self.logger.debug("Passed! Connected to proxy!")
-                    print("Available!")
-                    self.proxy = proxy
-                    break
-        except Exception as e:
-            print("Error message: %s" %(e))
-            print("Something went wrong! See logs for details. Exiting!")
-            self.logger.exception(e)
-            sys.exit(2)
+        self.select_proxy()
+
+    def test_proxy(self, proxy):
+        """
+        To test a proxy.
+
+        Performing test for string hello.
+        Test passes if results are found.
+        """
+        self.logger.debug("Carrying out test for string 'hello' (%s)" % (proxy))
+        soup = self.probe_page(proxy + "/search/all/ed/1/?l=en-us&q=hello")
+        return soup != -1 and len(soup.find_all('tr')) > 1
 
     def get_top_html(self):
         """To get top 1000 torrents."""
@@ -102,36 +88,30 @@ class SkyTorrents(Config):
             self.logger.exception(e)
             sys.exit(2)
 
+    def search_url(self, page):
+        """
+        URL of result page `page`.
+
+        If --top is used, title is set to None. This is the condition
+        checked for --top.
+        """
+        if self.title is None:
+            return self.proxy + "/top1000/all/ed/%d/?l=en-us" % (page+1)
+        return self.proxy + "/search/all/ed/%d/?l=en-us&q=%s" % (page+1, self.title)
+
     def get_html(self):
         """
         To get HTML page.
 
-        Once proxy is found, the HTML page for
-        corresponding search string is fetched.
-        Also, the time taken to fetch that page is returned.
-        Uses http_request_time() from Common.py module.
+        Once proxy is found, the HTML pages for
+        corresponding search string are fetched (concurrently).
+        Also, the time taken to fetch pages is returned.
+        Uses fetch_pages() from Common.py module.
 
-        Also, TOP torrents search is resolved here.
-        The variable [search] is set accordingly.
-        If --top is used, title is set to None. This is the condition
-        checked for --top.
+        TOP torrents search is resolved in search_url().
         """
         try:
-            for self.page in range(self.pages):
-                print("\nFetching from page: %d" % (self.page+1))
-                self.logger.debug("fetching page %d/%d" % (self.page+1, self.pages))
-                """
-                If title is none, get TOP torrents.
-                """
-                if self.title is None:
-                    search = "/top1000/all/ed/%d/?l=en-us" % (self.page+1)
-                else:
-                    search = "/search/all/ed/%d/?l=en-us&q=%s" % (self.page+1, self.title)
-                self.soup, time = self.http_request_time(self.proxy + search)
-                print("[in %.2f sec]" % (time))
-                self.logger.debug("page fetched in %.2f sec!" % (time))
-                self.total_fetch_time += time
-                self.soup_dict[self.page] = self.soup
+            self.fetch_pages()
         except Exception as e:
             print("Error message: %s" %(e))
             print("Something went wrong! See logs for details. Exiting!")
@@ -142,61 +122,69 @@ class SkyTorrents(Config):
         """
         Parse HTML to get required results.
 
-        Results are fetched in masterlist list.
-        Also, a mapper[] is used to map 'index'
-        with torrent name, link and magnetic link
-        and files_count (counts number of files torrent has)
+        Results are added to self.results (see add_result()).
+
+        Pages are parsed with parse_page() (see Common.py): rows are
+        extracted with extract() and added to results with add_row().
         """
         try:
             for page in self.soup_dict:
-                self.soup = self.soup_dict[page]
-                content = self.soup.find_all("tr")
-                for i in range(len(content)):
-                    if i == 0:
-                        continue
-                    data = content[i]
-                    results = data.find_all("td")
-                    name = results[0].find_all('a')[0].string
-                    upvotes = '0'
-                    downvotes = '0'
-                    try:
-                        upvotes = str(results[0]).split("\xa0")[1].replace(" ", "").split("<")[0]
-                    except IndexError as e:
-                        self.logger.exception(e)
-                        pass
-                    try:
-                        downvotes = str(results[0]).split("\xa0")[2].replace(" ", "").split("<")[0]
-                    except IndexError as e:
-                        self.logger.exception(e)
-                        pass
-                    upvotes = self.colorify("green", ("+"+upvotes))
-                    downvotes = self.colorify("red", ("-"+downvotes))
-                    display_votes = "  [%s]" % (upvotes+"/"+downvotes)
-                    link = results[0].find_all('a')[0]['href']
-                    magnet = results[0].find_all('a')[1]['href']
-                    size = results[1].string
-                    #self.file_count = results[2].string
-                    date = results[3].string
-                    seeds = results[4].string
-                    leeches = results[5].string
-                    seeds_color = self.colorify("green", seeds)
-                    leeches_color = self.colorify("red", leeches)
-                    self.index += 1
-                    self.mapper.insert(self.index, (name, magnet, self.proxy+link, self.class_name))
-                    #self.mylist = [name + "["+str(upvotes)+"/"+str(downvotes)+"]", "--"+str(self.index)+"--", size, date, seeds, leeches]
-                    self.mylist = [name + display_votes,
-                            "--"+str(self.index)+"--", size,
-                            date, (seeds_color + '/' + leeches_color)]
-                    self.masterlist.append(self.mylist)
-                    # Lists used for cross-site
-                    self.mylist_crossite = [name+display_votes, self.index, size, seeds+'/'+leeches, date]
-                    self.masterlist_crossite.append(self.mylist_crossite)
+                self.parse_page(page)
         except Exception as e:
             print("Error message: %s" %(e))
             print("Something went wrong! See logs for details. Exiting!")
             self.logger.exception(e)
             sys.exit(2)
 
+    def extract_bs4(self, soup):
+        """
+        Extract result rows from page (BeautifulSoup).
+
+        Yields (name, upvotes, downvotes, link, magnet, size, date, seeds, leeches)
+        for every torrent.
+        lxml counterpart is skytorrents() in extractors.py
+        """
+        content = soup.find_all("tr")
+        for i in range(len(content)):
+            if i == 0:
+                continue
+            data = content[i]
+            results = data.find_all("td")
+            name = results[0].find_all('a')[0].string
+            upvotes = '0'
+            downvotes = '0'
+            try:
+                upvotes = str(results[0]).split("\xa0")[1].replace(" ", "").split("<")[0]
+            except IndexError as e:
+                self.logger.exception(e)
+                pass
+            try:
+                downvotes = str(results[0]).split("\xa0")[2].replace(" ", "").split("<")[0]
+            except IndexError as e:
+                self.logger.exception(e)
+                pass
+            link = results[0].find_all('a')[0]['href']
+            magnet = results[0].find_all('a')[1]['href']
+            size = results[1].string
+            #self.file_count = results[2].string
+            date = results[3].string
+            seeds = results[4].string
+            leeches = results[5].string
+            yield (name, upvotes, downvotes, link, magnet, size, date, seeds, leeches)
+
+    def add_row(self, name, upvotes, downvotes, link, magnet, size, date, seeds, leeches):
+        """Add an extracted row to results (see add_result())."""
+        self.add_result(TorrentResult(name, size, seeds, leeches, date, magnet, self.proxy+link,
+                                      extra=(upvotes, downvotes)))
+
+    def display_row(self, result):
+        """Row of output table for `result`."""
+        upvotes = self.colorify("green", ("+"+result.extra[0]))
+        downvotes = self.colorify("red", ("-"+result.extra[1]))
+        display_votes = "  [%s]" % (upvotes+"/"+downvotes)
+        return [result.name + display_votes, "--"+str(result.index)+"--",
+                format_size(result.size), result.date, self.seeds_leeches(result)]
+
 
 def main(title, page_limit):
     """Execution begins here."""
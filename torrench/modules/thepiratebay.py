@@ -3,7 +3,11 @@
 import logging
 import sys
 
+from bs4 import SoupStrainer
+
+import torrench.utilities.extractors as extractors
 from torrench.utilities.Config import Config
+from torrench.utilities.result import TorrentResult, format_size
 
 
 class ThePirateBay(Config):
@@ -33,17 +37,13 @@ class ThePirateBay(Config):
         self.index = 0
         self.page = 0
         self.total_fetch_time = 0
-        self.mylist = []
-        self.masterlist = []
-        self.mylist_crossite = []
-        self.masterlist_crossite = []
-        self.mapper = []
         self.soup_dict = {}
+        # Only this part of result pages is parsed (see make_doc())
+        self.result_region = SoupStrainer('table', id="searchResult")
         self.soup = None
         self.headers = [
                 'CATEG', 'NAME', 'INDEX', 'UPLOADER', 'SIZE', 'SE/LE', 'DATE', 'C']
         ###################################
-        self.non_color_name = None
         self.top = "/top/all"
         self.top48 = "/top/48hall"
 
@@ -51,81 +51,63 @@ class ThePirateBay(Config):
         """
         To check proxy availability.
 
-        Proxy is checked in two steps:
-        1. To see if proxy 'website' is available.
-        2. A test is carried out with a sample string 'hello'.
-        If results are found, test is passed, else test failed!
+        Proxies are tested with test_proxy().
+        How proxies are tested (all at once, or one by one) is decided
+        by select_proxy().
 
         This class inherits Config class. Config class inherits
         Common class. The Config class provides proxies list fetched
         from config file. The Common class consists of commonly used
         methods.
 
-        In case of failiur, next proxy is tested with same procedure.
-        This continues until working proxy is found.
         If no proxy is found, program exits.
         """
-        count = 0
-        for proxy in self.proxies:
-            print("Trying %s" % (self.colorify("yellow", proxy)))
-            self.logger.debug("Trying proxy: %s" % (proxy))
-            self.soup = self.http_request(proxy)
-            try:
-                if self.soup == -1 or self.soup.a.string != 'The Pirate Bay':
-                    print("Bad proxy!")
-                    count += 1
-                    if count == len(self.proxies):
-                        print("No more proxies found! Exiting...")
-                        sys.exit(2)
-                    else:
-                        continue
-                else:
-                    print("Proxy available. Performing test...")
-                    url = proxy+"/search/hello/0/99/0"
-                    self.logger.debug("Carrying out test for string 'hello'")
-                    self.soup = self.http_request(url)
-                    test = self.soup.find('div', class_='detName')
-                    if test is not None:
-                        self.proxy = proxy
-                        print("Pass!")
-                        self.logger.debug("Test passed!")
-                        break
-                    else:
-                        print("Test failed!\nPossibly site not reachable. See logs.")
-                        self.logger.debug("Test failed!")
-            except (AttributeError, Exception) as e:
-                self.logger.exception(e)
-                pass
+        self.select_proxy()
+
+    def test_proxy(self, proxy):
+        """
+        To test a proxy.
+
+        Proxy is checked in two steps:
+        1. To see if proxy 'website' is available.
+        2. A test is carried out with a sample string 'hello'.
+        If results are found, test is passed, else test failed!
+        """
+        soup = self.probe_page(proxy)
+        if soup == -1 or soup.a is None or soup.a.string != 'The Pirate Bay':
+            self.logger.debug("Bad proxy: %s" % (proxy))
+            return False
+        self.logger.debug("Carrying out test for string 'hello' (%s)" % (proxy))
+        soup = self.probe_page(proxy+"/search/hello/0/99/0")
+        return soup != -1 and soup.find('div', class_='detName') is not None
 
     def get_html(self):
         """
         To get HTML page.
 
-        Once proxy is found, the HTML page for
-        corresponding search string is fetched.
-        Also, the time taken to fetch that page is returned.
-        Uses http_request_time() from Common.py module.
+        Once proxy is found, the HTML pages for
+        corresponding search string are fetched (concurrently).
+        Also, the time taken to fetch pages is returned.
+        Uses fetch_pages() from Common.py module.
         """
         try:
-            for self.page in range(self.pages):
-                print("\nFetching from page: %d" % (self.page+1))
-                search = "/search/%s/%d/99/0" % (self.title, self.page)
-                self.soup, time = self.http_request_time(self.proxy + search)
-                content = self.soup.find('table', id="searchResult")
-                if content is None:
-                    print("[No results]")
-                    break
-                self.logger.debug("fetching page %d/%d" % (self.page+1, self.pages))
-                print("[in %.2f sec]" % (time))
-                self.logger.debug("page fetched in %.2f sec!" % (time))
-                self.total_fetch_time += time
-                self.soup_dict[self.page] = self.soup
+            self.fetch_pages()
         except Exception as e:
             self.logger.exception(e)
             print("Error message: %s" %(e))
             print("Something went wrong! See logs for details. Exiting!")
             sys.exit(2)
 
+    def search_url(self, page):
+        """URL of result page `page`."""
+        return self.proxy + "/search/%s/%d/99/0" % (self.title, page)
+
+    def has_results(self, soup):
+        """Page has results if results table is present."""
+        if self.parser == 'lxml':
+            return extractors.has_results(self.class_name, soup)
+        return soup.find('table', id="searchResult") is not None
+
     def get_top_html(self):
         """To get top torrents."""
         try:
@@ -134,10 +116,10 @@ class ThePirateBay(Config):
             option = int(input("Option: "))
             if option == 1:
                 self.logger.debug("Selected [TOP-ALL] (Option: %d)" % (option))
-                self.soup, time = self.http_request_time(self.proxy + self.top)
+                self.soup, time = self.fetch_page(self.proxy + self.top)
             elif option == 2:
                 self.logger.debug("Selected [TOP-48h] (Option: %d)" % (option))
-                self.soup, time = self.http_request_time(self.proxy + self.top48)
+                self.soup, time = self.fetch_page(self.proxy + self.top48)
             else:
                 print("Bad Input! Exiting!")
                 sys.exit(2)
@@ -152,71 +134,89 @@ class ThePirateBay(Config):
         """
         Parse HTML to get required results.
 
-        Results are fetched in masterlist list.
-        Also, a mapper[] is used to map 'index'
-        with torrent name, link and magnetic link
+        Results are added to self.results (see add_result()).
+
+        Pages are parsed with parse_page() (see Common.py): rows are
+        extracted with extract() and added to results with add_row().
         """
         try:
             for page in self.soup_dict:
-                self.soup = self.soup_dict[page]
-                content = self.soup.find('table', id="searchResult")
-                if content is None:
-                    return
-                data = content.find_all('tr')
-                for i in data[1:]:
-                    name = i.find('a', class_='detLink').string
-                    uploader = i.find('font', class_="detDesc").a
-                    if name is None:
-                        name = i.find('a', class_='detLink')['title'].split(" ")[2:]
-                        name = " ".join(str(x) for x in name)
-                    if uploader is None:
-                        uploader = i.find('font', class_="detDesc").i.string
-                    else:
-                        uploader = uploader.string
-                    comments = i.find(
-                        'img', {'src': '//%s/static/img/icon_comment.gif' % (self.proxy.split('/')[2])})
-                    # Total number of comments
-                    if comments is None:
-                        comment = '0'
-                    else:
-                        comment = comments['alt'].split(" ")[-2]
-                    # See if uploader is VIP/Truested/Normal Uploader
-                    self.non_color_name = name
-                    is_vip = i.find('img', {'title': "VIP"})
-                    is_trusted = i.find('img', {'title': 'Trusted'})
-                    if(is_vip is not None):
-                        name = self.colorify("green", name)
-                        uploader = self.colorify("green", uploader)
-                    elif(is_trusted is not None):
-                        name = self.colorify("magenta", name)
-                        uploader = self.colorify("magenta", uploader)
-                    categ = i.find('td', class_="vertTh").find_all('a')[0].string
-                    sub_categ = i.find('td', class_="vertTh").find_all('a')[1].string
-                    seeds = i.find_all('td', align="right")[0].string
-                    leeches = i.find_all('td', align="right")[1].string
-                    date = i.find('font', class_="detDesc").get_text().split(' ')[1].replace(',', "")
-                    size = i.find('font', class_="detDesc").get_text().split(' ')[3].replace(',', "")
-                    seeds_color = self.colorify("green", seeds)
-                    leeches_color = self.colorify("red", leeches)
-                    # Unique torrent id
-                    torr_id = i.find('a', {'class': 'detLink'})["href"].split('/')[2]
-                    # Upstream torrent link
-                    link = "%s/torrent/%s" % (self.proxy, torr_id)
-                    magnet = i.find_all('a', {'title': 'Download this torrent using magnet'})[0]['href']
-                    self.index += 1
-                    self.mapper.insert(self.index, (name, magnet, link, self.class_name))
-                    self.mylist = [categ + " > " + sub_categ, name, "--" +
-                                str(self.index) + "--", uploader, size, (seeds_color + '/' +
-                                leeches_color), date, comment]
-                    self.masterlist.append(self.mylist)
-                    self.mylist_crossite = [name+" ({})".format(uploader), self.index, size, seeds+'/'+leeches, date]
-                    self.masterlist_crossite.append(self.mylist_crossite)
+                self.parse_page(page)
         except Exception as e:
             self.logger.exception(e)
             print("Error message: %s" % (e))
             print("Something went wrong! See logs for details. Exiting!")
             sys.exit(2)
 
+    def extract_bs4(self, soup):
+        """
+        Extract result rows from page (BeautifulSoup).
+
+        Yields (categ, sub_categ, name, uploader, comment, status,
+        seeds, leeches, date, size, torr_id, magnet) for every torrent.
+        lxml counterpart is thepiratebay() in extractors.py
+        """
+        content = soup.find('table', id="searchResult")
+        if content is None:
+            return
+        data = content.find_all('tr')
+        for i in data[1:]:
+            name = i.find('a', class_='detLink').string
+            uploader = i.find('font', class_="detDesc").a
+            if name is None:
+                name = i.find('a', class_='detLink')['title'].split(" ")[2:]
+                name = " ".join(str(x) for x in name)
+            if uploader is None:
+                uploader = i.find('font', class_="detDesc").i.string
+            else:
+                uploader = uploader.string
+            comments = i.find(
+                'img', {'src': '//%s/static/img/icon_comment.gif' % (self.proxy.split('/')[2])})
+            # Total number of comments
+            if comments is None:
+                comment = '0'
+            else:
+                comment = comments['alt'].split(" ")[-2]
+            # See if uploader is VIP/Truested/Normal Uploader
+            status = None
+            if i.find('img', {'title': "VIP"}) is not None:
+                status = 'vip'
+            elif i.find('img', {'title': 'Trusted'}) is not None:
+                status = 'trusted'
+            categ = i.find('td', class_="vertTh").find_all('a')[0].string
+            sub_categ = i.find('td', class_="vertTh").find_all('a')[1].string
+            seeds = i.find_all('td', align="right")[0].string
+            leeches = i.find_all('td', align="right")[1].string
+            date = i.find('font', class_="detDesc").get_text().split(' ')[1].replace(',', "")
+            size = i.find('font', class_="detDesc").get_text().split(' ')[3].replace(',', "")
+            # Unique torrent id
+            torr_id = i.find('a', {'class': 'detLink'})["href"].split('/')[2]
+            magnet = i.find_all('a', {'title': 'Download this torrent using magnet'})[0]['href']
+            yield (categ, sub_categ, name, uploader, comment, status,
+                   seeds, leeches, date, size, torr_id, magnet)
+
+    def add_row(self, categ, sub_categ, name, uploader, comment, status,
+                seeds, leeches, date, size, torr_id, magnet):
+        """Add an extracted row to results (see add_result())."""
+        # Upstream torrent link
+        link = "%s/torrent/%s" % (self.proxy, torr_id)
+        self.add_result(TorrentResult(name, size, seeds, leeches, date, magnet, link,
+                                      uploader=uploader, status=status,
+                                      category=categ + " > " + sub_categ, comments=comment))
+
+    def display_row(self, result):
+        """Row of output table for `result`."""
+        name = result.name
+        uploader = result.uploader
+        if result.status == 'vip':
+            name = self.colorify("green", name)
+            uploader = self.colorify("green", uploader)
+        elif result.status == 'trusted':
+            name = self.colorify("magenta", name)
+            uploader = self.colorify("magenta", uploader)
+        return [result.category, name, "--" + str(result.index) + "--", uploader,
+                format_size(result.size), self.seeds_leeches(result), result.date, result.comments]
+
 
 def main(title, page_limit):
     """Execution begins here."""
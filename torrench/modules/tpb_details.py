@@ -4,7 +4,7 @@
 # HTML files can be cleared with (-c) argument [To be used with -t ]
 
 from bs4 import BeautifulSoup
-import requests
+import torrench.utilities.session as session
 import os
 import time
 import platform
@@ -21,7 +21,7 @@ else:
 
 def get_details(url, index):
     initial_time = time.time()
-    raw = requests.get(url)
+    raw = session.get(url)
     initial_end_time = time.time() - initial_time
     raw = raw.content
     unique_id = url.split('/')[-1]
@@ -82,7 +82,7 @@ def get_details(url, index):
 
         while(total_comments_pages > pg_count):
             start_time = time.time()
-            raw = requests.get(url, params={'page': total_comments_pages})
+            raw = session.get(url, params={'page': total_comments_pages})
             end_time = time.time() - start_time
             print("Page " + str(total_comments_pages) + " [%.2f sec]" % (end_time))
             raw = raw.content
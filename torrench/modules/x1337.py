@@ -3,7 +3,11 @@
 import logging
 import sys
 
+from bs4 import SoupStrainer
+
+import torrench.utilities.extractors as extractors
 from torrench.utilities.Config import Config
+from torrench.utilities.result import TorrentResult, format_size
 
 
 class x1337(Config):
@@ -38,12 +42,9 @@ class x1337(Config):
         self.index = 0
         self.page = 0
         self.total_fetch_time = 0
-        self.mapper = []
-        self.mylist = []
-        self.masterlist = []
-        self.mylist_crossite = []
-        self.masterlist_crossite = []
         self.soup_dict = {}
+        # Only this part of result pages is parsed (see make_doc())
+        self.result_region = SoupStrainer('table', class_=self.class_matcher('table-list'))
         self.headers = [
                 'CATEG', 'NAME', 'INDEX', 'SE/LE', 'TIME', 'SIZE', 'UL', 'C']
 
@@ -51,132 +52,133 @@ class x1337(Config):
         """
         To check proxy availability.
 
-        Proxy is checked in two steps:
-        1. To see if proxy 'website' is available.
-        2. A test is carried out with a sample string 'hello'.
-        If results are found, test is passed, else test failed!
+        Proxies are tested with test_proxy().
+        How proxies are tested (all at once, or one by one) is decided
+        by select_proxy().
 
         This class inherits Config class. Config class inherits
         Common class. The Config class provides proxies list fetched
         from config file. The Common class consists of commonly used
         methods.
 
-        In case of failiur, next proxy is tested with same procedure.
-        This continues until working proxy is found.
         If no proxy is found, program exits.
         """
-        count = 1
-        for proxy in self.proxies:
-            print("Trying %s" % (self.colorify("yellow", proxy)))
-            self.logger.debug("Trying proxy: %s" % (proxy))
-            self.soup = self.http_request(proxy)
-            try:
-                if self.soup == -1 or "1337x" not in self.soup.head.title.string:
-                    print("Bad proxy!")
-                    count += 1
-                    if count == len(self.proxies):
-                        print("No more proxies found! Exiting...")
-                        sys.exit(2)
-                    else:
-                        continue
-                else:
-                    print("Proxy available. Performing test...")
-                    url = proxy+"/search/hello/1/"
-                    self.logger.debug("Carrying out test for string 'hello'")
-                    self.soup = self.http_request(url)
-                    test = self.soup.find('table', class_='table-list')
-                    if test is not None:
-                        self.proxy = proxy
-                        print("Pass!")
-                        self.logger.debug("Test passed!")
-                        break
-                    else:
-                        print("Test failed!\nPossibly site not reachable. (See logs)")
-                        self.logger.debug("Test failed!")
-            except (AttributeError, Exception) as e:
-                print("Proxy not available\n")
-                self.logger.exception(e)
-                pass
+        self.select_proxy()
+
+    def test_proxy(self, proxy):
+        """
+        To test a proxy.
+
+        Proxy is checked in two steps:
+        1. To see if proxy 'website' is available.
+        2. A test is carried out with a sample string 'hello'.
+        If results are found, test is passed, else test failed!
+        """
+        soup = self.probe_page(proxy)
+        if soup == -1 or soup.head is None or soup.head.title is None or "1337x" not in str(soup.head.title.string):
+            self.logger.debug("Bad proxy: %s" % (proxy))
+            return False
+        self.logger.debug("Carrying out test for string 'hello' (%s)" % (proxy))
+        soup = self.probe_page(proxy+"/search/hello/1/")
+        return soup != -1 and soup.find('table', class_='table-list') is not None
 
     def get_html(self):
         """
         To get HTML page.
 
-        Once proxy is found, the HTML page for
-        corresponding search string is fetched.
-        Also, the time taken to fetch that page is returned.
-        Uses http_request_time() from Common.py module.
+        Once proxy is found, the HTML pages for
+        corresponding search string are fetched (concurrently).
+        Also, the time taken to fetch pages is returned.
+        Uses fetch_pages() from Common.py module.
         """
         try:
-            for self.page in range(self.pages):
-                print("\nFetching from page: %d" % (self.page+1))
-                search = "/search/{}/{}/".format(self.title, self.page+1)
-                self.soup, time = self.http_request_time(self.proxy + search)
-                self.logger.debug("fetching page %d/%d" % (self.page+1, self.pages))
-                content = self.soup.find('table', class_='table-list')
-                if content is None:
-                    print("[No results]")
-                    break
-                print("[in %.2f sec]" % (time))
-                self.logger.debug("page fetched in %.2f sec!" % (time))
-                self.total_fetch_time += time
-                self.soup_dict[self.page] = self.soup
+            self.fetch_pages()
         except Exception as e:
             self.logger.exception(e)
             print("Error message: %s" %(e))
             print("Something went wrong! See logs for details. Exiting!")
             sys.exit(2)
 
+    def search_url(self, page):
+        """URL of result page `page`."""
+        return self.proxy + "/search/{}/{}/".format(self.title, page+1)
+
+    def has_results(self, soup):
+        """Page has results if results table is present."""
+        if self.parser == 'lxml':
+            return extractors.has_results(self.class_name, soup)
+        return soup.find('table', class_='table-list') is not None
+
     def parse_html(self):
         """
         Parse HTML to get required results.
 
-        Results are fetched in masterlist list.
-        Also, a mapper[] is used to map 'index'
-        with torrent name and link
+        Results are added to self.results (see add_result()).
+
+        Pages are parsed with parse_page() (see Common.py): rows are
+        extracted with extract() and added to results with add_row().
         """
         try:
             for page in self.soup_dict:
-                self.soup = self.soup_dict[page]
-                content = self.soup.find('table', class_='table-list')
-                if content is None:
-                    return
-                results = content.find_all('tr')
-                for result in results[1:]:
-                    content = result.findAll('td')
-                    if len(content[0].findAll(text=True)) == 2:
-                        name, comments = content[0].findAll(text=True)
-                    else:
-                        name = content[0].findAll(text=True)[0]
-                        comments = 0
-                    link = content[0].findAll('a')[1]['href']
-                    link = self.proxy + link
-                    category = content[0].a.i['class'][0].split('-')[1]
-                    category = category.title()
-                    seeds = content[1].string
-                    leeches = content[2].string
-                    seeds_color = self.colorify("green", seeds)
-                    leeches_color = self.colorify("red", leeches)
-                    date = content[3].string
-                    size = content[4].findAll(text=True)[0]
-                    uploader = content[5].string
-                    uploader_status = content[5]['class'][1]
-                    if uploader_status == 'vip':
-                        name = self.colorify("cyan", name)
-                        uploader = self.colorify("cyan", uploader)
-                    self.index += 1
-                    self.mapper.insert(self.index, (name, link, self.class_name))
-                    self.mylist = [category, name, "--" +
-                        str(self.index) + "--", seeds_color + '/' + leeches_color, date, size, uploader, comments]
-                    self.masterlist.append(self.mylist)
-                    self.mylist_crossite = [name+" ({})".format(uploader), self.index, size, seeds+'/'+leeches, date]
-                    self.masterlist_crossite.append(self.mylist_crossite)
+                self.parse_page(page)
         except Exception as e:
             self.logger.exception(e)
             print("Error message: %s" % (e))
             print("Something went wrong! See logs for details. Exiting!")
             sys.exit(2)
 
+    def extract_bs4(self, soup):
+        """
+        Extract result rows from page (BeautifulSoup).
+
+        Yields (name, comments, link, category, seeds, leeches,
+        date, size, uploader, uploader_status) for every torrent.
+        lxml counterpart is x1337() in extractors.py
+        """
+        content = soup.find('table', class_='table-list')
+        if content is None:
+            return
+        results = content.find_all('tr')
+        for result in results[1:]:
+            content = result.findAll('td')
+            if len(content[0].findAll(text=True)) == 2:
+                name, comments = content[0].findAll(text=True)
+            else:
+                name = content[0].findAll(text=True)[0]
+                comments = 0
+            link = content[0].findAll('a')[1]['href']
+            link = self.proxy + link
+            category = content[0].a.i['class'][0].split('-')[1]
+            category = category.title()
+            seeds = content[1].string
+            leeches = content[2].string
+            date = content[3].string
+            size = content[4].findAll(text=True)[0]
+            uploader = content[5].string
+            uploader_status = content[5]['class'][1]
+            yield (name, comments, link, category, seeds, leeches,
+                   date, size, uploader, uploader_status)
+
+    def add_row(self, name, comments, link, category, seeds, leeches,
+                date, size, uploader, uploader_status):
+        """
+        Add an extracted row to results (see add_result()).
+        Magnetic link is on torrent page (see get_links()).
+        """
+        self.add_result(TorrentResult(name, size, seeds, leeches, date, link=link,
+                                      uploader=uploader, status=uploader_status,
+                                      category=category, comments=comments))
+
+    def display_row(self, result):
+        """Row of output table for `result`."""
+        name = result.name
+        uploader = result.uploader
+        if result.status == 'vip':
+            name = self.colorify("cyan", name)
+            uploader = self.colorify("cyan", uploader)
+        return [result.category, name, "--" + str(result.index) + "--", self.seeds_leeches(result),
+                result.date, format_size(result.size), uploader, result.comments]
+
 
 def main(title, page_limit):
     """Execution begins here."""
@@ -4,8 +4,9 @@ import logging
 import sys
 import time
 
-import requests
+import torrench.utilities.session as session
 from torrench.utilities.Config import Config
+from torrench.utilities.result import TorrentResult, format_size
 
 
 class XBit(Config):
@@ -37,11 +38,6 @@ class XBit(Config):
         self.class_name = self.__class__.__name__.lower()
         self.index = 0
         self.total_fetch_time = 0
-        self.mapper = []
-        self.mylist = []
-        self.masterlist = []
-        self.mylist_crossite = []
-        self.masterlist_crossite = []
         self.data = {}
         self.headers = [
                 'ID', 'NAME', 'INDEX', 'SIZE', 'DISCOVERED']
@@ -51,35 +47,38 @@ class XBit(Config):
         Obtain and parse JSON.
 
         Torrent id, name, magnet, size and date are fetched.
+        Results are kept in result cache (see result_cache.py).
         """
         try:
-            search = "api?search=%s&limit=100" % (self.title)
-            start_time = time.time()
-            raw = requests.get(self.proxy+search).json()
-            self.total_fetch_time = time.time() - start_time
-            print("[in {:.2f} sec]".format(self.total_fetch_time))
-            self.data = raw
-            results = self.data['dht_results']
+            results = self.cached_rows(0)
+            if results is None:
+                search = "api?search=%s&limit=100" % (self.title)
+                start_time = time.time()
+                raw = session.get(self.proxy+search).json()
+                self.total_fetch_time = time.time() - start_time
+                print("[in {:.2f} sec]".format(self.total_fetch_time))
+                self.data = raw
+                results = self.data['dht_results']
+                self.cache_rows(0, results)
+            else:
+                print("[cached]")
             if results == [{}]:
                 return
             for result in results[:-1]:
-                torrent_id = result['ID']
-                name = result['NAME']
-                magnet = result['MAGNET']
-                size = result['SIZE']
-                date = result['DISCOVERED']
-                self.index += 1
-                self.mapper.insert(self.index, (name, magnet, 'None', self.class_name))
-                self.mylist = [torrent_id, name, "--"+str(self.index)+"--", size, date]
-                self.masterlist.append(self.mylist)
-                self.mylist_crossite = [name, self.index, size, '-1/-1', date]
-                self.masterlist_crossite.append(self.mylist_crossite)
+                # XBit has no seeds/leeches, nor torrent page.
+                self.add_result(TorrentResult(result['NAME'], result['SIZE'], date=result['DISCOVERED'],
+                                              magnet=result['MAGNET'], extra=(result['ID'],)))
         except Exception as e:
             self.logger.exception(e)
             print("Error message: %s" % (e))
             print("Something went wrong! See logs for details. Exiting!")
             sys.exit(2)
 
+    def display_row(self, result):
+        """Row of output table for `result`."""
+        return [result.extra[0], result.name, "--" + str(result.index) + "--",
+                format_size(result.size), result.date]
+
 
 def main(title):
     """Execution begins here."""
@@ -5,8 +5,10 @@ import os
 import platform
 import subprocess
 import sys
+import threading
 import time
 import webbrowser
+from concurrent.futures import as_completed
 from configparser import ConfigParser
 
 import colorama
@@ -14,10 +16,28 @@ import requests
 from bs4 import BeautifulSoup
 
 import pyperclip
+import torrench.utilities.extractors as extractors
+import torrench.utilities.http_cache as http_cache
+import torrench.utilities.json_output as json_output
+import torrench.utilities.magnets as magnets
+import torrench.utilities.pager as pager
+import torrench.utilities.proxy_health as proxy_health
+import torrench.utilities.result_cache as result_cache
+import torrench.utilities.session as session
+import torrench.utilities.settings as settings
+import torrench.utilities.sort_filter as sort_filter
 from tabulate import tabulate
+from torrench.utilities.daemon_pool import DaemonPool
+from torrench.utilities.result import format_count, format_size
+from torrench.utilities.stream_table import StreamTable
 
 colorama.init()
 
+# Proxy selected for each site in this process; later searches (eg. --batch) reuse it.
+_selected_proxies = {}
+_selected_proxies_lock = threading.Lock()
+_site_locks = {}
+
 
 class Common:
     """
@@ -28,8 +48,32 @@ class Common:
     methods:
     -- http_request_time():: Returns 'self.soup' as well as time taken to fetch URL.
     -- http_request():: Same as above. Only does not return time taken. Also, time taken to fetch URL is returned.
+    (All requests go through the shared, pooled session. See session.py)
+    (Responses of http_request*() are cached and revalidated. See http_cache.py)
+    -- fetch_page():: Thread-safe http_request_time(). Does not set 'self.soup'.
+    -- probe_page():: Thread-safe http_request(). Does not set 'self.soup'.
+    -- make_doc():: To parse a result page with selected parser (PARSER).
+    -- class_matcher():: To match CSS class in SoupStrainer of 'self.result_region'.
+    -- extract():: To extract result rows from a result page.
+    -- select_proxy():: To select a working proxy (tested with test_proxy() of module).
+    (test_proxy(proxy) returns True/False; it must be thread-safe: use probe_page()/fetch_page(), not http_request())
+    -- forget_proxy():: To stop using a proxy that failed.
+    -- fetch_pages():: To fetch result pages concurrently into 'self.soup_dict'.
+    (URL of page `page` (0-based) is given by search_url(page) of module)
+    -- page_fetched():: Called (in page order) for every page fetched by fetch_pages().
+    -- hand_pages():: To hand fetched pages to page_fetched() in page order.
+    -- parse_page():: To extract results of a page and add them (add_row() of module).
+    -- add_result():: To add a result (TorrentResult, see result.py).
+    -- display_row():: Row of output table for a result (modules override it).
+    -- display_rows():: Rows of output table.
+    -- seeds_leeches():: Colored seeds/leeches of a result.
+    -- order_results():: To sort/filter results (--sort, --min, --max).
+    -- cached_rows():: To get rows of a result page from result cache.
+    -- cache_rows():: To keep rows of a result page in result cache.
+    -- emit_results():: To print new results as JSON lines (--json).
+    -- prefetch_magnets():: To fetch magnets of top results in background (see magnets.py).
     -- post_fetch():: Once results are fetched, this method is called.
-    -- show_output():: To display output table
+    -- show_output():: To display output table (unless results are streamed; see stream_table.py), or viewer (--pager)
     -- after_output():: TO display after-output text (time, pages)
     -- select_index():: To select torrent index
     -- select_option():: After torrent index is selected, select appropriate option (Print links, load, etc.)
@@ -57,6 +101,31 @@ class Common:
         self.start_time = 0
         self.page_fetch_time = 0
         self.colors = {}
+        self.ranked_proxies = []
+        # self.proxy was not tested by this search (cached or selected earlier; see recheck_proxy())
+        self.proxy_untested = False
+        # Parser used for result pages: bs4 (BeautifulSoup) or lxml (XPath, see extractors.py)
+        self.parser = settings.get('PARSER', 'bs4').lower()
+        # SoupStrainer of the part of result pages holding results (set by modules).
+        # Only that part is parsed, unless PARTIAL_PARSE = 0.
+        self.result_region = None
+        self.partial_parse = settings.get_bool('PARTIAL_PARSE', True)
+        # Pages (of soup_dict) already parsed, and results already printed (--json)
+        self.parsed_pages = set()
+        self.emitted = 0
+        # Added to every JSON record (eg. the query, with --batch)
+        self.json_fields = {}
+        # Rows of pages found in result cache (see fetch_pages())
+        self.page_rows = {}
+        self.use_result_cache = True
+        # Results (TorrentResult) of torrent sites, added with add_result()
+        self.results = []
+        # Results are printed page by page as they are parsed (see stream_table.py),
+        # unless STREAM_OUTPUT = 0. 'self.stream' is the table being printed.
+        self.stream_output = settings.get_bool('STREAM_OUTPUT', True)
+        self.stream = None
+        # Fetches magnets of 1337x/LimeTorrents results (see prefetch_magnets())
+        self.magnets = None
         self.logger = logging.getLogger('log1')
         self.OS_WIN = False
         if platform.system() == "Windows":
@@ -73,7 +142,7 @@ class Common:
             try:
                 headers = {"user-agent": "Mozilla/5.0 (X11; Linux x86_64; rv:57.0) Gecko/20100101 Firefox/57.0"}
                 self.start_time = time.time()
-                self.raw = requests.get(url, timeout=15, headers=headers)
+                self.raw = http_cache.get(url, timeout=15, headers=headers)
                 self.page_fetch_time = time.time() - self.start_time
                 self.logger.debug("returned status code: %d for url %s" % (self.raw.status_code, url))
             except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout) as e:
@@ -100,7 +169,7 @@ class Common:
         """
         try:
             try:
-                self.raw = requests.get(url, timeout=15)
+                self.raw = http_cache.get(url, timeout=15)
                 self.logger.debug("returned status code: %d for url %s" % (self.raw.status_code, url))
             except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout) as e:
                 self.logger.error(e)
@@ -114,15 +183,480 @@ class Common:
             self.logger.exception(e)
             sys.exit(2)
     
+    def fetch_page(self, url):
+        """
+        fetch_page method.
+
+        Same as http_request_time(), except self.raw/self.soup are not set,
+        so it can be called from multiple threads at once.
+        Page is parsed with make_doc().
+        Returns (doc, time taken) or -1 on connection errors.
+        """
+        try:
+            headers = {"user-agent": "Mozilla/5.0 (X11; Linux x86_64; rv:57.0) Gecko/20100101 Firefox/57.0"}
+            start_time = time.time()
+            raw = session.get(url, timeout=15, headers=headers)
+            fetch_time = time.time() - start_time
+            self.logger.debug("returned status code: %d for url %s" % (raw.status_code, url))
+        except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout) as e:
+            self.logger.error(e)
+            self.logger.exception("Stacktrace...")
+            return -1
+        return self.make_doc(raw.content), fetch_time
+
+    def make_doc(self, content):
+        """
+        Parse result page `content`.
+
+        Returns BeautifulSoup (PARSER = bs4, default)
+        or lxml.html document (PARSER = lxml).
+        With bs4, only 'self.result_region' of the page is parsed (if set by module).
+        """
+        if self.parser == 'lxml':
+            return extractors.parse(content)
+        if self.partial_parse and self.result_region is not None:
+            return BeautifulSoup(content, 'lxml', parse_only=self.result_region)
+        return BeautifulSoup(content, 'lxml')
+
+    @staticmethod
+    def class_matcher(name):
+        """
+        Match elements having CSS class `name` (for SoupStrainer).
+
+        While straining, class attribute is not split into a list,
+        so class_='name' would only match class="name" exactly.
+        """
+        def match(value):
+            if value is None:
+                return False
+            if isinstance(value, str):
+                value = value.split()
+            return name in value
+        return match
+
+    def extract(self, doc):
+        """
+        Extract result rows from result page `doc`.
+
+        Uses extract_bs4() of module, or (PARSER = lxml)
+        the module's extractor from extractors.py.
+        Rows are returned as tuples of plain strings (no references to parse tree).
+        """
+        if self.parser == 'lxml':
+            return extractors.extract(self.class_name, doc, self.proxy)
+        rows = []
+        for row in self.extract_bs4(doc):
+            rows.append(tuple(str(x) if isinstance(x, str) and type(x) is not str else x for x in row))
+        return rows
+
+    def probe_page(self, url, headers=None):
+        """
+        probe_page method.
+
+        Same as http_request(), except self.raw/self.soup are not set,
+        so it can be called from multiple threads at once.
+        Returns soup or -1 on connection errors.
+        """
+        try:
+            raw = session.get(url, timeout=15, headers=headers)
+            self.logger.debug("returned status code: %d for url %s" % (raw.status_code, url))
+        except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout) as e:
+            self.logger.error(e)
+            self.logger.exception("Stacktrace...")
+            return -1
+        return BeautifulSoup(raw.content, 'lxml')
+
+    def timed_test_proxy(self, proxy):
+        """Run test_proxy(). Returns (proxy, passed, time taken)."""
+        start_time = time.time()
+        try:
+            passed = bool(self.test_proxy(proxy))
+        except Exception as e:
+            self.logger.exception(e)
+            passed = False
+        latency = time.time() - start_time
+        self.logger.debug("Proxy %s: %s [%.2f sec]" % (proxy, "passed" if passed else "failed", latency))
+        proxy_health.record(self.class_name, proxy, passed, latency)
+        return proxy, passed, latency
+
+    def select_proxy(self):
+        """
+        select_proxy method.
+
+        Tests self.proxies with test_proxy() and sets self.proxy
+        to a working one. How proxies are tested depends on
+        PROXY_MODE (config.ini):
+
+        race   - (default) All proxies are tested at once (PROXY_WORKERS at a time).
+                 The first proxy to pass is used, remaining tests are cancelled.
+        rank   - All proxies are tested at once. Proxies passing the test are
+                 ranked by response time. Top PROXY_RANK proxies are kept in
+                 self.ranked_proxies, and the fastest is used.
+        serial - Proxies are tested one by one, in order.
+
+        Proxies that passed the test recently (see proxy_health.py)
+        are used right away, and tested again in background.
+        A proxy selected earlier in this process is used as is
+        (searches of a site select proxies one at a time).
+
+        If no proxy is found, program exits.
+        """
+        with _selected_proxies_lock:
+            site_lock = _site_locks.setdefault(self.class_name, threading.Lock())
+        with site_lock:
+            proxy = _selected_proxies.get(self.class_name)
+            if proxy is not None and proxy in self.proxies:
+                self.proxy = proxy
+                self.proxy_untested = True
+                self.logger.debug("Using proxy selected earlier: %s" % (proxy))
+                return
+            self.proxy_untested = self.cached_proxy()
+            if not self.proxy_untested:
+                mode = settings.get('PROXY_MODE', 'race').lower()
+                self.logger.debug("Selecting proxy (mode: %s) from %d proxies" % (mode, len(self.proxies)))
+                if mode == 'serial':
+                    self.proxy = self.serial_proxy()
+                else:
+                    self.proxy = self.race_proxies(rank=(mode == 'rank'))
+                if self.proxy is None:
+                    print("No more proxies found! Exiting...")
+                    self.logger.debug("Proxy list finished! Exiting!")
+                    sys.exit(2)
+            _selected_proxies[self.class_name] = self.proxy
+        self.logger.debug("Using proxy: %s" % (self.proxy))
+
+    def forget_proxy(self):
+        """
+        To stop using self.proxy (once it fails).
+
+        Next search selects a proxy again, and does not trust
+        this one without testing it.
+        """
+        if _selected_proxies.get(self.class_name) == self.proxy:
+            _selected_proxies.pop(self.class_name, None)
+        proxy_health.record(self.class_name, self.proxy, False)
+
+    def cached_proxy(self):
+        """
+        To use a recently tested proxy.
+
+        If a proxy passed its test less than PROXY_CACHE_TTL seconds ago,
+        it is set as self.proxy and True is returned.
+        Once it is older than half the TTL, it is tested again
+        in background, so the next run gets a fresh result.
+        """
+        ttl = settings.get_int('PROXY_CACHE_TTL', 1800)
+        if ttl <= 0:
+            return False
+        proxy, age = proxy_health.fresh_proxy(self.class_name, self.proxies, ttl)
+        if proxy is None:
+            return False
+        self.proxy = proxy
+        print("Using %s (tested %d min ago)" % (self.colorify("yellow", proxy), age // 60))
+        self.logger.debug("Using cached proxy: %s (age: %d sec)" % (proxy, age))
+        if age > ttl / 2:
+            self.logger.debug("Re-testing proxy %s in background" % (proxy))
+            threading.Thread(target=self.timed_test_proxy, args=(proxy,), daemon=True).start()
+        return True
+
+    def recheck_proxy(self):
+        """
+        To test self.proxy again, once it fails (or shows no results)
+        while it was not tested by this search (see select_proxy()).
+
+        If it fails the test, it is forgotten and another proxy is selected.
+        Returns True if another proxy is selected.
+        """
+        self.proxy_untested = False
+        print("Testing %s again..." % (self.colorify("yellow", self.proxy)))
+        proxy, passed, latency = self.timed_test_proxy(self.proxy)
+        if passed:
+            return False
+        print("Bad proxy!")
+        self.forget_proxy()
+        self.select_proxy()
+        return True
+
+    def serial_proxy(self):
+        """Test proxies one by one. Returns first working proxy (or None)."""
+        for proxy in self.proxies:
+            print("Trying %s" % (self.colorify("yellow", proxy)))
+            proxy, passed, latency = self.timed_test_proxy(proxy)
+            if passed:
+                print("Pass! [in %.2f sec]" % (latency))
+                return proxy
+            print("Bad proxy!")
+        return None
+
+    def race_proxies(self, rank=False):
+        """
+        Test all proxies concurrently.
+
+        Returns first working proxy, or, if `rank` is set,
+        the fastest working proxy (or None).
+        """
+        if not self.proxies:
+            return None
+        print("Trying %d proxies..." % (len(self.proxies)))
+        workers = max(1, min(settings.get_int('PROXY_WORKERS', 8), len(self.proxies)))
+        # Tests still running once a proxy is found are not waited for (see daemon_pool.py)
+        executor = DaemonPool(max_workers=workers)
+        futures = [executor.submit(self.timed_test_proxy, proxy) for proxy in self.proxies]
+        passed = []
+        try:
+            for future in as_completed(futures):
+                proxy, ok, latency = future.result()
+                if not ok:
+                    continue
+                passed.append((latency, proxy))
+                if not rank:
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
+        if not passed:
+            return None
+        passed.sort()
+        self.ranked_proxies = [proxy for latency, proxy in passed[:settings.get_int('PROXY_RANK', 3)]]
+        for latency, proxy in passed[:len(self.ranked_proxies)]:
+            print("Available: %s [in %.2f sec]" % (self.colorify("yellow", proxy), latency))
+        return self.ranked_proxies[0]
+
+    def has_results(self, soup):
+        """
+        To check if a fetched page has results.
+
+        Modules override this if the site tells when there are no (more) results.
+        """
+        return True
+
+    def fetch_pages(self, first=0):
+        """
+        fetch_pages method.
+
+        Fetches result pages 1 to self.pages concurrently
+        (at most PAGE_WORKERS at a time, set in config.ini).
+        URLs are given by search_url() of the module.
+        Pages in result cache (see result_cache.py) are not fetched.
+
+        Once a page has no results (see has_results()), or a page after
+        the first one can not be fetched, pages after it are not fetched
+        (or dropped, if already fetched); results of pages before it are kept.
+
+        Pages are handed to page_fetched() in page order, each as soon as
+        all pages before it are fetched.
+
+        If a proxy not tested by this search fails (or its first page has
+        no results, eg. a parked domain), it is tested again (see recheck_proxy()).
+        If another proxy is selected, pages not handed yet are fetched from it.
+        """
+        pages = {}
+        last_page = self.pages
+        to_fetch = []
+        start_time = time.time()
+        if self.stream_output and self.stream is None and not json_output.enabled and not pager.enabled \
+                and not sort_filter.active():
+            self.stream = StreamTable(self.headers, self.OS_WIN)
+        for page in range(first, self.pages):
+            rows = self.cached_rows(page)
+            if rows is None:
+                to_fetch.append(page)
+            elif not rows:
+                last_page = page
+                break
+            else:
+                self.page_rows[page] = rows
+                pages[page] = (None, 0.0)
+        to_fetch = [page for page in to_fetch if page < last_page]
+        workers = max(1, min(settings.get_int('PAGE_WORKERS', 8), len(to_fetch)))
+        # Daemon threads: a site dropped by cross-site search does not delay exit (see daemon_pool.py)
+        executor = DaemonPool(max_workers=workers)
+        futures = {executor.submit(self.fetch_page, self.search_url(page)): page for page in to_fetch}
+        next_page = self.hand_pages(pages, first, last_page)
+        reselected = False
+        failed_page = None
+        try:
+            for future in as_completed(futures):
+                page = futures[future]
+                if page >= last_page:
+                    continue
+                result = future.result()
+                suspect = result == -1 or (page == 0 and not self.has_results(result[0]))
+                if suspect and self.proxy_untested and getattr(self, 'proxy', None):
+                    reselected = self.recheck_proxy()
+                    if reselected:
+                        break
+                if result == -1 and page == 0:
+                    if getattr(self, 'proxy', None):
+                        self.forget_proxy()
+                    raise Exception("Unable to fetch page %d" % (page+1))
+                if result == -1 or not self.has_results(result[0]):
+                    if result == -1:
+                        # Results of pages before it are kept
+                        self.logger.debug("Unable to fetch page %d. Stopping at it" % (page+1))
+                        failed_page = page
+                    else:
+                        self.cache_rows(page, [])
+                    last_page = page
+                    for pending, pending_page in futures.items():
+                        if pending_page > page:
+                            pending.cancel()
+                    continue
+                self.logger.debug("fetched page %d/%d" % (page+1, self.pages))
+                pages[page] = result
+                next_page = self.hand_pages(pages, next_page, last_page)
+        finally:
+            for pending in futures:
+                pending.cancel()
+            executor.shutdown()
+        if reselected:
+            self.total_fetch_time += time.time() - start_time
+            return self.fetch_pages(next_page)
+        if last_page < self.pages:
+            print("\nFetching from page: %d" % (last_page+1))
+            print("[Unable to fetch page]" if failed_page == last_page else "[No results]")
+        self.total_fetch_time += time.time() - start_time
+
+    def hand_pages(self, pages, next_page, last_page):
+        """
+        Hand pages (of `pages`) from `next_page` on to page_fetched(),
+        as long as they are contiguous. Returns next page to hand.
+        """
+        while next_page in pages and next_page < last_page:
+            self.page_fetched(next_page, *pages.pop(next_page))
+            next_page += 1
+        return next_page
+
+    def page_fetched(self, page, soup, fetch_time):
+        """
+        page_fetched method.
+
+        Stores fetched page `page` in self.soup_dict
+        (None for pages in result cache; see self.page_rows).
+        With --json, or if output is streamed (self.stream), the page
+        is parsed (and its results printed) right away.
+        """
+        self.soup = soup
+        if self.stream is None:
+            print("\nFetching from page: %d" % (page+1))
+            print("[cached]" if soup is None else "[in %.2f sec]" % (fetch_time))
+        if soup is None:
+            self.logger.debug("page %d found in result cache" % (page+1))
+        else:
+            self.logger.debug("page %d fetched in %.2f sec!" % (page+1, fetch_time))
+        self.soup_dict[page] = soup
+        if json_output.enabled or self.stream is not None:
+            self.parse_page(page)
+
+    def parse_page(self, page):
+        """
+        parse_page method.
+
+        Extracts results of page `page` (of self.soup_dict) with extract(),
+        and adds them with add_row() of module. Pages already parsed are skipped.
+        Extracted rows are kept in result cache; rows of cached pages
+        are used as is.
+        """
+        if page in self.parsed_pages:
+            return
+        self.parsed_pages.add(page)
+        start = len(self.results)
+        if page in self.page_rows:
+            rows = self.page_rows.pop(page)
+        else:
+            rows = list(self.extract(self.soup_dict[page]))
+            self.cache_rows(page, rows)
+        for row in rows:
+            self.add_row(*row)
+        if json_output.enabled:
+            self.emit_results()
+        elif self.stream is not None:
+            self.stream.print_rows(self.display_rows(start))
+
+    def add_result(self, result):
+        """Add `result` (TorrentResult) of this site, with next INDEX."""
+        self.index += 1
+        result.index = self.index
+        result.site = self.class_name
+        self.results.append(result)
+
+    def display_row(self, result):
+        """
+        Row of output table for `result`.
+        Modules override it to show their own columns (self.headers);
+        this is the cross-site layout.
+        """
+        return [result.full_name(), result.index, format_size(result.size), self.seeds_leeches(result), result.date]
+
+    def seeds_leeches(self, result):
+        """Colored 'seeds/leeches' of `result` (NA if unknown)."""
+        seeds = self.colorify("green", format_count(result.seeds))
+        leeches = self.colorify("red", format_count(result.leeches))
+        return seeds+'/'+leeches
+
+    def display_rows(self, start=0, end=None):
+        """Rows of output table (results `start` to `end`), or self.masterlist if there are no results."""
+        if not self.results:
+            return getattr(self, 'masterlist', [])[start:end]
+        return [self.display_row(result) for result in self.results[start:end]]
+
+    def cached_rows(self, page):
+        """Rows of result page `page` of this search, from result cache (or None)."""
+        if not self.use_result_cache:
+            return None
+        rows = result_cache.get(self.class_name, getattr(self, 'title', None), page)
+        if rows and getattr(self, 'proxy', None):
+            rows = result_cache.absolute(rows, self.proxy)
+        return rows
+
+    def cache_rows(self, page, rows):
+        """
+        Keep rows of result page `page` of this search in result cache (links relative to proxy).
+
+        An empty first page is not kept: it may be a blocked, parked or
+        captcha page served by the proxy, not a search without results.
+        """
+        if not rows and page == 0:
+            return
+        if self.use_result_cache:
+            if getattr(self, 'proxy', None):
+                rows = result_cache.relative(rows, self.proxy)
+            result_cache.put(self.class_name, getattr(self, 'title', None), page, rows)
+
+    def emit_results(self):
+        """Print results not printed yet as JSON lines (see json_output.py)."""
+        for result in self.results[self.emitted:]:
+            if not sort_filter.matches(result):
+                continue
+            rec = json_output.record(result)
+            rec.update(self.json_fields)
+            json_output.emit(rec)
+        self.emitted = len(self.results)
+
+    def order_results(self):
+        """Sort and filter results (--sort, --min, --max; see sort_filter.py)."""
+        fetched = len(self.results)
+        self.results = sort_filter.order(self.results)
+        if len(self.results) < fetched:
+            print("\n%d of %d torrents match filters" % (len(self.results), fetched))
+
     def post_fetch(self):
         """
         After output is displayed, Following text is displayed on console.
 
         Text includes instructions, total torrents fetched, total pages,
         and total time taken to fetch results.
+
+        With --json, results are printed as JSON lines instead, and torrench exits.
         """
-        # Check if masterlist is empty. If yes, it means no results are fetched.
-        if self.masterlist is None or self.masterlist == []:
+        if json_output.enabled:
+            self.emit_results()
+            sys.exit(0)
+        if sort_filter.active():
+            self.order_results()
+        # Check if results is empty. If yes, it means no results are fetched.
+        if not self.results:
             print("\nNo results found for given input!")
             self.logger.debug("No results found for given input!")
             try:
@@ -137,24 +671,51 @@ class Common:
         
         # Masterlist is not empty. Proceed further.
         self.logger.debug("Results fetched successfully.")
-        self.logger.debug("Displaying output result table.")
-        self.show_output()
-        oplist = [self.index, self.total_fetch_time]
+        if self.stream is not None:
+            # Results are already printed (page by page)
+            self.stream.print_rows(self.display_rows(self.stream.rows_printed))
+        else:
+            self.logger.debug("Displaying output result table.")
+            self.show_output()
+        self.prefetch_magnets()
+        # Results shown (after --min/--max), and results fetched (for page count)
+        oplist = [len(self.results), self.total_fetch_time, self.index]
         self.logger.debug("Displaying after_output text: total torrents and fetch_time")
         self.after_output(oplist)
         self.logger.debug("Selecting torrent")
         while True:
-            index = self.select_index(len(self.mapper))
+            index = self.select_index(len(self.results))
             if index == 0:
                 continue
             if index == 'r':
                 break
             self.select_option(index)
     
+    def prefetch_magnets(self):
+        """
+        Start fetching magnets of top results (by seeds) in background,
+        while torrent is being selected. MAGNET_PREFETCH = 0 disables it.
+        """
+        count = settings.get_int('MAGNET_PREFETCH', 10)
+        if count <= 0 or not any(magnets.needs_magnet(result) for result in self.results):
+            return
+        if self.magnets is None:
+            self.magnets = magnets.MagnetResolver()
+        self.magnets.prefetch(self.results, count)
+
     def show_output(self):
-        """To display tabular output of torrent search."""
+        """
+        To display tabular output of torrent search.
+
+        With --pager, rows are shown screen by screen (see pager.py).
+        """
         try:
-            self.output = tabulate(self.masterlist, headers=self.headers, tablefmt="grid")
+            if pager.enabled:
+                per_screen = settings.get_int('PAGER_ROWS', pager.screen_rows())
+                count = len(self.results) or len(getattr(self, 'masterlist', []))
+                pager.Pager(self.headers, self.display_rows, count, per_screen, self.OS_WIN).run()
+                return
+            self.output = tabulate(self.display_rows(), headers=self.headers, tablefmt="grid")
             if self.OS_WIN:
                 self.output = self.output.encode('ascii', 'replace').decode()
             print("\n%s" % (self.output))
@@ -171,6 +732,7 @@ class Common:
         """
         total_torrent_count = oplist[0]
         total_fetch_time = oplist[1]
+        fetched_count = oplist[2] if len(oplist) > 2 else total_torrent_count
         # `max` is maximum number of torrents in 1 page
         if self.class_name == 'thepiratebay' or self.class_name == 'kickasstorrent':
             m = 30
@@ -185,9 +747,9 @@ class Common:
         elif self.class_name == 'limetorrents':
             m = 50
         else:
-            m = total_torrent_count
-        exact_no_of_pages = total_torrent_count // m
-        has_extra_pages = total_torrent_count % m
+            m = max(fetched_count, 1)
+        exact_no_of_pages = fetched_count // m
+        has_extra_pages = fetched_count % m
         if has_extra_pages > 0:
             exact_no_of_pages += 1
         self.logger.debug("Total torrents: %d" % (total_torrent_count))
@@ -219,9 +781,15 @@ class Common:
             index = None
             while index != 'q':
                 print("\nEnter torrent's INDEX value")
-                index = input("\n(q = quit)\n(r = return)\nindex > ")
+                if pager.enabled:
+                    index = input("\n(q = quit)\n(r = return)\n(v = view results)\nindex > ")
+                else:
+                    index = input("\n(q = quit)\n(r = return)\nindex > ")
                 self.logger.debug("selected index %s" % (index))
-                if index == 'q':
+                if index == 'v' and pager.enabled:
+                    self.show_output()
+                    continue
+                elif index == 'q':
                     print("\nBye!")
                     self.logger.debug("Torrench quit!")
                     sys.exit(2)
@@ -261,7 +829,7 @@ class Common:
         HTML page.
         """
         try:
-            selected_torrent = self.mapper[index-1][0]
+            selected_torrent = self.results[index-1].name
             self.logger.debug("selected torrent: %s ; index: %d" % (selected_torrent, index))
             selected_torrent_colored = self.colorify("yellow", selected_torrent)
             option_one = "[1] Print links (magnetic, upstream)\n"
@@ -269,7 +837,7 @@ class Common:
             option_three = "[3] Get torrent details\n"
             option_return = "---\n[r] Return\n"
             option_quit = "[q] Quit\n"
-            self.class_name = self.mapper[index-1][-1]
+            self.class_name = self.results[index-1].site
             if self.class_name == 'thepiratebay':
                 options = option_one + option_two + option_three + option_return + option_quit
             else:
@@ -329,12 +897,14 @@ class Common:
         """
         try:
             self.logger.debug("Fetching magnetic and upstream links for {}".format(self.class_name))
-            if self.class_name in ['x1337', 'limetorrents']:
-                torrent_link = self.mapper[index-1][-2]
-                magnetic_link = self.get_magnet_external(torrent_link)
-            else:
-                torrent_link = self.mapper[index-1][-2]
-                magnetic_link = self.mapper[index-1][-3]
+            result = self.results[index-1]
+            torrent_link = result.link
+            if result.magnet is None and self.magnets is not None:
+                # Prefetched (or being fetched)
+                self.magnets.wait(result)
+            if result.magnet is None:
+                result.magnet = self.get_magnet_external(torrent_link)
+            magnetic_link = result.magnet
             self.logger.debug("Links fetched successfully.")
             return magnetic_link, torrent_link
         except Exception as e:
@@ -350,15 +920,18 @@ class Common:
 
         Further, two more options are available:
         [1] Copy magnetic link to clipboard
-        [2] Copy upstream Link to clipboard
+        [2] Copy upstream Link to clipboard (if site has a torrent page; XBit has none)
         [r] Return: To return to previous screen.
         """
         try:
             self.logger.debug("Printing magnetic and upstream links")
             print("\nMagnetic link - %s" % (self.colorify("red",  req_magnetic_link)))
-            print("\n\nUpstream link - %s\n" % (self.colorify("yellow", torrent_link)))
+            if torrent_link is None:
+                print("\n\nUpstream link - None (site has no torrent page)\n")
+            else:
+                print("\n\nUpstream link - %s\n" % (self.colorify("yellow", torrent_link)))
             option_one = "[1] Copy magnetic link to clipboard\n"
-            option_two = "[2] Copy upstream Link to clipboard\n"
+            option_two = "[2] Copy upstream Link to clipboard\n" if torrent_link is not None else ""
             option_return = "[r] Return\n"
             options = option_one + option_two + option_return
             print(options)
@@ -375,7 +948,7 @@ class Common:
                     if opt == 1:
                         self.logger.debug("{}: {}".format(opt, option_one))
                         self.copylink_clipboard(req_magnetic_link)
-                    elif opt == 2:
+                    elif opt == 2 and torrent_link is not None:
                         self.logger.debug("{}: {}".format(opt, option_two))
                         self.copylink_clipboard(torrent_link)
                     else:
@@ -394,16 +967,11 @@ class Common:
         Module to get magnetic link of torrent.
 
         For 1337x, limetorrents modules.
-        Magnetic link is fetched from torrent's info page.
+        Magnetic link is fetched from torrent's info page (see magnets.py).
         """
         print("Fetching magnetic link...")
         self.logger.debug("Fetching magnetic link")
-        soup = self.http_request(link)
-        if self.class_name == 'limetorrents':
-            magnet = soup.findAll('div', class_='dltorrent')[2].a['href']
-        elif self.class_name == 'x1337':
-            magnet = soup.find('ul', class_="download-links-dontblock").a['href']
-        return magnet
+        return magnets.fetch_magnet(self.class_name, link)
 
     def fetch_tpb_details(self, link, index):
         """
@@ -442,7 +1010,7 @@ class Common:
             torrent_file = os.path.join(downloads_dir, torrent_name)
             with open(torrent_file, "wb") as file:
                 print("Downloading torrent...")
-                response = requests.get(dload_url)
+                response = session.get(dload_url)
                 file.write(response.content)
                 self.logger.debug("Download complete!")
                 print("Download complete!")
@@ -1,10 +1,25 @@
 """ Config module."""
 import logging
 import os
-from configparser import ConfigParser
+import threading
+import time
+from configparser import ConfigParser, NoOptionError
 
+import requests
+from bs4 import BeautifulSoup
+
+import torrench.utilities.rate_limit as rate_limit
+import torrench.utilities.session as session
+import torrench.utilities.settings as settings
+from torrench.utilities.cache import JsonStore
 from torrench.utilities.Common import Common
 
+# Proxy lists (TPB/1337x) fetched from proxy-list pages.
+# Shared by all modules of a process (_proxy_lists) and between runs (proxy_list_store).
+proxy_list_store = JsonStore('proxy_lists.json')
+_proxy_lists = {}
+_proxy_lists_lock = threading.Lock()
+
 
 class Config(Common):
     r"""
@@ -14,6 +29,7 @@ class Config(Common):
     Also, this class manages TPB/KAT proxies; That is,
     obtains TPB/KAT URL and fetches proxies thorugh those URL.
     Proxies are stored as list and returned.
+    Proxy lists fetched from proxy-list pages are cached (see get_proxy_list()).
 
     By default, Config files is checked in $XDG_CONFIG_HOME/torrench/ and
     fallback to $HOME/.config/torrench/ directory (linux)
@@ -77,30 +93,102 @@ class Config(Common):
         """
         Get Proxies.
 
-        Proxies are read from config.ini file.
+        Proxies are read from config.ini file
+        (parsed once per process, see settings.py).
         """
         self.logger.debug("getting proxies for '%s'" % (name))
         temp = []
-        self.config.read(self.config_file)
 
         name = '{}_URL'.format(name.upper())
 
-        self.url = self.config.get('Torrench-Config', name)
+        self.url = settings.get(name)
+        if self.url is None:
+            raise NoOptionError(name, settings.SECTION)
         self.urllist = self.url.split()
 
         if name == 'TPB_URL':
-            soup = self.http_request(self.urllist[-1])
-            link = soup.find_all('td', class_='site')
+            temp = self.get_proxy_list(self.urllist[-1], 'site')
             del self.urllist[-1]
-            for i in link:
-                temp.append(i.a["href"])
             self.urllist.extend(temp)
         elif name == "1337X_URL":
-            soup = self.http_request(self.urllist[-1])
-            link = soup.findAll('td', class_='text-left')
+            temp = self.get_proxy_list(self.urllist[-1], 'text-left')
             del self.urllist[-1]
-            for i in link:
-                temp.append(i.a["href"])
             self.urllist.extend(temp)
         self.logger.debug("got %d proxies!" % (len(self.urllist)))
+        rate_limit.assign(self.urllist, name[:-len('_URL')].lower())
         return self.urllist
+
+    def get_proxy_list(self, url, td_class):
+        """
+        Get proxies listed on a proxy-list page.
+
+        Proxies are links in <td class=`td_class`> cells of the page.
+
+        Lists are cached (in memory and in cache directory):
+        - Lists younger than PROXY_LIST_TTL seconds (config.ini, default 21600)
+          are used as is.
+        - Older lists (up to PROXY_LIST_STALE more seconds, default 604800) are used
+          as is, and revalidated in background.
+        - Otherwise the page is revalidated before use (conditional request,
+          using ETag/Last-Modified). If that fails, the old list is used.
+        """
+        ttl = settings.get_int('PROXY_LIST_TTL', 21600)
+        stale = settings.get_int('PROXY_LIST_STALE', 604800)
+        with _proxy_lists_lock:
+            entry = _proxy_lists.get(url)
+            if entry is None:
+                entry = proxy_list_store.load().get(url)
+                if entry is not None:
+                    _proxy_lists[url] = entry
+        if entry is not None:
+            age = time.time() - entry.get('fetched', 0)
+            if 0 <= age < ttl:
+                self.logger.debug("Using cached proxy list for %s (age: %d sec)" % (url, age))
+                return list(entry['proxies'])
+            if 0 <= age < ttl + stale:
+                self.logger.debug("Using stale proxy list for %s. Revalidating in background" % (url))
+                threading.Thread(target=self.fetch_proxy_list, args=(url, td_class, entry), daemon=True).start()
+                return list(entry['proxies'])
+        entry = self.fetch_proxy_list(url, td_class, entry)
+        if entry is None:
+            self.logger.debug("Unable to get proxy list from %s" % (url))
+            return []
+        return list(entry['proxies'])
+
+    def fetch_proxy_list(self, url, td_class, entry=None):
+        """
+        Fetch (or revalidate `entry` of) proxy-list page and cache it.
+
+        Returns the new entry, or `entry` if the page could not be fetched.
+        """
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        try:
+            raw = session.get(url, timeout=15, headers=headers)
+            self.logger.debug("returned status code: %d for url %s" % (raw.status_code, url))
+        except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout) as e:
+            self.logger.error(e)
+            return entry
+        if raw.status_code == 304 and entry is not None:
+            new_entry = dict(entry, fetched=time.time())
+        elif raw.status_code == 200:
+            soup = BeautifulSoup(raw.content, 'lxml')
+            proxies = [i.a["href"] for i in soup.find_all('td', class_=td_class) if i.a is not None]
+            if not proxies:
+                return entry
+            new_entry = {
+                'fetched': time.time(),
+                'etag': raw.headers.get('ETag'),
+                'last_modified': raw.headers.get('Last-Modified'),
+                'proxies': proxies
+            }
+        else:
+            return entry
+        with _proxy_lists_lock:
+            _proxy_lists[url] = new_entry
+        proxy_list_store.update(lambda data: data.__setitem__(url, new_entry))
+        return new_entry
@@ -0,0 +1,158 @@
+"""
+Batch Module.
+
+Searches many queries (--batch FILE, or - for stdin; one query per line)
+in one process. Every query is searched on all selected sites,
+and results are printed as JSON lines (see json_output.py), each
+record having the 'query' it was found for.
+
+All queries share the parsed config.ini, the HTTP connection pools,
+proxy lists and the proxy selected for each site, so those costs are
+paid once per batch instead of once per query.
+Queries are searched BATCH_WORKERS (config.ini, default 4) at a time.
+
+Progress (one line per query) is printed to stderr.
+"""
+import logging
+import sys
+import threading
+import time
+
+import torrench.utilities.json_output as json_output
+import torrench.utilities.settings as settings
+from torrench.utilities.Config import Config
+from torrench.utilities.cross_site import CrossSite
+from torrench.utilities.daemon_pool import DaemonPool
+
+
+class Batch(Config):
+    """
+    Batch class.
+
+    Runs queries of a batch, and reports per-query results.
+    """
+
+    def __init__(self, queries, sites, page_limit):
+        """Initialisations."""
+        Config.__init__(self)
+        self.queries = queries
+        self.sites = sites
+        self.pages = page_limit
+        self.logger = logging.getLogger('log1')
+        self.done = 0
+        self.failed = 0
+        self.total_results = 0
+        self.lock = threading.Lock()
+
+    def report(self, text):
+        """Print progress to stderr (stdout is kept for results)."""
+        with self.lock:
+            sys.stderr.write(text + "\n")
+            sys.stderr.flush()
+
+    def search(self, query):
+        """
+        Search `query` on all sites (one site after another).
+
+        A failing site does not stop the search.
+        Returns (results per site, sites failed).
+        """
+        cs = CrossSite(query, self.pages)
+        cs.json_fields = {'query': query}
+        counts = {}
+        failed = []
+        for site in self.sites:
+            try:
+                module_obj = cs.fetch_site(site)
+                counts[site] = len(module_obj.results)
+            except (SystemExit, Exception) as e:
+                self.logger.exception(e)
+                failed.append(site)
+        return counts, failed
+
+    def run_query(self, query):
+        """Search `query` and report its results."""
+        start_time = time.time()
+        self.logger.debug("Batch query: {}".format(query))
+        counts, failed = self.search(query)
+        total = sum(counts.values())
+        details = ["{}: {}".format(site, count) for site, count in counts.items()]
+        details += ["{}: failed".format(site) for site in failed]
+        with self.lock:
+            self.done += 1
+            self.total_results += total
+            if failed:
+                self.failed += 1
+            done = self.done
+        self.report("[{}/{}] {}: {} results ({}) [in {:.2f} sec]".format(
+            done, len(self.queries), query, total, ", ".join(details), time.time() - start_time))
+
+    def run(self):
+        """Run all queries (at most BATCH_WORKERS at a time)."""
+        workers = max(1, min(settings.get_int('BATCH_WORKERS', 4), len(self.queries)))
+        start_time = time.time()
+        self.logger.debug("Batch: {} queries, sites: {}, workers: {}".format(
+            len(self.queries), self.sites, workers))
+        executor = DaemonPool(max_workers=workers)
+        futures = [executor.submit(self.run_query, query) for query in self.queries]
+        try:
+            for future in futures:
+                future.result()
+        finally:
+            executor.shutdown()
+        self.report("\nTotal {} torrents for {} queries in {:.2f} sec.".format(
+            self.total_results, len(self.queries), time.time() - start_time))
+        if self.failed:
+            self.report("({} queries had failed sites. See logs for details)".format(self.failed))
+
+
+def read_queries(source):
+    """
+    Read queries from file `source` ('-' = stdin).
+
+    One query per line. Blank lines and lines starting with '#' are
+    skipped, and repeated queries are searched once.
+    """
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, 'r', encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    queries = []
+    for line in lines:
+        query = line.strip().replace("'", "")
+        if query and not query.startswith('#') and query not in queries:
+            queries.append(query)
+    return queries
+
+
+def main(args, sites):
+    """Batch execution begins here."""
+    batch = Batch([], sites, args.limit)
+    if not batch.file_exists():
+        print("\nConfig file not configured. Configure to continue. Read docs for more info.")
+        print("Config file either does not exist or is not enabled! Exiting!\n")
+        batch.logger.error("Config file not configured! Terminating.")
+        sys.exit(2)
+    if args.limit <= 0 or args.limit > 50:
+        batch.logger.debug("Invalid page_limit entered: %d" % (args.limit))
+        print("Enter valid page input [0<p<=50]")
+        sys.exit(2)
+    try:
+        batch.queries = read_queries(args.batch)
+    except OSError as e:
+        batch.logger.exception(e)
+        print("Unable to read queries: {}".format(e))
+        sys.exit(2)
+    if not batch.queries:
+        print("No queries found in {}".format(args.batch))
+        sys.exit(2)
+    # Output of modules is dropped; progress is reported on stderr.
+    json_output.enable(quiet=True)
+    try:
+        batch.run()
+    except KeyboardInterrupt as e:
+        batch.logger.exception(e)
+        batch.report("\nAborted!")
+        sys.exit(2)
+    sys.exit(2 if batch.failed else 0)
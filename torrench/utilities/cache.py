@@ -0,0 +1,70 @@
+"""
+Cache Module.
+
+Small JSON files kept in the torrench cache directory
+($XDG_CACHE_HOME/torrench, fallback ~/.cache/torrench).
+Used to remember things (proxy health, ...) between runs.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+
+import torrench.utilities.settings as settings
+
+logger = logging.getLogger('log1')
+
+
+class JsonStore:
+    """
+    JsonStore class.
+
+    A dict stored as JSON file in the cache directory.
+    Reads/writes are serialised with a lock, and the file is
+    replaced atomically, so a crash never leaves a half-written file.
+    """
+
+    def __init__(self, name):
+        """Initialisations."""
+        self.name = name
+        self.lock = threading.RLock()
+
+    @property
+    def path(self):
+        """Full path of the file (cache dir may be changed at runtime)."""
+        return os.path.join(settings.cache_dir, self.name)
+
+    def load(self):
+        """Return stored dict (empty dict if file is missing/corrupt)."""
+        with self.lock:
+            try:
+                with open(self.path, 'r', encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logger.debug("Unable to read %s: %s" % (self.path, e))
+            return {}
+
+    def save(self, data):
+        """Write `data` to file."""
+        with self.lock:
+            try:
+                os.makedirs(settings.cache_dir, exist_ok=True)
+                fd, temp = tempfile.mkstemp(dir=settings.cache_dir, prefix=self.name, suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(temp, self.path)
+            except OSError as e:
+                logger.debug("Unable to write %s: %s" % (self.path, e))
+
+    def update(self, func):
+        """Load the dict, apply `func(data)` to it and save it."""
+        with self.lock:
+            data = self.load()
+            func(data)
+            self.save(data)
+            return data
@@ -2,8 +2,16 @@ import importlib
 import logging
 import sys
 import time
+from concurrent.futures import FIRST_COMPLETED, wait
 
+import torrench.utilities.json_output as json_output
+import torrench.utilities.pager as pager
+import torrench.utilities.settings as settings
+import torrench.utilities.sort_filter as sort_filter
 from torrench.utilities.Config import Config
+from torrench.utilities.daemon_pool import DaemonPool
+from torrench.utilities.result import info_hash
+from torrench.utilities.stream_table import StreamTable
 
 
 class CrossSite(Config):
@@ -12,14 +20,21 @@ class CrossSite(Config):
         self.title = title
         self.pages = page_limit
         self.logger = logging.getLogger('log1')
-        self.masterlist = []
-        self.mapper = []
         self.total_time = 0
         self.headers = ["NAME (UPLOADER)", "INDEX", "SIZE", "SE/LE", "UPLOADED"]
         self.api_sites = ['rarbg', 'xbit']
         self.class_list = []
         self.class_name = None
         self.args = None
+        # Table printed site by site, as sites finish (see start_stream())
+        self.table = None
+        # Merged results are de-duplicated on info-hash (see dedup_results()),
+        # unless CROSS_SITE_DEDUP = 0. 'self.hashes' is {info-hash: result}.
+        self.dedup = settings.get_bool('CROSS_SITE_DEDUP', True)
+        self.hashes = {}
+        self.merged = 0
+        # Results already printed (streamed), that got merged with results of later sites
+        self.updated = {}
         self.valid_args = [
                         'sorted',
                         'no_merge',
@@ -34,6 +49,100 @@ class CrossSite(Config):
                         'limetorrents'
                         ]
     
+    def fetch_site(self, site, index=0):
+        """
+        Fetch results of one site.
+
+        The site's module is imported, proxy is checked (if the module
+        needs one) and results are fetched and parsed.
+        `index` is the index the site's results start from.
+        Returns the module object.
+        """
+        module = importlib.import_module("torrench.modules.{}".format(site))
+        module_obj = module.cross_site(self.title, self.pages)
+        self.logger.debug("Using module {}".format(module_obj.class_name))
+        module_obj.index = index
+        module_obj.json_fields = self.json_fields
+        # Results of sites are printed by CrossSite (merged table)
+        module_obj.stream_output = False
+        try:
+            module_obj.check_proxy()
+            self.logger.debug("check_proxy() complete.")
+        except AttributeError as e:
+            self.logger.debug("check_proxy() not present. Skipping.")
+            pass
+        if module_obj.class_name in self.api_sites:
+            self.logger.debug("Site is one of API sites. Starting search_torrent()")
+            module_obj.search_torrent()
+        else:
+            self.logger.debug("Starting get_html() and parse_html()")
+            module_obj.get_html()
+            module_obj.parse_html()
+        if json_output.enabled:
+            module_obj.emit_results()
+        return module_obj
+
+    def add_site_results(self, module_obj, site_results):
+        """Add results of a fetched site to `site_results` (list of results of every site)."""
+        self.class_name = module_obj.class_name
+        self.class_list.append(self.class_name)
+        results = module_obj.results
+        if self.dedup and not self.args.no_merge:
+            results = self.dedup_results(results)
+        site_results.append(results)
+        if len(module_obj.results) == 0:
+            print("(no results)")
+        elif len(results) < len(module_obj.results):
+            print("({} results, {} found on other sites)".format(len(module_obj.results), len(module_obj.results) - len(results)))
+        else:
+            print("({} results)".format(len(results)))
+        if self.table is not None and results:
+            self.table.print_rows([self.display_row(result) for result in results], header=True)
+
+    def dedup_results(self, results):
+        """
+        Results (of a site) not already merged.
+
+        Torrents already found on another site (same info-hash of magnet)
+        are merged into that result (see TorrentResult.merge()) and dropped.
+        Results left are indexed after results merged so far.
+        1337x/LimeTorrents results (magnets are on torrent pages) are always kept.
+        """
+        unique = []
+        for result in results:
+            btih = info_hash(result.magnet)
+            if btih is not None:
+                if btih in self.hashes:
+                    self.hashes[btih].merge(result)
+                    if self.table is not None:
+                        self.updated[id(self.hashes[btih])] = self.hashes[btih]
+                    continue
+                self.hashes[btih] = result
+            self.merged += 1
+            result.index = self.merged
+            unique.append(result)
+        return unique
+
+    def display_row(self, result):
+        """Row of output table for `result` (with sites, if found on more than one)."""
+        row = Config.display_row(self, result)
+        if result.sources is not None and len(result.sources) > 1:
+            row[0] = "{} [{}]".format(row[0], ", ".join(result.sources))
+        return row
+
+    def start_stream(self):
+        """
+        To print results of every site as soon as it finishes.
+
+        Only for merged, unsorted results (as the final table has
+        results in order of fetch), and unless STREAM_OUTPUT = 0 or --pager.
+        Printed results that later sites are merged into are printed
+        again, once all sites are fetched (see stage_two()).
+        """
+        if self.stream_output and not json_output.enabled and not pager.enabled \
+                and not self.args.no_merge and not self.args.sorted and not sort_filter.active():
+            self.table = StreamTable(self.headers, self.OS_WIN)
+
     def stage_one(self, sites):
         """
         Stage one of cross-site search
@@ -41,39 +150,19 @@ class CrossSite(Config):
         In this stage, the site to be used is selected,
         it's module is imported and results are fetched.
 
-        The `masterlist` consists of the final result.
-        And `mapper` to map results with corresponding torrent details (links, magnets)
+        The `site_results` consists of results (TorrentResult) of every site.
 
         Once results are fetched, stage_two() begins.
         """
         self.logger.debug("Stage one begins.")
+        self.start_stream()
         index = 0
-        masterlist = []
-        mapper = []
+        site_results = []
         for site in sites:
             site_name = self.colorify("red", "[{}]".format(site.upper()))
             print("\n{}\n".format(site_name))
             print("Obtaining proxies...")
-            module = importlib.import_module("torrench.modules.{}".format(site))
-            module_obj = module.cross_site(self.title, self.pages)
-            self.logger.debug("Using module {}".format(self.class_name))
-            self.class_name = module_obj.class_name
-            self.class_list.append(self.class_name)
-            self.class_name_color = self.colorify("red", self.class_name)
-            module_obj.index = index
-            try:
-                module_obj.check_proxy()
-                self.logger.debug("check_proxy() complete.")
-            except AttributeError as e:
-                self.logger.debug("check_proxy() not present. Skipping.")
-                pass
-            if self.class_name in self.api_sites:
-                self.logger.debug("Site is one of API sites. Starting search_torrent()")
-                module_obj.search_torrent()
-            else:
-                self.logger.debug("Starting get_html() and parse_html()")
-                module_obj.get_html()
-                module_obj.parse_html()
+            module_obj = self.fetch_site(site, index)
             if self.args.no_merge:
                 self.logger.debug("Not merging results into one table.")
                 index = 0
@@ -81,24 +170,98 @@ class CrossSite(Config):
                 self.logger.debug("Merging results into one table.")
                 index = module_obj.index
             self.total_time += module_obj.total_fetch_time
-            masterlist.append(module_obj.masterlist_crossite)
-            mapper.append(module_obj.mapper)
-            if len(module_obj.mapper) == 0:
-                print("(no results)")
-            else:
-                print("({} results)".format(len(module_obj.mapper)))
-            time.sleep(0.5)
+            self.add_site_results(module_obj, site_results)
+        self.stage_two_select(site_results)
+
+    def stage_one_parallel(self, sites):
+        """
+        Stage one of cross-site search (--parallel)
+
+        Same as stage_one(), except all sites are fetched concurrently.
+        Results are merged in the order sites finish.
+
+        A site taking longer than SITE_TIMEOUT seconds is dropped,
+        and no site is waited for after CROSS_SITE_DEADLINE seconds
+        (both set in config.ini).
+        """
+        self.logger.debug("Stage one (parallel) begins.")
+        self.start_stream()
+        workers = settings.get_int('CROSS_SITE_WORKERS', len(sites))
+        site_timeout = settings.get_float('SITE_TIMEOUT', 60)
+        start_time = time.time()
+        deadline = start_time + settings.get_float('CROSS_SITE_DEADLINE', 120)
+        started = {}
+        index = 0
+        site_results = []
+
+        def run(site):
+            started[site] = time.time()
+            return self.fetch_site(site)
+
+        print("Fetching from {} sites...\n".format(len(sites)))
+        # Sites dropped (timeout, deadline) are left running in daemon threads (see daemon_pool.py)
+        executor = DaemonPool(max_workers=max(1, workers))
+        futures = {executor.submit(run, site): site for site in sites}
+        pending = set(futures)
+        while pending:
+            now = time.time()
+            for future in list(pending):
+                site = futures[future]
+                if site in started and now - started[site] > site_timeout:
+                    self.logger.debug("[{}] timed out after {} sec".format(site, site_timeout))
+                    print("\n{} (timed out)".format(self.colorify("red", "[{}]".format(site.upper()))))
+                    pending.discard(future)
+            if now >= deadline:
+                for future in pending:
+                    future.cancel()
+                    self.logger.debug("[{}] dropped (deadline)".format(futures[future]))
+                    print("\n{} (deadline reached)".format(self.colorify("red", "[{}]".format(futures[future].upper()))))
+                break
+            if not pending:
+                break
+            # Wake up at the next site timeout or the deadline, whichever comes first.
+            expiries = [started[futures[f]] + site_timeout for f in pending if futures[f] in started]
+            wake = min(expiries + [deadline]) - now
+            done, pending = wait(pending, timeout=max(wake, 0.05), return_when=FIRST_COMPLETED)
+            for future in done:
+                site = futures[future]
+                site_name = self.colorify("red", "[{}]".format(site.upper()))
+                try:
+                    module_obj = future.result()
+                except (SystemExit, Exception) as e:
+                    self.logger.exception(e)
+                    print("\n{} (failed. See logs for details)".format(site_name))
+                    continue
+                # Sites start indexing from 0; shift indices to follow already merged results.
+                if not self.args.no_merge:
+                    for result in module_obj.results:
+                        result.index += index
+                    index += len(module_obj.results)
+                print("\n{}".format(site_name))
+                self.add_site_results(module_obj, site_results)
+        executor.shutdown()
+        self.total_time = time.time() - start_time
+        self.stage_two_select(site_results)
+
+    def stage_two_select(self, site_results):
+        """
+        Begin stage two (merged or not merged).
+
+        With --json, results are already printed (by each site). Nothing to select.
+        """
+        if json_output.enabled:
+            sys.exit(0)
         if self.args.no_merge:
-            self.stage_two_no_merge(masterlist, mapper)
+            self.stage_two_no_merge(site_results)
         else:
-            self.stage_two(masterlist, mapper)
-    
-    def stage_two_no_merge(self, mlist, mapper):
+            self.stage_two(site_results)
+
+    def stage_two_no_merge(self, site_results):
         """
         Stage two (No merge)
 
         Stage tow begins once results are fetched.
-        The `mlist` is the masterlist and `mapper` is mapper.
+        `site_results` are results of every site.
 
         `No merge` means the results are not merged into one table.
 
@@ -111,24 +274,17 @@ class CrossSite(Config):
         Needs fix.
         """
         self.logger.debug("In stage_two_no_merge() method")
-        index_no_merge = 0
-        temp = 0
-        mapper_no_merge = []
-        
-        # Show output results and map mlist, mapper and self.class_name with self.class_name index.
+        # (results, site) of sites with results
+        sites = [(results, site) for results, site in zip(site_results, self.class_list) if results]
+
+        # Show output results of every site.
         self.logger.debug("Displaying output tables")
-        for i, j, k in zip(mlist, mapper, self.class_list):
-            mapper_no_merge.insert(index_no_merge, (i, j, k))
-            self.masterlist = mapper_no_merge[temp][0]
-            if self.masterlist == []:
-                del mapper_no_merge[index_no_merge]
-                pass
-            else:
-                self.colorify_seeds_leeches()
-                self.show_output()
-                temp += 1
-                index_no_merge += 1
-        if self.masterlist == []:
+        if sort_filter.active():
+            sites = [(sort_filter.order(results), site) for results, site in sites]
+        for results, site in sites:
+            self.results = results
+            self.show_output()
+        if not sites:
             print("\nNo results found for given input!")
             self.logger.debug("No results found for given input! Exiting!")
             sys.exit(2)
@@ -136,20 +292,19 @@ class CrossSite(Config):
         while True:
             try:
                 print()
-                for i, j in zip(range(len(mapper_no_merge)), mapper_no_merge):
-                    print("[{}] {}".format(i+1, j[2].upper()))
+                for i, (results, site) in enumerate(sites):
+                    print("[{}] {}".format(i+1, site.upper()))
                 self.logger.debug("Selecting site")
                 opt = int(input("\nSelect Site > "))
                 self.logger.debug("Option entered: {}".format(opt))
                 if opt > 0:
-                    self.masterlist = mapper_no_merge[opt-1][0]
-                    self.mapper = mapper_no_merge[opt-1][1]
+                    self.results, site_name = sites[opt-1]
                     self.show_output()
-                    site_name = mapper_no_merge[opt-1][2]
+                    self.prefetch_magnets()
                     print("\n[{}]\n".format(site_name.upper()))
                     self.logger.debug("Selected site [{}]: {}".format(opt, site_name))
                     while True:
-                        index = self.select_index(len(self.mapper))
+                        index = self.select_index(len(self.results))
                         self.logger.debug("Got index: {}".format(index))
                         if index == 0:
                             continue
@@ -162,12 +317,12 @@ class CrossSite(Config):
                 print("Bad Input")
                 continue
 
-    def stage_two(self, mlist, mapper):
+    def stage_two(self, site_results):
         """
         Stage two (Merge) (default)
 
         Stage tow begins once results are fetched.
-        The `mlist` is the masterlist and `mapper` is mapper.
+        `site_results` are results of every site.
 
         `Merge` means the results from multiple sites are merged into one table.
         This is the default method of showing results.
@@ -181,36 +336,23 @@ class CrossSite(Config):
         To sort results, use --sort argument. Results are sorted on basis of seeds.
         """
         self.logger.debug("In stage_two() method")
-        self.logger.debug("Merging `masterlist` and `mapper`")
-        for i, j in zip(mlist, mapper):
-            self.masterlist += i
-            self.mapper += j
-        self.logger.debug("Merge complete.")
-        if self.masterlist == []:
+        self.merge_results(site_results, self.args.sorted)
+        if self.results == []:
             print("\nNo results found for given input!")
             self.logger.debug("No results found for given input! Exiting!")
             sys.exit(2)
-        if self.args.sorted:
-            try:
-                self.masterlist.sort(key=lambda x: int(x[3].split('/')[0]), reverse=True)
-                temp_mapper = []
-                index = 1
-                for i in range(len(self.masterlist)):
-                    temp = self.masterlist[i][1]
-                    temp_mapper.insert(index, self.mapper[temp-1])
-                    self.masterlist[i][1] = index
-                    index += 1
-                self.mapper = temp_mapper
-            except Exception as e:
-                print("Something went wrong! See logs for details.")
-                self.logger.debug(e)
-                sys.exit(2)
-        self.colorify_seeds_leeches()
-        self.show_output()
-        print("\nTotal {} torrents in {:.2f} sec.\n".format(len(self.masterlist), self.total_time))
-        self.logger.debug("\nTotal {} torrents in {:.2f} sec.\n".format(len(self.masterlist), self.total_time))
+        if self.table is None:
+            self.show_output()
+        elif self.updated:
+            # Printed before later sites were merged into them: show them again, as merged.
+            updated = sorted(self.updated.values(), key=lambda result: result.index)
+            print("\nAlso found on later sites (best seeds/leeches of all sites):")
+            self.table.print_rows([self.display_row(result) for result in updated], header=True)
+        self.prefetch_magnets()
+        print("\nTotal {} torrents in {:.2f} sec.\n".format(len(self.results), self.total_time))
+        self.logger.debug("\nTotal {} torrents in {:.2f} sec.\n".format(len(self.results), self.total_time))
         while True:
-            ind = self.select_index(len(self.mapper))
+            ind = self.select_index(len(self.results))
             self.logger.debug("Got index: {}".format(ind))
             if ind == 0:
                 continue
@@ -219,25 +361,28 @@ class CrossSite(Config):
             else:
                 self.select_option(ind)
 
-    def colorify_seeds_leeches(self):
+    def merge_results(self, site_results, sort=False):
         """
-        Colorify seeds/leeches
+        Merge results of all sites into self.results.
 
-        By default teh seeds and leeches are integers.
-        This function colorifies them and add them to masterlist
+        With `sort`, results are sorted on basis of seeds (unless --sort is given).
+        Results are sorted/filtered (and re-indexed) with sort_filter.py.
         """
-        for i in range(len(self.masterlist)):
-            seeds = str(self.masterlist[i][3].split('/')[0])
-            leeches = str(self.masterlist[i][3].split('/')[1])
-            if seeds == '-1':
-                seeds = 'NA'
-            if leeches == '-1':
-                leeches = 'NA'
-            leeches = self.colorify("red", leeches)
-            seeds = self.colorify("green", seeds)
-            final = seeds+'/'+leeches
-            self.masterlist[i][3] = final
-
+        self.logger.debug("Merging results")
+        for results in site_results:
+            self.results += results
+        self.logger.debug("Merge complete.")
+        if (sort or sort_filter.active()) and self.results != []:
+            try:
+                keys = sort_filter.sort_keys or (sort_filter.DEFAULT_SORT if sort else [])
+                fetched = len(self.results)
+                self.results = sort_filter.order(self.results, keys)
+                if len(self.results) < fetched:
+                    print("\n{} of {} torrents match filters".format(len(self.results), fetched))
+            except Exception as e:
+                print("Something went wrong! See logs for details.")
+                self.logger.debug(e)
+                sys.exit(2)
 
 def main(args):
     """Cross-site execution begins here"""
@@ -266,14 +411,24 @@ def main(args):
             arguments.remove('no_merge')
         if 'sorted' in arguments:
             arguments.remove('sorted')
+        if 'parallel' in arguments:
+            arguments.remove('parallel')
+        if 'json' in arguments:
+            arguments.remove('json')
+        if 'pager' in arguments:
+            arguments.remove('pager')
         for arg in arguments:
             if arg not in cs.valid_args:
                 print("`{}` argument is not allowed.".format(arg))
                 cs.logger.debug("`--{}` argument is not allowed. Removed it.".format(arg))
                 arguments.remove(arg)
         cs.logger.debug("Stripped arguments: {}".format(arguments))
-        cs.logger.debug("starting stage_one().")
-        cs.stage_one(arguments)
+        if args.parallel:
+            cs.logger.debug("starting stage_one_parallel().")
+            cs.stage_one_parallel(arguments)
+        else:
+            cs.logger.debug("starting stage_one().")
+            cs.stage_one(arguments)
     except KeyboardInterrupt as e:
         cs.logger.exception(e)
         print("\nAborted!")
@@ -0,0 +1,67 @@
+"""
+Daemon Pool Module.
+
+DaemonPool runs functions in worker threads, like ThreadPoolExecutor
+(submit() returns a concurrent.futures.Future), but its workers are daemon
+threads. Python waits for ThreadPoolExecutor threads at exit, so work left
+running (eg. a site dropped by SITE_TIMEOUT or CROSS_SITE_DEADLINE, or a
+proxy test that lost the race) would keep torrench from exiting until it
+is done. Work left running in a DaemonPool is dropped at exit.
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class DaemonPool:
+    """
+    DaemonPool class.
+
+    Runs submitted functions, at most `max_workers` at a time.
+    """
+
+    def __init__(self, max_workers):
+        """Initialisations."""
+        self.max_workers = max(1, max_workers)
+        self.queue = queue.Queue()
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def work(self):
+        """Worker thread: run queued functions (until shutdown())."""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            future, func, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                # (SystemExit of modules included)
+                future.set_exception(e)
+
+    def submit(self, func, *args):
+        """Run func(*args) in a worker thread. Returns its Future."""
+        future = Future()
+        self.queue.put((future, func, args))
+        with self.lock:
+            if len(self.threads) < self.max_workers:
+                thread = threading.Thread(target=self.work, daemon=True)
+                thread.start()
+                self.threads.append(thread)
+        return future
+
+    def shutdown(self):
+        """Cancel functions not started yet. Running ones are not waited for."""
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[0].cancel()
+        with self.lock:
+            for _ in self.threads:
+                self.queue.put(None)
@@ -0,0 +1,263 @@
+"""
+Extractors Module.
+
+lxml (XPath) counterparts of the BeautifulSoup parsing done in
+parse_html() of site modules. Used when PARSER = lxml (config.ini).
+
+Each extractor takes a page parsed with lxml.html and the proxy in use,
+and returns result rows (tuples of strings) in the same layout as
+extract_bs4() of the corresponding module, so the module
+builds its output the same way for both parsers.
+
+All XPath expressions are compiled once, when the module is imported.
+"""
+import logging
+
+import lxml.html
+from lxml import etree
+
+logger = logging.getLogger('log1')
+
+
+def _cls(name):
+    """XPath predicate matching elements having class `name` (like BS4 class_=)."""
+    return "contains(concat(' ', normalize-space(@class), ' '), ' %s ')" % (name)
+
+
+def string(element):
+    """Same as BS4 `tag.string` (None if element does not have exactly one string)."""
+    if element is None:
+        return None
+    if len(element) == 0:
+        return element.text
+    if len(element) == 1 and not element.text and not element[0].tail:
+        return string(element[0])
+    return None
+
+
+def texts(element):
+    """Same as BS4 `tag.findAll(text=True)`."""
+    return element.xpath('.//text()')
+
+
+def parse(content):
+    """Parse page `content` (bytes) with lxml."""
+    if not content or not content.strip():
+        content = b"<html></html>"
+    return lxml.html.fromstring(content)
+
+
+# The Pirate Bay
+TPB_TABLE = etree.XPath("boolean(//table[@id='searchResult'])")
+TPB_ROWS = etree.XPath("(//table[@id='searchResult'])[1]//tr")
+TPB_NAME = etree.XPath(".//a[%s]" % _cls('detLink'))
+TPB_DESC = etree.XPath(".//font[%s]" % _cls('detDesc'))
+TPB_CATEG = etree.XPath("(.//td[%s])[1]//a" % _cls('vertTh'))
+TPB_SE_LE = etree.XPath(".//td[@align='right']")
+TPB_VIP = etree.XPath("boolean(.//img[@title='VIP'])")
+TPB_TRUSTED = etree.XPath("boolean(.//img[@title='Trusted'])")
+TPB_MAGNET = etree.XPath("(.//a[@title='Download this torrent using magnet'])[1]/@href")
+TPB_COMMENTS = etree.XPath("(.//img[@src=$src])[1]/@alt")
+
+
+def thepiratebay(doc, proxy):
+    """Extract TPB result rows."""
+    rows = []
+    comment_icon = '//%s/static/img/icon_comment.gif' % (proxy.split('/')[2])
+    for i in TPB_ROWS(doc)[1:]:
+        name_link = TPB_NAME(i)[0]
+        name = string(name_link)
+        if name is None:
+            name = " ".join(name_link.get('title').split(" ")[2:])
+        desc = TPB_DESC(i)[0]
+        uploader = desc.find('.//a')
+        if uploader is None:
+            uploader = string(desc.find('.//i'))
+        else:
+            uploader = string(uploader)
+        comments = TPB_COMMENTS(i, src=comment_icon)
+        comment = comments[0].split(" ")[-2] if comments else '0'
+        status = None
+        if TPB_VIP(i):
+            status = 'vip'
+        elif TPB_TRUSTED(i):
+            status = 'trusted'
+        categ = TPB_CATEG(i)
+        se_le = TPB_SE_LE(i)
+        desc_text = desc.text_content().split(' ')
+        torr_id = name_link.get('href').split('/')[2]
+        rows.append((
+            string(categ[0]), string(categ[1]), name, uploader, comment, status,
+            string(se_le[0]), string(se_le[1]),
+            desc_text[1].replace(',', ""), desc_text[3].replace(',', ""),
+            torr_id, TPB_MAGNET(i)[0]))
+    return rows
+
+
+# 1337x
+X1337_TABLE = etree.XPath("boolean(//table[%s])" % _cls('table-list'))
+X1337_ROWS = etree.XPath("(//table[%s])[1]//tr" % _cls('table-list'))
+X1337_CATEG = etree.XPath("((.//a)[1]//i)[1]/@class")
+
+
+def x1337(doc, proxy):
+    """Extract 1337x result rows."""
+    rows = []
+    for result in X1337_ROWS(doc)[1:]:
+        content = result.findall('.//td')
+        name_texts = texts(content[0])
+        if len(name_texts) == 2:
+            name, comments = name_texts
+        else:
+            name = name_texts[0]
+            comments = 0
+        link = content[0].findall('.//a')[1].get('href')
+        category = X1337_CATEG(content[0])[0].split()[0].split('-')[1].title()
+        rows.append((
+            name, comments, proxy + link, category,
+            string(content[1]), string(content[2]), string(content[3]),
+            texts(content[4])[0], string(content[5]), content[5].get('class').split()[1]))
+    return rows
+
+
+# Nyaa
+NYAA_RESULTS = etree.XPath("boolean(//tr[%s or %s])" % (_cls('success'), _cls('default')))
+NYAA_ROWS = etree.XPath("(//table[%s])[1]//tr" % _cls('torrent-list'))
+
+
+def nyaa(doc, proxy):
+    """Extract Nyaa result rows."""
+    rows = []
+    for result in NYAA_ROWS(doc)[1:]:
+        pre_data = result.findall('.//a')
+        data = result.findall('.//td')
+        rows.append((
+            string(pre_data[-3]), pre_data[-3].get('href'), pre_data[-1].get('href'),
+            string(data[3]), string(data[4]), string(data[5]), string(data[6]), string(data[7])))
+    return rows
+
+
+# LimeTorrents
+LIME_ROWS = etree.XPath("(//table[%s])[1]//tr" % _cls('table2'))
+
+
+def limetorrents(doc, proxy):
+    """Extract LimeTorrents result rows."""
+    rows = []
+    for result in LIME_ROWS(doc)[1:]:
+        data = result.findall('.//td')
+        # try block is limetorrents-specific. Means only limetorrents requires this.
+        try:
+            link = data[0].findall('.//a')[1]
+            rows.append((
+                string(link), proxy + link.get('href'), string(data[1]).split('-')[0],
+                string(data[2]), string(data[3]).replace(',', ''), string(data[4]).replace(',', '')))
+        except Exception as e:
+            logger.exception(e)
+    return rows
+
+
+# KickassTorrents
+KAT_ROWS = etree.XPath("(//table[%s])[1]//tr[%s]" % (_cls('data'), _cls('odd')))
+KAT_NAME = etree.XPath("(.//a[%s])[1]" % _cls('cellMainLink'))
+KAT_DETAILS = etree.XPath("(.//span[%s])[1]" % _cls('lightgrey'))
+KAT_VERIFIED = etree.XPath("boolean(.//a[@title='Verified Torrent'])")
+KAT_COMMENTS = etree.XPath("(.//a[%s])[1]" % _cls('icommentjs'))
+KAT_MISC = etree.XPath(".//td[%s]" % _cls('center'))
+KAT_MAGNET = etree.XPath("(.//a[@title='Torrent magnet link'])[1]/@href")
+
+
+def kickasstorrent(doc, proxy):
+    """Extract KAT result rows."""
+    rows = []
+    for i in KAT_ROWS(doc):
+        name_link = KAT_NAME(i)[0]
+        name = string(name_link)
+        if name is None:
+            name = name_link.text_content().split("[[")[0]
+        details = KAT_DETAILS(i)[0].text_content().split(" ")
+        verified = KAT_VERIFIED(i)
+        comment_count = 0
+        if verified:
+            comment_count = KAT_COMMENTS(i)[0].text_content()
+        misc_details = KAT_MISC(i)
+        rows.append((
+            name, proxy + name_link.get('href'), details[-4], details[-2], verified, comment_count,
+            string(misc_details[0]), string(misc_details[1]), string(misc_details[2]),
+            string(misc_details[3]), KAT_MAGNET(i)[0]))
+    return rows
+
+
+# Idope
+IDOPE_RESULTS = etree.XPath("//div[%s]" % _cls('resultdiv'))
+IDOPE_TRACKERS = etree.XPath("(//input[@id='hidetrack'])[1]/@value")
+IDOPE_NAME = etree.XPath("((.//a)[1]//div)[1]")
+IDOPE_DETAILS = etree.XPath("(.//div[%s])[1]" % _cls('resultdivbotton'))
+
+
+def idope(doc, proxy):
+    """Extract Idope result rows."""
+    rows = []
+    results = IDOPE_RESULTS(doc)
+    if results == []:
+        return rows
+    trackers = IDOPE_TRACKERS(doc)[0]
+    for result in results:
+        name = " ".join(string(IDOPE_NAME(result)[0]).split())
+        r = IDOPE_DETAILS(result)[0].text_content().split()
+        rows.append((
+            name, proxy + result.find('.//a').get('href'),
+            "{} {}".format(r[2], r[3]), "{} {}".format(r[5], r[6]), r[8], r[11], trackers))
+    return rows
+
+
+# SkyTorrents
+SKY_ROWS = etree.XPath("//tr")
+
+
+def skytorrents(doc, proxy):
+    """Extract SkyTorrents result rows."""
+    rows = []
+    for data in SKY_ROWS(doc)[1:]:
+        results = data.findall('.//td')
+        links = results[0].findall('.//a')
+        # Votes are separated by &nbsp; in name cell.
+        votes = lxml.html.tostring(results[0], encoding='unicode', with_tail=False).split("\xa0")
+        upvotes = '0'
+        downvotes = '0'
+        if len(votes) > 1:
+            upvotes = votes[1].replace(" ", "").split("<")[0]
+        if len(votes) > 2:
+            downvotes = votes[2].replace(" ", "").split("<")[0]
+        rows.append((
+            string(links[0]), upvotes, downvotes, links[0].get('href'), links[1].get('href'),
+            string(results[1]), string(results[3]), string(results[4]), string(results[5])))
+    return rows
+
+
+EXTRACTORS = {
+    'thepiratebay': thepiratebay,
+    'x1337': x1337,
+    'nyaa': nyaa,
+    'limetorrents': limetorrents,
+    'kickasstorrents': kickasstorrent,
+    'idope': idope,
+    'skytorrents': skytorrents,
+}
+
+RESULT_CHECKS = {
+    'thepiratebay': TPB_TABLE,
+    'x1337': X1337_TABLE,
+    'nyaa': NYAA_RESULTS,
+}
+
+
+def extract(site, doc, proxy):
+    """Extract result rows of `site` from `doc`."""
+    return EXTRACTORS[site](doc, proxy)
+
+
+def has_results(site, doc):
+    """Check if `doc` has results (for sites that show a 'no results' page)."""
+    check = RESULT_CHECKS.get(site)
+    return check is None or bool(check(doc))
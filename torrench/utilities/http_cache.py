@@ -0,0 +1,215 @@
+"""
+HTTP Cache Module.
+
+Responses of pages fetched with Common.http_request()/http_request_time()
+(DistroWatch, LinuxTracker, torrent pages, ...) are kept on disk
+($XDG_CACHE_HOME/torrench/http/, gzip-compressed) with their
+ETag/Last-Modified headers.
+
+    - A response is reused without a request while it is fresh
+      (Cache-Control: max-age, or Expires).
+    - Otherwise it is revalidated with a conditional GET
+      (If-None-Match/If-Modified-Since). On '304 Not Modified'
+      the stored body is used.
+    - Responses with Cache-Control: no-store (or without ETag,
+      Last-Modified and max-age) are not stored.
+
+Set HTTP_CACHE = 0 (config.ini) to disable. HTTP_CACHE_SIZE (MiB, default 50)
+limits the disk used; least recently used responses are removed first
+(checked every EVICT_EVERY writes, so the directory is not scanned on every write).
+"""
+import email.utils
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import torrench.utilities.session as session
+import torrench.utilities.settings as settings
+
+logger = logging.getLogger('log1')
+
+EVICT_EVERY = 50
+
+# Response headers kept with body
+KEPT_HEADERS = ('ETag', 'Last-Modified', 'Content-Type', 'Cache-Control', 'Expires', 'Date')
+
+_lock = threading.Lock()
+_writes = 0
+
+
+def cache_dir():
+    """Directory of stored responses."""
+    return os.path.join(settings.cache_dir, 'http')
+
+
+def _path(url):
+    return os.path.join(cache_dir(), hashlib.sha1(url.encode('utf-8')).hexdigest() + '.gz')
+
+
+def _directives(headers):
+    """Cache-Control directives of `headers` (dict of name: value or True)."""
+    directives = {}
+    for part in headers.get('Cache-Control', '').split(','):
+        name, _, value = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip('"') if value else True
+    return directives
+
+
+def _parse_date(value):
+    """Timestamp of HTTP date `value`, or None."""
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def fresh_for(headers):
+    """Seconds a response with `headers` may be used without revalidation."""
+    directives = _directives(headers)
+    if 'no-cache' in directives:
+        return 0
+    for name in ('s-maxage', 'max-age'):
+        if name in directives:
+            try:
+                return max(0, int(directives[name]))
+            except (TypeError, ValueError):
+                return 0
+    expires = _parse_date(headers.get('Expires'))
+    if expires is not None:
+        date = _parse_date(headers.get('Date')) or time.time()
+        return max(0, expires - date)
+    return 0
+
+
+def storable(response):
+    """Check if `response` may (and is worth to) be stored."""
+    if response.status_code != 200:
+        return False
+    directives = _directives(response.headers)
+    if 'no-store' in directives or 'private' in directives:
+        return False
+    if response.headers.get('Vary', '').strip() == '*':
+        return False
+    return bool(response.headers.get('ETag') or response.headers.get('Last-Modified') or fresh_for(response.headers))
+
+
+def load(url):
+    """Stored (meta, body) of `url`, or None."""
+    path = _path(url)
+    try:
+        with gzip.open(path, 'rb') as f:
+            meta = json.loads(f.readline().decode('utf-8'))
+            body = f.read()
+        if meta.get('url') != url:
+            return None
+        # Last use decides what is evicted.
+        os.utime(path)
+        return meta, body
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError) as e:
+        logger.debug("Unable to read cached response %s: %s" % (path, e))
+        return None
+
+
+def store(url, meta, body):
+    """Store response (`meta`, `body`) of `url`."""
+    global _writes
+    directory = cache_dir()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6) as f:
+            f.write(json.dumps(meta).encode('utf-8') + b"\n")
+            f.write(body)
+        os.replace(temp, _path(url))
+        with _lock:
+            _writes += 1
+            due = _writes % EVICT_EVERY == 1
+        if due:
+            evict(directory)
+    except OSError as e:
+        logger.debug("Unable to cache response of %s: %s" % (url, e))
+
+
+def evict(directory):
+    """Remove least recently used responses once HTTP_CACHE_SIZE MiB are used."""
+    limit = settings.get_float('HTTP_CACHE_SIZE', 50) * 1024 * 1024
+    files = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith('.gz'):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def make_response(url, meta, body):
+    """requests.Response of stored response."""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.headers = CaseInsensitiveDict(meta.get('headers', {}))
+    response._content = body
+    match = re.search(r'charset=([\w-]+)', response.headers.get('Content-Type', ''))
+    response.encoding = match.group(1) if match else None
+    return response
+
+
+def get(url, **kwargs):
+    """
+    requests.get() (through shared session), using stored response of `url`
+    if it is fresh or not modified.
+    """
+    if not settings.get_bool('HTTP_CACHE', True):
+        return session.get(url, **kwargs)
+    cached = load(url)
+    headers = dict(kwargs.pop('headers', None) or {})
+    if cached is not None:
+        meta, body = cached
+        age = time.time() - meta.get('stored', 0)
+        if 0 <= age < meta.get('fresh_for', 0):
+            logger.debug("HTTP cache: using fresh response of %s (age: %d sec)" % (url, age))
+            return make_response(url, meta, body)
+        if meta['headers'].get('ETag'):
+            headers['If-None-Match'] = meta['headers']['ETag']
+        if meta['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+    response = session.get(url, headers=headers, **kwargs)
+    if cached is not None and response.status_code == 304:
+        logger.debug("HTTP cache: %s not modified" % (url))
+        meta, body = cached
+        # Headers of 304 replace stored ones (RFC 7234, 4.3.4)
+        for name in KEPT_HEADERS:
+            if name in response.headers:
+                meta['headers'][name] = response.headers[name]
+        meta['stored'] = time.time()
+        meta['fresh_for'] = fresh_for(meta['headers'])
+        store(url, meta, body)
+        return make_response(url, meta, body)
+    if storable(response):
+        meta = {
+            'url': url,
+            'stored': time.time(),
+            'fresh_for': fresh_for(response.headers),
+            'headers': {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+        }
+        store(url, meta, response.content)
+    return response
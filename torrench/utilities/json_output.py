@@ -0,0 +1,48 @@
+"""
+JSON Output Module.
+
+Machine output mode (--json). Results are printed to stdout as
+JSON lines (NDJSON), one record per torrent:
+
+    {"name": ..., "size": <bytes>, "seeds": ..., "leeches": ..., "date": ...,
+     "magnet": ..., "link": ..., "site": ...}
+
+Values not known (eg. leeches on Idope, magnet on 1337x/LimeTorrents,
+whose magnets are on torrent pages) are null.
+
+Records are printed as soon as the page they are on is parsed.
+Everything else torrench prints goes to stderr, and no prompts are shown.
+"""
+import json
+import os
+import sys
+import threading
+
+enabled = False
+_out = None
+_lock = threading.Lock()
+
+
+def enable(quiet=False):
+    """
+    Enable machine output. stdout is kept for records;
+    other output goes to stderr (or nowhere, if `quiet`).
+    """
+    global enabled, _out
+    if not enabled:
+        _out = sys.stdout
+        sys.stdout = open(os.devnull, 'w') if quiet else sys.stderr
+        enabled = True
+
+
+def record(result):
+    """Make record of a torrent (TorrentResult, see result.py)."""
+    return result.record()
+
+
+def emit(rec):
+    """Print a record (thread-safe)."""
+    line = json.dumps(rec, ensure_ascii=False)
+    with _lock:
+        _out.write(line + "\n")
+        _out.flush()
@@ -0,0 +1,318 @@
+"""
+Magnets Module.
+
+Magnetic links of 1337x/LimeTorrents results are not in search results,
+but on torrent pages (one page per torrent). MagnetResolver fetches
+them in background threads:
+
+    - prefetch() starts fetching magnets of the MAGNET_PREFETCH (config.ini,
+      default 10) results with most seeds, while results are shown.
+      Selecting one of them then needs no page fetch (see Common.get_links()).
+    - resolve_all() fetches magnets of all given results (eg. for scripts).
+    - resolve_records() does the same for records (as printed by --json)
+      of any site; used by --resolve and POST /magnets (see server.py).
+
+MAGNET_WORKERS (default 4) pages are fetched at a time, at most
+MAGNET_HOST_WORKERS (default 2) of them from the same host, within the
+rate limit of the site (see rate_limit.py). Fetched magnets are kept in
+results (TorrentResult.magnet). Torrent pages go through the HTTP cache
+(see http_cache.py).
+"""
+import json
+import logging
+import queue
+import sys
+import threading
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+import torrench.utilities.http_cache as http_cache
+import torrench.utilities.json_output as json_output
+import torrench.utilities.rate_limit as rate_limit
+import torrench.utilities.settings as settings
+from torrench.utilities.result import TorrentResult
+
+logger = logging.getLogger('log1')
+
+# Sites whose magnets are on torrent pages
+EXTERNAL_SITES = ('x1337', 'limetorrents')
+# Names of sites in config.ini (eg. 1337X_URL)
+CONFIG_NAMES = {'x1337': '1337x', 'limetorrents': 'limetorrents'}
+
+
+def _has_class(name):
+    """Match elements having CSS class `name` (see Common.class_matcher())."""
+    def match(value):
+        return value is not None and name in (value.split() if isinstance(value, str) else value)
+    return match
+
+
+# Part of torrent pages holding magnetic link (only this part is parsed)
+MAGNET_REGIONS = {
+    'x1337': SoupStrainer('ul', class_=_has_class('download-links-dontblock')),
+    'limetorrents': SoupStrainer('div', class_=_has_class('dltorrent')),
+}
+
+
+def parse_magnet(site, content):
+    """Magnetic link on torrent page `content` of `site`. Raises ValueError if none."""
+    soup = BeautifulSoup(content, 'lxml', parse_only=MAGNET_REGIONS[site])
+    for link in soup.find_all('a', href=True):
+        if link['href'].startswith('magnet:'):
+            return link['href']
+    raise ValueError("No magnetic link found")
+
+
+def fetch_magnet(site, link):
+    """Magnetic link of torrent page `link` of `site`."""
+    response = http_cache.get(link, timeout=15)
+    response.raise_for_status()
+    return parse_magnet(site, response.content)
+
+
+def site_hosts(site):
+    """Hosts of proxies of `site` (config.ini, and proxy lists). Empty if unknown."""
+    from torrench.utilities.Config import Config
+    try:
+        return set(rate_limit.host(proxy) for proxy in Config().get_proxies(CONFIG_NAMES[site]))
+    except Exception as e:
+        logger.debug("Unable to get proxies of %s: %s" % (site, e))
+        return set()
+
+
+def known_link(site, link, hosts=None):
+    """
+    Check if `link` is a page on a proxy of `site` (`hosts`: site_hosts(site)).
+    Links given by users (--resolve, server) are only fetched if they are.
+    """
+    if site not in EXTERNAL_SITES or not isinstance(link, str):
+        return False
+    if urlsplit(link).scheme not in ('http', 'https'):
+        return False
+    hosts = site_hosts(site) if hosts is None else hosts
+    return rate_limit.host(link) in hosts
+
+
+def needs_magnet(result):
+    """Check if magnet of `result` is to be fetched from its torrent page."""
+    return result.magnet is None and result.site in EXTERNAL_SITES and \
+        isinstance(result.link, str) and bool(result.link)
+
+
+def from_record(record):
+    """
+    TorrentResult of `record` (see json_output.py).
+    Values of wrong type (eg. link that is not text) are taken as missing.
+    """
+    def text(name):
+        value = record.get(name)
+        return value if isinstance(value, str) and value else None
+
+    def number(name):
+        value = record.get(name)
+        return value if isinstance(value, (int, float, str)) and not isinstance(value, bool) else None
+
+    result = TorrentResult(text('name'), number('size'), number('seeds'), number('leeches'),
+                           text('date'), magnet=text('magnet'), link=text('link'))
+    result.site = text('site')
+    return result
+
+
+class MagnetResolver:
+    """
+    MagnetResolver class.
+
+    Fetches magnets of results in (daemon) worker threads, so pending
+    fetches never keep torrench from exiting.
+    Only queued/running fetches are kept (self.futures); a result whose
+    fetch failed is fetched again when asked for again.
+    """
+
+    def __init__(self, workers=None):
+        """Initialisations."""
+        self.workers = max(1, workers or settings.get_int('MAGNET_WORKERS', 4))
+        self.queue = queue.Queue()
+        self.futures = {}
+        self.host_workers = max(1, settings.get_int('MAGNET_HOST_WORKERS', 2))
+        self.host_slots = {}
+        self.lock = threading.Lock()
+        self.threads = []
+
+    def start(self):
+        """Start worker threads (once)."""
+        if self.threads:
+            return
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self.work, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def host_slot(self, link):
+        """Semaphore limiting fetches from host of `link` (MAGNET_HOST_WORKERS)."""
+        host = urlsplit(link).netloc.lower()
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.host_workers)
+            return self.host_slots[host]
+
+    def work(self):
+        """Worker thread: fetch magnets of queued results."""
+        while True:
+            result, future = self.queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if result.magnet is None:
+                    with self.host_slot(result.link):
+                        result.magnet = fetch_magnet(result.site, result.link)
+                future.set_result(result.magnet)
+            except Exception as e:
+                logger.debug("Unable to fetch magnet of %s: %s" % (result.link, e))
+                future.set_exception(e)
+
+    def submit(self, result):
+        """Queue `result` (unless already queued). Returns its Future."""
+        with self.lock:
+            future = self.futures.get(result)
+            if future is None or future.done():
+                future = Future()
+                self.futures[result] = future
+                future.add_done_callback(lambda done: self.forget(result, done))
+                self.queue.put((result, future))
+        self.start()
+        return future
+
+    def forget(self, result, future):
+        """Drop finished `future` of `result` (its magnet, if any, is in result)."""
+        with self.lock:
+            if self.futures.get(result) is future:
+                del self.futures[result]
+
+    def prefetch(self, results, count=None):
+        """Start fetching magnets of (at most `count`) results with most seeds."""
+        count = settings.get_int('MAGNET_PREFETCH', 10) if count is None else count
+        wanted = [result for result in results if needs_magnet(result)]
+        wanted.sort(key=lambda result: -1 if result.seeds is None else result.seeds, reverse=True)
+        for result in wanted[:max(0, count)]:
+            self.submit(result)
+        if wanted[:count]:
+            logger.debug("Prefetching %d magnets" % (len(wanted[:count])))
+
+    def wait(self, result, timeout=15):
+        """Wait for magnet of `result`, if it is being fetched. Returns magnet or None."""
+        with self.lock:
+            future = self.futures.get(result)
+        if future is None:
+            return result.magnet
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            return None
+
+    def resolve_all(self, results, timeout=None):
+        """
+        Fetch magnets of all `results` (those already having one are skipped).
+        Returns [(result, error)] of results whose magnet could not be fetched.
+        """
+        futures = [(result, self.submit(result)) for result in results if needs_magnet(result)]
+        failed = []
+        for result, future in futures:
+            try:
+                future.result(timeout=timeout)
+            except Exception as e:
+                failed.append((result, e))
+        return failed
+
+    def resolve_records(self, records, timeout=None):
+        """
+        Magnets of `records` (see json_output.py), of any site.
+
+        Records having a magnet are kept as they are (no page is fetched).
+        Other links are only fetched if on a proxy of their site (see known_link()).
+        Returns (records with 'magnet' filled in, failures), failures
+        being [{'index', 'link', 'site', 'error'}] (index in `records`).
+        """
+        results = [from_record(record) for record in records]
+        hosts = {}
+        unknown = set()
+        for result in results:
+            if needs_magnet(result):
+                if result.site not in hosts:
+                    hosts[result.site] = site_hosts(result.site)
+                if not known_link(result.site, result.link, hosts[result.site]):
+                    unknown.add(id(result))
+        wanted = [result for result in results if id(result) not in unknown]
+        errors = dict((id(result), str(e)) for result, e in self.resolve_all(wanted, timeout))
+        resolved = []
+        failures = []
+        for index, (record, result) in enumerate(zip(records, results)):
+            record = dict(record, magnet=result.magnet)
+            resolved.append(record)
+            if result.magnet is not None:
+                continue
+            if id(result) in unknown:
+                error = "Link is not on a proxy of '{}'".format(result.site)
+            elif id(result) in errors:
+                error = errors[id(result)] or "Unable to fetch magnet"
+            elif result.site is None:
+                error = "No site (text) in record"
+            elif result.site not in EXTERNAL_SITES:
+                error = "No magnet in record (magnets of '{}' are part of search results)".format(result.site)
+            else:
+                error = "No torrent link (text) in record"
+            failures.append({'index': index, 'link': record.get('link'), 'site': record.get('site'), 'error': error})
+        return resolved, failures
+
+
+def read_records(source):
+    """
+    Read records (JSON lines, eg. --json output) from file `source` ('-' = stdin).
+    Blank lines are skipped. Raises ValueError on bad lines.
+    """
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, 'r', encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    records = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if not isinstance(record, dict):
+            raise ValueError("Line {}: JSON object (record) expected".format(number))
+        records.append(record)
+    return records
+
+
+def main(source):
+    """
+    Bulk resolution (--resolve FILE) begins here.
+
+    Records are printed back (JSON lines, in same order) with their
+    magnets. Failures are reported on stderr.
+    """
+    try:
+        records = read_records(source)
+    except (OSError, ValueError) as e:
+        logger.exception(e)
+        print("Unable to read records: {}".format(e))
+        sys.exit(2)
+    json_output.enable(quiet=True)
+    try:
+        resolved, failures = MagnetResolver().resolve_records(records)
+    except KeyboardInterrupt as e:
+        logger.exception(e)
+        sys.stderr.write("\nAborted!\n")
+        sys.exit(2)
+    for record in resolved:
+        json_output.emit(record)
+    for failure in failures:
+        sys.stderr.write("[{}] {}: {}\n".format(failure['index'] + 1, failure['link'], failure['error']))
+    sys.stderr.write("{} of {} magnets resolved.\n".format(len(records) - len(failures), len(records)))
+    sys.exit(2 if failures else 0)
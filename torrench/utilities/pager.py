@@ -0,0 +1,101 @@
+"""
+Pager Module.
+
+Result viewer (--pager). Instead of printing the whole result table
+(eg. ~3750 rows with -p 50 on nyaa), one screen of rows is printed at
+a time; only rows on screen are formatted.
+
+Keys (followed by Enter):
+    [Enter]/n  - Next screen
+    p          - Previous screen
+    INDEX      - Go to screen starting at torrent INDEX
+    q          - Close viewer (and select torrent)
+
+Rows per screen: PAGER_ROWS (config.ini), or as many as fit the terminal.
+"""
+import shutil
+
+from torrench.utilities.stream_table import SAMPLE_ROWS, StreamTable
+
+enabled = False
+# Lines of terminal used by viewer itself (header, prompt)
+RESERVED_LINES = 8
+
+
+def enable():
+    """Enable viewer (instead of printing whole result table)."""
+    global enabled
+    enabled = True
+
+
+def screen_rows():
+    """Rows fitting the terminal (every row takes 2 lines in grid format)."""
+    lines = shutil.get_terminal_size((80, 24)).lines
+    return max(5, (lines - RESERVED_LINES) // 2)
+
+
+class Pager:
+    """
+    Pager class.
+
+    Shows `count` rows (table with `headers`) screen by screen.
+    Rows are made when shown, by get_rows(start, end).
+    Column widths are computed from the first screen (see stream_table.py).
+    """
+
+    def __init__(self, headers, get_rows, count, per_screen, ascii_only=False):
+        """Initialisations."""
+        self.get_rows = get_rows
+        self.count = count
+        self.per_screen = max(1, per_screen)
+        self.table = StreamTable(headers, ascii_only)
+        self.table.set_widths(get_rows(0, SAMPLE_ROWS))
+        self.start = 0
+
+    def show(self):
+        """Print screen of rows starting at self.start."""
+        end = min(self.start + self.per_screen, self.count)
+        self.table.print_rows(self.get_rows(self.start, end), header=True)
+        print("\nTorrents %d-%d of %d" % (self.start+1, end, self.count))
+
+    def move(self, key):
+        """
+        Move screen according to `key`.
+        Returns False once viewer is closed.
+        """
+        key = key.strip().lower()
+        last_start = max(0, self.count - self.per_screen)
+        if key in ('q', 'r'):
+            return False
+        elif key in ('', 'n'):
+            if self.start >= last_start:
+                return False
+            self.start = min(self.start + self.per_screen, last_start)
+        elif key == 'p':
+            self.start = max(0, self.start - self.per_screen)
+        else:
+            try:
+                index = int(key)
+            except ValueError:
+                print("\nBad Input!")
+                return True
+            if index < 1 or index > self.count:
+                print("\nBad Input!")
+                return True
+            self.start = min(index - 1, last_start)
+        return True
+
+    def run(self):
+        """View rows until viewer is closed (or last screen is passed)."""
+        if not self.count:
+            return
+        while True:
+            self.show()
+            if self.count <= self.per_screen:
+                return
+            try:
+                key = input("([Enter]/n = next, p = previous, INDEX = go to, q = close)\nview > ")
+            except EOFError:
+                return
+            if not self.move(key):
+                return
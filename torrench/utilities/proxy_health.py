@@ -0,0 +1,57 @@
+"""
+Proxy Health Module.
+
+Results of proxy tests are remembered between runs
+(proxy_health.json in the cache directory), per site and proxy:
+
+    last_success - time of last passed test
+    last_failure - time of last failed test (or failed request)
+    latency      - time taken by last passed test (seconds)
+    valid        - result of last test
+
+A proxy that passed its test less than PROXY_CACHE_TTL seconds ago
+(config.ini, default 1800; 0 disables) is used without testing it again.
+"""
+import time
+
+from torrench.utilities.cache import JsonStore
+
+store = JsonStore('proxy_health.json')
+
+
+def record(site, proxy, passed, latency=None):
+    """Record result of a proxy test (or request)."""
+    def _update(data):
+        entry = data.setdefault(site, {}).setdefault(proxy, {})
+        now = time.time()
+        entry['valid'] = passed
+        if passed:
+            entry['last_success'] = now
+            if latency is not None:
+                entry['latency'] = latency
+        else:
+            entry['last_failure'] = now
+    store.update(_update)
+
+
+def fresh_proxy(site, proxies, ttl):
+    """
+    Return (proxy, age) of the fastest proxy (out of `proxies`) that passed
+    its last test less than `ttl` seconds ago. (None, None) if there's none.
+    """
+    entries = store.load().get(site, {})
+    now = time.time()
+    best = None
+    for proxy in proxies:
+        entry = entries.get(proxy)
+        if not entry or not entry.get('valid'):
+            continue
+        age = now - entry.get('last_success', 0)
+        if age < 0 or age >= ttl:
+            continue
+        latency = entry.get('latency', float('inf'))
+        if best is None or latency < best[0]:
+            best = (latency, proxy, age)
+    if best is None:
+        return None, None
+    return best[1], best[2]
@@ -0,0 +1,120 @@
+"""
+Rate Limit Module.
+
+Requests per second to every host are limited by a token bucket
+(see session.get(); all HTTP traffic goes through it). A request takes
+a token; tokens come back at the host's rate, and at most BURST of them
+are kept, so up to BURST requests can go out at once after a pause.
+
+Rates are set per site in config.ini, named like the site's proxies
+(<NAME>_URL), and apply to all of its proxies:
+
+    RARBG_RATE = 0.5    (requests per second; RarBg API allows 1 req/2 s)
+    1337X_RATE = 4
+    1337X_BURST = 4     (default: 1)
+
+Hosts of other sites use RATE_LIMIT and RATE_BURST (default 0: no limit).
+RarBg is limited to 0.5 requests per second unless set otherwise.
+
+Waiting for a token happens outside of any lock, so concurrent requests
+to a host are spread out (in the order they asked) instead of sent at once.
+"""
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+import torrench.utilities.settings as settings
+
+logger = logging.getLogger('log1')
+
+# Rates (requests per second) of sites, unless set in config.ini
+DEFAULT_RATES = {'rarbg': 0.5}
+
+_buckets = {}
+_sites = {}
+_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    TokenBucket class.
+
+    Gives out `rate` tokens per second, keeping at most `burst` of them.
+    """
+
+    def __init__(self, rate, burst=1):
+        """Initialisations."""
+        self.rate = rate
+        self.capacity = max(1.0, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token. Returns seconds to wait before it may be used.
+        (Tokens are lent ahead, so later callers wait longer.)
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+def host(url):
+    """Host (and port) of `url` (scheme may be missing)."""
+    if '//' not in url:
+        url = '//' + url
+    return urlsplit(url).netloc.lower()
+
+
+def assign(urls, site):
+    """Limit hosts of `urls` (eg. proxies of `site`) with rate of `site` (<NAME>_RATE)."""
+    with _lock:
+        for url in urls:
+            name = host(url)
+            if name and _sites.get(name) != site:
+                _sites[name] = site
+                # Rate of site replaces the default one, if already in use
+                _buckets.pop(name, None)
+
+
+def site_bucket(site):
+    """TokenBucket for hosts of `site` (None if not limited)."""
+    if site is None:
+        rate = settings.get_float('RATE_LIMIT', 0)
+        burst = settings.get_float('RATE_BURST', 1)
+    else:
+        rate = settings.get_float('{}_RATE'.format(site.upper()),
+                                  DEFAULT_RATES.get(site, settings.get_float('RATE_LIMIT', 0)))
+        burst = settings.get_float('{}_BURST'.format(site.upper()), settings.get_float('RATE_BURST', 1))
+    if rate <= 0:
+        return None
+    return TokenBucket(rate, burst)
+
+
+def wait(url):
+    """Wait until a request to host of `url` may be sent."""
+    name = host(url)
+    with _lock:
+        if name not in _buckets:
+            _buckets[name] = site_bucket(_sites.get(name))
+        bucket = _buckets[name]
+    if bucket is None:
+        return
+    delay = bucket.reserve()
+    if delay > 0:
+        logger.debug("Rate limit: waiting %.2f sec for %s" % (delay, name))
+        time.sleep(delay)
+
+
+def reset():
+    """Forget all hosts (rates are read again from config.ini)."""
+    with _lock:
+        _buckets.clear()
+        _sites.clear()
@@ -0,0 +1,247 @@
+"""
+Result Module.
+
+TorrentResult is one torrent found by a torrent-site module.
+Modules add results with add_result() (see Common.py); output tables
+(display_row() of module), cross-site merge, JSON records and
+torrent selection all use them.
+
+Values are kept as parsed (size in bytes, seeds/leeches as int);
+they are formatted only when shown.
+"""
+import base64
+import binascii
+import re
+import time
+
+# Sites write "GB" for both GB and GiB; All sizes are taken as binary.
+UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4, 'P': 1024 ** 5}
+SIZE_PATTERN = re.compile(r'([\d.,]+)\s*([KMGTP]?)I?B', re.IGNORECASE)
+DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d', '%m-%d %Y')
+# Ages (eg. '3 days ago'; KAT/Idope: '1 months', '2 days')
+AGE_PATTERN = re.compile(r'\b(\d+|an?)\s+(second|sec|minute|min|hour|day|week|month|year)s?\b', re.IGNORECASE)
+# TPB: 'Today 14:22', 'Y-day 14:22', '03-15 14:22' (this year)
+DAY_TIME_PATTERN = re.compile(r'^(today|y-day|yesterday|\d{2}-\d{2})\s+(\d{1,2}):(\d{2})$', re.IGNORECASE)
+# 1337x: "Mar. 1st '17"
+MONTH_DAY_PATTERN = re.compile(r"^([a-z]{3})[a-z]*\.?\s+(\d{1,2})(?:st|nd|rd|th)?\s+'(\d{2})$", re.IGNORECASE)
+# 1337x (today): '9am', '10:30pm'
+CLOCK_PATTERN = re.compile(r'^(\d{1,2})(?::(\d{2}))?\s*([ap]m)$', re.IGNORECASE)
+# BitTorrent info-hash (hex, or base32) of magnetic links
+BTIH_PATTERN = re.compile(r'urn:btih:([0-9a-f]{40}|[a-z2-7]{32})(?![0-9a-z])', re.IGNORECASE)
+AGE_UNITS = {
+    'second': 1, 'sec': 1, 'minute': 60, 'min': 60, 'hour': 3600, 'day': 86400,
+    'week': 7 * 86400, 'month': 30 * 86400, 'year': 365 * 86400,
+}
+
+
+def parse_size(text):
+    """Size (eg. '1.4 GiB', '700 MB') in bytes. None if unknown."""
+    match = SIZE_PATTERN.search(str(text).replace('\xa0', ' '))
+    if match is None:
+        return None
+    try:
+        return int(float(match.group(1).replace(',', '')) * UNITS[match.group(2).upper()])
+    except ValueError:
+        return None
+
+
+def parse_count(text):
+    """Seeds/leeches count. None if unknown (-1, NA, ...)."""
+    try:
+        count = int(str(text).replace(',', '').strip())
+    except ValueError:
+        return None
+    return count if count >= 0 else None
+
+
+def _at(day, hour, minute):
+    """Timestamp of `hour`:`minute` (local time) of date `day` (struct_time)."""
+    return time.mktime((day.tm_year, day.tm_mon, day.tm_mday, hour, minute, 0, 0, 0, -1))
+
+
+def _day_time(day, hour, minute):
+    """Timestamp of TPB date ('Today', 'Y-day' or 'MM-DD' of this year) and time."""
+    now = time.time()
+    key = day.lower()
+    if key == 'today':
+        return _at(time.localtime(now), hour, minute)
+    if key in ('y-day', 'yesterday'):
+        return _at(time.localtime(now - 86400), hour, minute)
+    year = time.localtime(now).tm_year
+    month, mday = int(day[:2]), int(day[3:])
+    timestamp = time.mktime((year, month, mday, hour, minute, 0, 0, 0, -1))
+    if timestamp > now + 86400:
+        # Date of last year (eg. '12-31' seen in January)
+        timestamp = time.mktime((year - 1, month, mday, hour, minute, 0, 0, 0, -1))
+    return timestamp
+
+
+def _clock(hour, minute, meridiem):
+    """Timestamp of time of day (eg. '9am'): today, or yesterday if still to come."""
+    hour = hour % 12 + (12 if meridiem.lower() == 'pm' else 0)
+    now = time.time()
+    timestamp = _at(time.localtime(now), hour, minute)
+    return timestamp if timestamp <= now else _at(time.localtime(now - 86400), hour, minute)
+
+
+def parse_date(text):
+    """
+    Timestamp of date `text`, as given by sites. None if not understood.
+
+    >>> parse_date("Mar. 1st '17") == parse_date("2017-03-01")
+    True
+    >>> parse_date("03-01\xa02017") == parse_date("2017-03-01")
+    True
+    >>> [parse_date(t) is not None for t in ("1\xa0months", "1 days", "3 days ago",
+    ...     "Today\xa014:22", "Y-day\xa014:22", "03-15\xa014:22", "9am", "10:30pm")]
+    [True, True, True, True, True, True, True, True]
+    >>> 86000 < parse_date("1 days") - parse_date("2 days") < 86800
+    True
+    >>> parse_date("Today 14:22") - parse_date("Y-day 14:22") in (82800, 86400, 90000)
+    True
+    >>> parse_date("NA") is None
+    True
+    """
+    text = ' '.join(str(text).replace('\xa0', ' ').split())
+    try:
+        match = DAY_TIME_PATTERN.match(text)
+        if match is not None:
+            return _day_time(match.group(1), int(match.group(2)), int(match.group(3)))
+        match = CLOCK_PATTERN.match(text)
+        if match is not None:
+            return _clock(int(match.group(1)), int(match.group(2) or 0), match.group(3))
+        match = MONTH_DAY_PATTERN.match(text)
+        if match is not None:
+            return time.mktime(time.strptime("{} {} {}".format(*match.groups()), '%b %d %y'))
+    except (ValueError, OverflowError):
+        return None
+    match = AGE_PATTERN.search(text)
+    if match is not None:
+        count = 1 if match.group(1).lower() in ('a', 'an') else int(match.group(1))
+        return time.time() - count * AGE_UNITS[match.group(2).lower()]
+    for date_format in DATE_FORMATS:
+        try:
+            return time.mktime(time.strptime(text[:19], date_format))
+        except ValueError:
+            continue
+    return None
+
+
+def info_hash(magnet):
+    """Info-hash (upper-case hex) of `magnet`. None if it has none."""
+    match = BTIH_PATTERN.search(magnet or '')
+    if match is None:
+        return None
+    value = match.group(1)
+    if len(value) == 32:
+        try:
+            value = binascii.hexlify(base64.b32decode(value.upper())).decode()
+        except (binascii.Error, ValueError):
+            return None
+    return value.upper()
+
+
+def _number(value, parse):
+    """`value` as int (None if unknown); text is parsed with `parse`."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value) if value >= 0 else None
+    return parse(value)
+
+
+def format_size(size):
+    """Size in bytes, as shown in tables (eg. '1.40 GB')."""
+    if size is None:
+        return 'NA'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return "{0:.2f} {1}".format(size, unit) if unit != 'B' else "{} B".format(size)
+        size /= 1024
+    return "{0:.2f} TB".format(size)
+
+
+def format_count(count):
+    """Seeds/leeches count, as shown in tables."""
+    return 'NA' if count is None else str(count)
+
+
+class TorrentResult:
+    """
+    TorrentResult class.
+
+    name, uploader    - As given by site (without colors).
+    status            - Uploader status (eg. 'vip', 'trusted'), if site has it.
+    category, comments
+    size              - Bytes (None if unknown).
+    seeds, leeches    - int (None if unknown).
+    date, timestamp   - Date as given by site, and its timestamp (None if not understood).
+    magnet, link      - Magnetic link (None for 1337x/LimeTorrents; it is on torrent page),
+                        and torrent page.
+    site, index       - Module (class_name) and INDEX in output table (set by add_result()).
+    sources           - Sites the torrent was found on, once merged with
+                        same torrent of other sites (see merge()). None until then.
+    extra             - Other values shown by site (see display_row() of module).
+    """
+    __slots__ = ('name', 'uploader', 'status', 'category', 'comments', 'size',
+                 'seeds', 'leeches', 'date', 'timestamp', 'magnet', 'link',
+                 'site', 'index', 'sources', 'extra')
+
+    def __init__(self, name, size=None, seeds=None, leeches=None, date=None,
+                 magnet=None, link=None, uploader=None, status=None,
+                 category=None, comments=None, extra=()):
+        """Initialisations. `size`, `seeds` and `leeches` may be given as text."""
+        self.name = name
+        self.uploader = uploader
+        self.status = status
+        self.category = category
+        self.comments = comments
+        self.size = _number(size, parse_size)
+        self.seeds = _number(seeds, parse_count)
+        self.leeches = _number(leeches, parse_count)
+        self.date = date
+        self.timestamp = None if date is None else parse_date(date)
+        self.magnet = magnet
+        self.link = link
+        self.site = None
+        self.index = 0
+        self.sources = None
+        self.extra = extra
+
+    def full_name(self):
+        """Name, followed by uploader (if any)."""
+        if self.uploader:
+            return "{} ({})".format(self.name, self.uploader)
+        return self.name
+
+    def merge(self, other):
+        """
+        Merge `other` (same torrent, found on another site) into this result.
+        Highest seeds/leeches are kept; sites are added to self.sources.
+        """
+        if self.sources is None:
+            self.sources = [self.site]
+        for site in other.sources or [other.site]:
+            if site not in self.sources:
+                self.sources.append(site)
+        if other.seeds is not None and (self.seeds is None or other.seeds > self.seeds):
+            self.seeds = other.seeds
+        if other.leeches is not None and (self.leeches is None or other.leeches > self.leeches):
+            self.leeches = other.leeches
+        if self.size is None:
+            self.size = other.size
+        if self.link is None:
+            self.link = other.link
+
+    def record(self):
+        """Result as dict (see json_output.py)."""
+        return {
+            'name': self.name,
+            'size': self.size,
+            'seeds': self.seeds,
+            'leeches': self.leeches,
+            'date': self.date,
+            'magnet': self.magnet,
+            'link': self.link,
+            'site': self.site,
+        }
@@ -0,0 +1,170 @@
+"""
+Result Cache Module.
+
+Parsed result rows of searches (not pages), keyed on (site, query, page).
+A page cached as an empty list had no results (first pages are not cached
+empty; see Common.cache_rows()).
+
+Two tiers:
+    memory - The RESULT_CACHE_SIZE (config.ini, default 256) pages used
+             last, in this process.
+    disk   - One file per page in $XDG_CACHE_HOME/torrench/results/,
+             so cached pages survive restarts. The RESULT_CACHE_DISK_SIZE
+             (default 2000) pages used last are kept (checked every
+             EVICT_EVERY writes, so the directory is not scanned on every write).
+
+Pages are used for RESULT_CACHE_TTL seconds (default 600; 0 disables
+the cache). The TTL of a site can be set with RESULT_CACHE_TTL_<SITE>,
+eg. RESULT_CACHE_TTL_NYAA = 300.
+
+Links on the proxy in use (eg. 1337x torrent pages) are stored relative
+to it (see relative()), so cached rows stay usable once another proxy is used.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import torrench.utilities.settings as settings
+
+logger = logging.getLogger('log1')
+
+EVICT_EVERY = 50
+# Stands for the proxy in use, in cached rows
+PROXY_MARK = '<proxy>'
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+_writes = 0
+
+
+def ttl(site):
+    """Seconds results of `site` are used for."""
+    return settings.get_int('RESULT_CACHE_TTL_' + site.upper(), settings.get_int('RESULT_CACHE_TTL', 600))
+
+
+def cache_dir():
+    """Directory of disk tier."""
+    return os.path.join(settings.cache_dir, 'results')
+
+
+def _key(site, query, page):
+    return json.dumps([site, query, page])
+
+
+def _path(key):
+    return os.path.join(cache_dir(), hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+
+def _remember(key, entry):
+    """Keep `entry` in memory tier (dropping least recently used pages)."""
+    size = settings.get_int('RESULT_CACHE_SIZE', 256)
+    with _lock:
+        _memory[key] = entry
+        _memory.move_to_end(key)
+        while len(_memory) > max(0, size):
+            _memory.popitem(last=False)
+
+
+def _load(key):
+    """Entry (stored, rows) of disk tier, or None."""
+    path = _path(key)
+    try:
+        with open(path, 'r', encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get('key') != key:
+            return None
+        # Last use decides what is evicted.
+        os.utime(path)
+        return data['stored'], data['rows']
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, AttributeError) as e:
+        logger.debug("Unable to read cached results %s: %s" % (path, e))
+        return None
+
+
+def relative(rows, proxy):
+    """`rows` with values starting with `proxy` made relative to it (PROXY_MARK)."""
+    return [[PROXY_MARK + value[len(proxy):] if isinstance(value, str) and value.startswith(proxy) else value
+             for value in row] if isinstance(row, (list, tuple)) else row for row in rows]
+
+
+def absolute(rows, proxy):
+    """`rows` (of relative()) with PROXY_MARK replaced by `proxy`."""
+    return [[proxy + value[len(PROXY_MARK):] if isinstance(value, str) and value.startswith(PROXY_MARK) else value
+             for value in row] if isinstance(row, (list, tuple)) else row for row in rows]
+
+
+def _save(key, entry):
+    """Write `entry` to disk tier."""
+    global _writes
+    directory = cache_dir()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding="utf-8") as f:
+            json.dump({'key': key, 'stored': entry[0], 'rows': entry[1]}, f)
+        os.replace(temp, _path(key))
+        with _lock:
+            _writes += 1
+            evict = _writes % EVICT_EVERY == 1
+        if evict:
+            _evict(directory)
+    except OSError as e:
+        logger.debug("Unable to cache results: %s" % (e))
+
+
+def _evict(directory):
+    """Remove least recently used pages of disk tier, above RESULT_CACHE_DISK_SIZE."""
+    size = settings.get_int('RESULT_CACHE_DISK_SIZE', 2000)
+    files = [entry for entry in os.scandir(directory) if entry.name.endswith('.json')]
+    if len(files) <= size:
+        return
+    files.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in files[:len(files) - size]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def get(site, query, page):
+    """Cached rows of result page `page` of `query` on `site`, or None."""
+    max_age = ttl(site)
+    if max_age <= 0 or query is None:
+        return None
+    key = _key(site, query, page)
+    now = time.time()
+    with _lock:
+        entry = _memory.get(key)
+        if entry is not None:
+            if 0 <= now - entry[0] < max_age:
+                _memory.move_to_end(key)
+                return entry[1]
+            del _memory[key]
+    entry = _load(key)
+    if entry is None:
+        return None
+    if not 0 <= now - entry[0] < max_age:
+        try:
+            os.remove(_path(key))
+        except OSError:
+            pass
+        return None
+    _remember(key, entry)
+    return entry[1]
+
+
+def put(site, query, page, rows):
+    """Cache `rows` (list) of result page `page` of `query` on `site`."""
+    if ttl(site) <= 0 or query is None:
+        return
+    key = _key(site, query, page)
+    entry = (time.time(), rows)
+    _remember(key, entry)
+    _save(key, entry)
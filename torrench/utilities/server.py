@@ -0,0 +1,340 @@
+"""
+Server Module.
+
+Runs torrench as a local HTTP/JSON service (--serve).
+The process stays up, so the parsed config.ini, HTTP connection pools,
+proxy lists and the proxy selected for each site stay warm, and repeated
+or concurrent searches do not pay start-up costs again.
+
+Endpoints (parameters in query string; for POST, also as JSON body):
+
+    GET  /                 - Version and sites available.
+    GET  /search           - Search one or more sites.
+                             q=QUERY, site=SITE[,SITE...] (default: all),
+                             pages=N (default: 1)
+    GET  /magnet           - Magnetic link of a torrent (1337x/LimeTorrents,
+                             whose magnets are on torrent pages).
+                             site=SITE, link=TORRENT-LINK
+    POST /magnets          - Magnetic links of many records (any site).
+                             records=[RECORD, ...] (as in 'results' of /search)
+    POST /download         - Load torrent (magnet) to client (see torrench.ini).
+                             magnet=MAGNET, or site=SITE and link=TORRENT-LINK
+
+Results are records as printed by --json (see json_output.py).
+Errors are returned as {"error": MESSAGE} with status 4xx/5xx.
+
+POST bodies must be JSON (Content-Type: application/json), and requests
+from web pages of other origins are refused, so pages opened in a browser
+can not load torrents through the service. Requests must name the service
+as Host (its address, localhost, 127.0.0.1 or [::1], on its port), so
+pages of other sites resolving to it (DNS rebinding) are refused too. Torrent links are only
+fetched from proxies of their site (see magnets.known_link()).
+"""
+import json
+import logging
+import os
+import socketserver
+import sys
+import time
+from concurrent.futures import TimeoutError
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import torrench.utilities.json_output as json_output
+import torrench.utilities.magnets as magnets
+import torrench.utilities.settings as settings
+from torrench.utilities.Config import Config
+from torrench.utilities.cross_site import CrossSite
+from torrench.utilities.daemon_pool import DaemonPool
+
+DEFAULT_ADDRESS = '127.0.0.1:8097'
+# Names of this machine accepted in Host header (besides the address served on)
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '[::1]')
+# Sites whose magnets are on torrent pages (fetched by get_magnet_external())
+EXTERNAL_MAGNETS = ['x1337', 'limetorrents']
+
+
+class RequestError(Exception):
+    """Bad request (reported to client with `status`)."""
+
+    def __init__(self, message, status=400):
+        Exception.__init__(self, message)
+        self.status = status
+
+
+class _Server(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SearchServer(Config):
+    """
+    SearchServer class.
+
+    Answers requests of the HTTP/JSON API (see module docstring).
+    Every request is handled in its own thread.
+    """
+
+    def __init__(self, sites, version):
+        """Initialisations."""
+        Config.__init__(self)
+        self.sites = sites
+        self.version = version
+        self.logger = logging.getLogger('log1')
+        self.started = time.time()
+        self.httpd = None
+        self.hosts = set()
+        # Shared by all requests, so limits per host hold across requests
+        self.magnets = magnets.MagnetResolver()
+
+    def param(self, params, name, default=None):
+        """Value of parameter `name` of request."""
+        value = params.get(name, default)
+        if isinstance(value, list):
+            value = value[0] if value else default
+        return value
+
+    def check_site(self, site):
+        """Raise RequestError if `site` is unknown."""
+        if site not in self.sites:
+            raise RequestError("Unknown site '{}'. Sites: {}".format(site, ", ".join(self.sites)))
+
+    def index(self, params):
+        """GET /"""
+        return {
+            'version': self.version,
+            'sites': self.sites,
+            'uptime': round(time.time() - self.started, 1),
+        }
+
+    def search_site(self, site, query, pages):
+        """Search `query` on `site`. Returns list of records."""
+        cs = CrossSite(query, pages)
+        module_obj = cs.fetch_site(site)
+        return [json_output.record(result) for result in module_obj.results]
+
+    def search(self, params):
+        """
+        GET /search
+
+        Sites are searched concurrently. A site failing (or taking longer
+        than SITE_TIMEOUT seconds) is reported in 'sites', and does not
+        fail the request.
+        """
+        query = self.param(params, 'q')
+        if not query or not query.strip():
+            raise RequestError("Parameter 'q' (query) expected")
+        query = query.strip().replace("'", "")
+        sites = self.param(params, 'site')
+        sites = [s.strip() for s in sites.split(',') if s.strip()] if sites else self.sites
+        for site in sites:
+            self.check_site(site)
+        try:
+            pages = int(self.param(params, 'pages', 1))
+        except ValueError:
+            raise RequestError("Parameter 'pages' must be a number")
+        if pages <= 0 or pages > 50:
+            raise RequestError("Enter valid page input [0<p<=50]")
+        site_timeout = settings.get_float('SITE_TIMEOUT', 60)
+        start_time = time.time()
+        results = []
+        summary = {}
+        executor = DaemonPool(max_workers=len(sites))
+        futures = [(site, executor.submit(self.search_site, site, query, pages)) for site in sites]
+        try:
+            for site, future in futures:
+                remaining = max(0.0, start_time + site_timeout - time.time())
+                try:
+                    records = future.result(timeout=remaining)
+                except TimeoutError:
+                    summary[site] = {'results': 0, 'error': "timed out"}
+                    continue
+                except (SystemExit, Exception) as e:
+                    self.logger.exception(e)
+                    summary[site] = {'results': 0, 'error': "failed. See logs for details"}
+                    continue
+                results += records
+                summary[site] = {'results': len(records), 'error': None}
+        finally:
+            executor.shutdown()
+        return {
+            'query': query,
+            'pages': pages,
+            'sites': summary,
+            'time': round(time.time() - start_time, 3),
+            'results': results,
+        }
+
+    def resolve_magnet(self, params):
+        """Magnetic link of torrent `link` of `site`."""
+        site = self.param(params, 'site')
+        link = self.param(params, 'link')
+        if not site or not link:
+            raise RequestError("Parameters 'site' and 'link' expected")
+        self.check_site(site)
+        if site not in EXTERNAL_MAGNETS:
+            raise RequestError("Magnets of '{}' are part of search results".format(site))
+        if not magnets.known_link(site, link):
+            raise RequestError("'link' must be a torrent page on a proxy of '{}'".format(site))
+        resolver = Config()
+        resolver.class_name = site
+        try:
+            magnet = resolver.get_magnet_external(link)
+        except Exception as e:
+            self.logger.exception(e)
+            raise RequestError("Unable to get magnetic link from {}".format(link), 502)
+        return magnet
+
+    def magnet(self, params):
+        """GET /magnet"""
+        return {'link': self.param(params, 'link'), 'magnet': self.resolve_magnet(params)}
+
+    def bulk_magnets(self, params):
+        """
+        POST /magnets
+
+        Records having a magnet are returned as they are; magnets of
+        1337x/LimeTorrents records are fetched from torrent pages.
+        Records whose magnet could not be had are reported in 'failed'
+        (and have magnet null), and do not fail the request.
+        """
+        records = params.get('records')
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            raise RequestError("Parameter 'records' (list of records) expected")
+        start_time = time.time()
+        resolved, failures = self.magnets.resolve_records(records, settings.get_float('SITE_TIMEOUT', 60))
+        return {
+            'time': round(time.time() - start_time, 3),
+            'results': resolved,
+            'failed': failures,
+        }
+
+    def download(self, params):
+        """POST /download"""
+        magnet = self.param(params, 'magnet')
+        if not magnet:
+            magnet = self.resolve_magnet(params)
+        if not isinstance(magnet, str) or not magnet.startswith('magnet:'):
+            raise RequestError("'magnet' must be a magnetic link (magnet:...)")
+        loader = Config()
+        if not loader.OS_WIN and not os.path.isfile(loader.torrench_config_file):
+            raise RequestError("No config (torrench.ini) file found! Client is not configured", 503)
+        loader.load_torrent(magnet)
+        return {'magnet': magnet}
+
+    def routes(self):
+        """(method, path): handler."""
+        return {
+            ('GET', '/'): self.index,
+            ('GET', '/search'): self.search,
+            ('GET', '/magnet'): self.magnet,
+            ('POST', '/magnets'): self.bulk_magnets,
+            ('POST', '/download'): self.download,
+        }
+
+    def handler(self):
+        """Request handler class bound to this server."""
+        server = self
+        routes = self.routes()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                server.logger.debug("serve: %s - %s" % (self.address_string(), format % args))
+
+            def reply(self, status, data):
+                body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def handle_request(self, method):
+                url = urlsplit(self.path)
+                params = parse_qs(url.query)
+                path = url.path.rstrip('/') or '/'
+                try:
+                    if (self.headers.get('Host') or '').lower() not in server.hosts:
+                        raise RequestError("Host not allowed", 403)
+                    origin = self.headers.get('Origin')
+                    if origin and urlsplit(origin).netloc != self.headers.get('Host'):
+                        raise RequestError("Cross-origin requests are not allowed", 403)
+                    if method == 'POST':
+                        content_type = (self.headers.get('Content-Type') or '').split(';')[0].strip().lower()
+                        if content_type != 'application/json':
+                            raise RequestError("POST body must be JSON (Content-Type: application/json)", 415)
+                        length = int(self.headers.get('Content-Length') or 0)
+                        if length:
+                            try:
+                                params.update(json.loads(self.rfile.read(length).decode('utf-8')))
+                            except (ValueError, TypeError, AttributeError):
+                                raise RequestError("Body must be a JSON object")
+                    if (method, path) not in routes:
+                        raise RequestError("Not found: {} {}".format(method, path), 404)
+                    self.reply(200, routes[(method, path)](params))
+                except RequestError as e:
+                    # Body may be left unread
+                    self.close_connection = True
+                    self.reply(e.status, {'error': str(e)})
+                except (SystemExit, Exception) as e:
+                    server.logger.exception(e)
+                    self.reply(500, {'error': "Something went wrong! See logs for details."})
+
+            def do_GET(self):
+                self.handle_request('GET')
+
+            def do_POST(self):
+                self.handle_request('POST')
+
+        return Handler
+
+    def allowed_hosts(self, name, host, port):
+        """Host header values accepted (see module docstring); `name`: host as given by user."""
+        names = set(LOCAL_HOSTS)
+        for value in (name, host):
+            if value:
+                value = value.lower()
+                names.add('[{}]'.format(value.strip('[]')) if ':' in value else value)
+        hosts = set('{}:{}'.format(value, port) for value in names)
+        if port == 80:
+            hosts |= names
+        return hosts
+
+    def serve(self, address):
+        """Serve on `address` (HOST:PORT) until interrupted."""
+        host, _, port = address.rpartition(':')
+        self.httpd = _Server((host or '127.0.0.1', int(port)), self.handler())
+        host, port = self.httpd.server_address[:2]
+        self.hosts = self.allowed_hosts(address.rpartition(':')[0], host, port)
+        sys.stderr.write("Serving on http://{}:{}/ (Ctrl+C to stop)\n".format(host, port))
+        sys.stderr.flush()
+        self.logger.debug("Serving on {}:{}".format(host, port))
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.httpd.server_close()
+
+
+def main(address, sites, version):
+    """Server execution begins here."""
+    server = SearchServer(sites, version)
+    if not server.file_exists():
+        print("\nConfig file not configured. Configure to continue. Read docs for more info.")
+        print("Config file either does not exist or is not enabled! Exiting!\n")
+        server.logger.error("Config file not configured! Terminating.")
+        sys.exit(2)
+    if not address.rpartition(':')[2].isdigit():
+        print("error: --serve expects [HOST:]PORT (eg. {})".format(DEFAULT_ADDRESS))
+        sys.exit(2)
+    # Output of modules is not needed.
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        server.serve(address)
+    except OSError as e:
+        server.logger.exception(e)
+        sys.stderr.write("Unable to serve on {}: {}\n".format(address, e))
+        sys.exit(2)
+    except KeyboardInterrupt:
+        sys.stderr.write("\nStopped.\n")
@@ -0,0 +1,87 @@
+"""
+HTTP Session Module.
+
+All HTTP traffic of torrench goes through one process-wide
+requests.Session, so TCP/TLS connections to a host are kept alive
+and reused between proxy checks, result pages, magnet lookups
+and .torrent downloads.
+
+requests keeps one connection pool per host. Pool sizes, keep-alive
+and retries can be tuned in config.ini:
+
+    POOL_CONNECTIONS = 20   (number of hosts to keep pools for)
+    POOL_MAXSIZE = 10       (connections kept per host)
+    KEEP_ALIVE = 1          (0 = close connection after every request)
+    HTTP_RETRIES = 1        (retries on 5xx responses; connection errors and timeouts
+                             are not retried, so a dead host costs one timeout)
+    HTTP_BACKOFF = 0.3      (retry backoff factor, in seconds)
+
+Requests to every host are rate-limited (see rate_limit.py).
+"""
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import torrench.utilities.rate_limit as rate_limit
+import torrench.utilities.settings as settings
+
+logger = logging.getLogger('log1')
+
+_session = None
+_lock = threading.Lock()
+
+
+def _build_session():
+    """Create the shared session and mount the pooled adapter."""
+    pool_connections = settings.get_int('POOL_CONNECTIONS', 20)
+    pool_maxsize = settings.get_int('POOL_MAXSIZE', 10)
+    retries = settings.get_int('HTTP_RETRIES', 1)
+    backoff = settings.get_float('HTTP_BACKOFF', 0.3)
+    retry = Retry(
+        total=retries,
+        # Only 5xx responses are retried (see module docstring)
+        connect=0,
+        read=0,
+        backoff_factor=backoff,
+        status_forcelist=(500, 502, 503, 504),
+        raise_on_status=False)
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if not settings.get_bool('KEEP_ALIVE', True):
+        session.headers['Connection'] = 'close'
+    logger.debug("HTTP session ready (pools: %d, per-host: %d, retries: %d)" % (
+        pool_connections, pool_maxsize, retries))
+    return session
+
+
+def get_session():
+    """Return the process-wide session (created on first use)."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get(url, **kwargs):
+    """requests.get() through the shared session (once rate limit of host allows)."""
+    rate_limit.wait(url)
+    return get_session().get(url, **kwargs)
+
+
+def close():
+    """Close all pooled connections."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
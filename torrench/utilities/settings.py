@@ -0,0 +1,71 @@
+"""
+Settings Module.
+
+Tuning options (connection pools, caches, concurrency, ...) are read
+from the [Torrench-Config] section of config.ini.
+Every option has a default, so a missing option (or a missing config file)
+is not an error.
+"""
+import os
+import platform
+from configparser import ConfigParser
+
+SECTION = 'Torrench-Config'
+
+config_dir = os.getenv('XDG_CONFIG_HOME', os.path.expanduser(os.path.join('~', '.config')))
+config_file = os.path.join(config_dir, 'torrench', 'config.ini')
+
+if platform.system() == "Windows":
+    cache_home = os.path.expanduser(os.path.join(os.path.join('~', 'AppData'), 'Local'))
+else:
+    cache_home = os.getenv('XDG_CACHE_HOME', os.path.expanduser(os.path.join('~', '.cache')))
+cache_dir = os.path.join(cache_home, 'torrench')
+
+_config = None
+
+
+def _read():
+    """Read config.ini once per process."""
+    global _config
+    if _config is None:
+        _config = ConfigParser()
+        _config.read(config_file)
+    return _config
+
+
+def reload():
+    """Forget the parsed config.ini (re-read on next lookup)."""
+    global _config
+    _config = None
+
+
+def get(option, fallback=None):
+    """Return `option` as a string, or `fallback` if not set."""
+    value = _read().get(SECTION, option, fallback=None)
+    if value is None or value.strip() == '':
+        return fallback
+    return value.strip()
+
+
+def get_int(option, fallback):
+    """Return `option` as an int."""
+    try:
+        return int(get(option, fallback))
+    except (TypeError, ValueError):
+        return fallback
+
+
+def get_float(option, fallback):
+    """Return `option` as a float."""
+    try:
+        return float(get(option, fallback))
+    except (TypeError, ValueError):
+        return fallback
+
+
+def get_bool(option, fallback):
+    """Return `option` as a bool (1/0, yes/no, true/false, on/off)."""
+    value = get(option)
+    if value is None:
+        return fallback
+    return value.lower() in ('1', 'yes', 'true', 'on')
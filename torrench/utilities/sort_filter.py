@@ -0,0 +1,128 @@
+"""
+Sort/Filter Module.
+
+Orders results (TorrentResult, see result.py) of single-site and
+cross-site searches (--sort, --min, --max).
+
+Keys:
+    seeds, leeches - Count.
+    size           - Bytes (eg. 700MB, 1.4GiB).
+    date           - Upload date (eg. 2017-03-01, or age: 12h, 7d, 2w, 6m, 1y).
+    ratio          - Seeds per leech.
+
+--sort KEY[:asc][,KEY...] sorts on KEY (largest first, unless ':asc'),
+then on the next KEY for equal values. Results without a value for a key
+are last. --min/--max KEY=VALUE drop results outside the range
+(results without a value for KEY are dropped too).
+
+Sort keys of all results are computed once; results are then
+put in order of a sorted index list.
+"""
+import re
+
+from torrench.utilities.result import parse_date, parse_size
+
+KEYS = ('seeds', 'leeches', 'size', 'date', 'ratio')
+# --sorted (cross-site)
+DEFAULT_SORT = [('seeds', True)]
+AGE_PATTERN = re.compile(r'^(\d+)\s*([hdwmy])$', re.IGNORECASE)
+AGE_UNITS = {'h': 'hour', 'd': 'day', 'w': 'week', 'm': 'month', 'y': 'year'}
+
+sort_keys = []
+filters = []
+
+
+def value(result, key):
+    """Value of `key` for `result` (None if unknown)."""
+    if key == 'date':
+        return result.timestamp
+    if key == 'ratio':
+        if result.seeds is None or result.leeches is None:
+            return None
+        return result.seeds / max(result.leeches, 1)
+    return getattr(result, key)
+
+
+def parse_value(key, text):
+    """Filter value `text` of `key`. Raises ValueError if not understood."""
+    text = text.strip()
+    if key == 'size':
+        number = parse_size(text) if not text.isdigit() else int(text)
+    elif key == 'date':
+        match = AGE_PATTERN.match(text)
+        if match is not None:
+            text = "{} {}s ago".format(match.group(1), AGE_UNITS[match.group(2).lower()])
+        number = parse_date(text)
+    else:
+        number = float(text)
+    if number is None:
+        raise ValueError("Bad value for {}: '{}'".format(key, text))
+    return number
+
+
+def parse_sort(spec):
+    """[(key, descending)] of --sort `spec` (eg. 'seeds,size:asc')."""
+    keys = []
+    for part in spec.split(','):
+        key, _, direction = part.strip().lower().partition(':')
+        if key not in KEYS:
+            raise ValueError("Unknown sort key '{}'. Keys: {}".format(key, ", ".join(KEYS)))
+        if direction not in ('', 'asc', 'desc'):
+            raise ValueError("Sort direction must be 'asc' or 'desc' (got '{}')".format(direction))
+        keys.append((key, direction != 'asc'))
+    return keys
+
+
+def parse_filter(spec):
+    """(key, value) of --min/--max `spec` (eg. 'seeds=10')."""
+    key, _, text = spec.partition('=')
+    key = key.strip().lower()
+    if key not in KEYS or not text:
+        raise ValueError("Expected KEY=VALUE (keys: {}), got '{}'".format(", ".join(KEYS), spec))
+    return key, parse_value(key, text)
+
+
+def configure(sort=None, minimums=(), maximums=()):
+    """Set sort keys and filters. Raises ValueError on bad input."""
+    global sort_keys, filters
+    sort_keys = parse_sort(sort) if sort else []
+    filters = [(key, low, None) for key, low in map(parse_filter, minimums)]
+    filters += [(key, None, high) for key, high in map(parse_filter, maximums)]
+
+
+def active():
+    """Check if results are sorted or filtered."""
+    return bool(sort_keys or filters)
+
+
+def matches(result):
+    """Check if `result` passes all filters."""
+    for key, low, high in filters:
+        number = value(result, key)
+        if number is None or (low is not None and number < low) or (high is not None and number > high):
+            return False
+    return True
+
+
+def order(results, keys=None):
+    """
+    Filtered and sorted list of `results` (sort keys: `keys`, or --sort).
+    Results are re-indexed (INDEX) in new order.
+    """
+    keys = sort_keys if keys is None else keys
+    if filters:
+        results = [result for result in results if matches(result)]
+    if keys:
+        sort_values = []
+        for result in results:
+            row = []
+            for key, descending in keys:
+                number = value(result, key)
+                # (missing, value): missing values are last in either direction.
+                row.append((1, 0) if number is None else (0, -number if descending else number))
+            sort_values.append(tuple(row))
+        permutation = sorted(range(len(results)), key=sort_values.__getitem__)
+        results = [results[i] for i in permutation]
+    for index, result in enumerate(results, 1):
+        result.index = index
+    return results
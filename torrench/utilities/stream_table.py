@@ -0,0 +1,139 @@
+"""
+Stream Table Module.
+
+Prints a result table block by block (eg. page by page), as results
+come in, instead of once all results are fetched (tabulate()).
+
+Output looks like tabulate's 'grid' format. Column widths are computed
+from the first rows printed (at most SAMPLE_ROWS), not counting color
+codes. A later cell wider than its column widens it (the header is then
+printed again), as far as the terminal allows; beyond that, the cell is
+wrapped over more lines, keeping its colors.
+"""
+import re
+import shutil
+import sys
+
+SAMPLE_ROWS = 100
+# ANSI color codes (see Common.colorify())
+COLOR_PATTERN = re.compile(r'\x1b\[[0-9;]*m')
+RESET_CODES = ('\x1b[0m', '\x1b[m')
+
+
+def wrap(text, width):
+    """
+    Lines of `text` at most `width` characters wide (color codes not counted).
+    Color codes are never cut; colors still on at a line end are reset
+    there, and set again on the next line.
+    """
+    lines = []
+    current = ''
+    length = 0
+    active = ''
+    for part in re.split('(' + COLOR_PATTERN.pattern + ')', text):
+        if COLOR_PATTERN.fullmatch(part):
+            current += part
+            active = '' if part in RESET_CODES else active + part
+            continue
+        for char in part:
+            if length >= max(1, width):
+                lines.append(current + (RESET_CODES[0] if active else ''))
+                current = active
+                length = 0
+            current += char
+            length += 1
+    lines.append(current)
+    return lines
+
+
+def visible(text):
+    """Text as shown on terminal (without color codes)."""
+    return COLOR_PATTERN.sub('', text)
+
+
+class StreamTable:
+    """
+    StreamTable class.
+
+    print_rows() prints a block of rows; the header is printed
+    with the first block (or again, if asked for).
+    """
+
+    def __init__(self, headers, ascii_only=False):
+        """Initialisations."""
+        self.headers = headers
+        self.ascii_only = ascii_only
+        self.widths = None
+        self.numeric = None
+        self.rows_printed = 0
+
+    def set_widths(self, rows):
+        """Compute column widths and alignment from `rows` (sample)."""
+        sample = rows[:SAMPLE_ROWS]
+        self.widths = [len(str(h)) for h in self.headers]
+        self.numeric = [bool(sample) for _ in self.headers]
+        for row in sample:
+            for i, cell in enumerate(row[:len(self.headers)]):
+                self.widths[i] = max(self.widths[i], len(visible(str(cell))))
+                if not isinstance(cell, (int, float)):
+                    self.numeric[i] = False
+
+    def widen(self, rows):
+        """
+        Widen columns for wider cells of `rows`, keeping the table within
+        terminal width (columns wider than that already are kept).
+        Returns True if any column was widened.
+        """
+        columns = shutil.get_terminal_size().columns
+        widened = False
+        for row in rows:
+            for i, cell in enumerate(row[:len(self.headers)]):
+                length = len(visible(str(cell)))
+                if length <= self.widths[i]:
+                    continue
+                room = columns - len(self.line())
+                if room > 0:
+                    self.widths[i] += min(room, length - self.widths[i])
+                    widened = True
+        return widened
+
+    def cell(self, value, i):
+        """Lines of cell `value` of column `i`, padded (or wrapped) to column width."""
+        width = self.widths[i]
+        lines = []
+        for text in wrap(str(value), width):
+            padding = ' ' * (width - len(visible(text)))
+            lines.append(padding + text if self.numeric[i] else text + padding)
+        return lines
+
+    def line(self, char='-'):
+        return '+' + '+'.join(char * (w + 2) for w in self.widths) + '+'
+
+    def row(self, values):
+        """Lines of row `values` (more than one if a cell is wrapped)."""
+        cells = [self.cell(v, i) for i, v in enumerate(values[:len(self.headers)])]
+        height = max(len(lines) for lines in cells)
+        return ['| ' + ' | '.join(lines[n] if n < len(lines) else ' ' * self.widths[i]
+                                  for i, lines in enumerate(cells)) + ' |'
+                for n in range(height)]
+
+    def print_rows(self, rows, header=False):
+        """Print block of `rows` (with header, if first block or `header`)."""
+        if not rows:
+            return
+        if self.widths is None:
+            self.set_widths(rows)
+            header = True
+        elif self.widen(rows):
+            header = True
+        lines = []
+        if header:
+            lines += ['', self.line()] + self.row(self.headers) + [self.line('=')]
+        for values in rows:
+            lines += self.row(values) + [self.line()]
+        output = '\n'.join(lines)
+        if self.ascii_only:
+            output = output.encode('ascii', 'replace').decode()
+        print(output)
+        sys.stdout.flush()
+        self.rows_printed += len(rows)